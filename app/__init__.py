@@ -9,10 +9,23 @@ def create_app(config_name):
     app.config.from_object(config[config_name])
     config[config_name].init_app(app)
 
+    from .database import init_engines
     db.init_app(app)
+    init_engines(app, db)
+    from .query_profile import init_query_profile
+    init_query_profile(app, db)
+    from .metrics import init_metrics
+    init_metrics(app, db)
+    from .profiler import init_profiler
+    init_profiler(app)
     login_manager.init_app(app)
     migrate.init_app(app, db)
 
+    from .analytics.cache import init_cache
+    init_cache(app)
+    from .analytics.columnar import init_columnar_store
+    init_columnar_store(app)
+
     from .main.routes import main_bp
     from .auth.auth_routes import auth_bp
     from .ingest.ingest_routes import ingest_bp
@@ -25,8 +38,13 @@ def create_app(config_name):
     app.register_blueprint(analytics_bp)
     app.register_blueprint(admin_bp)
 
-    # Create tables automatically for MVP (later: use migrations)
-    with app.app_context():
-        db.create_all()
+    from .commands import register_commands
+    register_commands(app)
+
+    # Create tables automatically for MVP, unless Alembic manages the schema
+    if app.config.get("AUTO_CREATE_SCHEMA", True):
+        from .database import init_schema
+        with app.app_context():
+            init_schema(db)
 
     return app
@@ -3,12 +3,14 @@ from __future__ import annotations
 from datetime import datetime, timezone
 from decimal import Decimal, InvalidOperation
 
-from flask import flash, redirect, render_template, request, url_for
+from flask import abort, current_app, flash, redirect, render_template, request, send_from_directory, url_for
 from flask_login import current_user, login_required
 
 from . import admin_bp
+from ..decorators import admin_required
 from ..extensions import db
-from ..models import MonthlyBudget
+from ..models import MonthlyBudget, User, bump_data_version, to_minor
+from ..profiler import PROFILE_SUFFIX, TOKEN_HEADER, issue_token, profile_dir
 
 
 def _parse_month(value: str) -> tuple[int, int] | None:
@@ -42,7 +44,7 @@ def budget_get():
 
     # Provide defaults for the form
     selected_month = f"{year:04d}-{month:02d}"
-    current_amount = (str(mb.amount) if mb else "")
+    current_amount = (f"{mb.amount:.2f}" if mb else "")
 
     recent = db.session.execute(
         db.select(MonthlyBudget)
@@ -73,6 +75,8 @@ def budget_post():
 
     try:
         amount = Decimal(amount_raw)
+        if not amount.is_finite():
+            raise InvalidOperation(amount_raw)
     except (InvalidOperation, TypeError):
         flash("Please enter a valid budget amount (e.g. 2500.00).", "error")
         return redirect(url_for("admin.budget_get"))
@@ -90,11 +94,60 @@ def budget_post():
     ).scalar_one_or_none()
 
     if mb is None:
-        mb = MonthlyBudget(user_id=current_user.id, year=year, month=month, amount=amount)
+        mb = MonthlyBudget(user_id=current_user.id, year=year, month=month, amount_minor=to_minor(amount))
         db.session.add(mb)
     else:
-        mb.amount = amount
+        mb.amount_minor = to_minor(amount)
 
+    bump_data_version(current_user.id, transactions=False)
     db.session.commit()
     flash(f"Saved budget for {year:04d}-{month:02d}.", "success")
     return redirect(url_for("admin.budget_get"))
+
+
+@admin_bp.get("/profiles")
+@login_required
+@admin_required
+def profiles():
+    """
+    Lists saved profiles. With ?user=<email> (and optionally &path=/some/page)
+    it also mints a token that profiles only that user's requests.
+    """
+    target_email = (request.args.get("user") or "").strip().lower()
+    target_path = (request.args.get("path") or "").strip() or None
+    token = None
+    if target_email:
+        target = db.session.execute(db.select(User).where(User.email == target_email)).scalar_one_or_none()
+        if target is None:
+            flash(f"No user with email {target_email}.", "error")
+        else:
+            token = issue_token(current_user.email, target.id, target_path)
+
+    directory = profile_dir()
+    paths = sorted(directory.glob(f"*{PROFILE_SUFFIX}"), reverse=True) if directory.is_dir() else []
+    files = []
+    for path in paths:
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue  # pruned by another worker since the glob
+        files.append((path.name, stat.st_size, datetime.fromtimestamp(stat.st_mtime)))
+    return render_template(
+        "admin/profiles.html",
+        enabled=bool(current_app.config.get("PROFILER_ENABLED")),
+        token=token,
+        target_email=target_email or current_user.email,
+        target_path=target_path or "",
+        token_header=TOKEN_HEADER,
+        max_age_minutes=int(current_app.config.get("PROFILER_TOKEN_MAX_AGE", 600)) // 60,
+        profiles=files,
+    )
+
+
+@admin_bp.get("/profiles/<path:name>")
+@login_required
+@admin_required
+def profile_download(name: str):
+    if not name.endswith(PROFILE_SUFFIX):
+        abort(404)
+    return send_from_directory(profile_dir(), name, as_attachment=True, mimetype="text/plain")
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
+import json
 from dataclasses import replace
+from datetime import datetime, timezone
 from pathlib import Path
 from typing import Optional, Union
 
@@ -29,6 +31,35 @@ def _default_training_csv() -> Path:
     return _project_root() / "test_data" / "Ekonomi_copyfor_testingaa.csv"
 
 
+def default_model_path() -> Path:
+    """
+    Production category model (what ensure_category_model() maintains).
+    """
+    return _package_dir() / "category_model.joblib"
+
+
+def default_training_jsonl() -> Path:
+    return _package_dir() / "purchase_training.jsonl"
+
+
+def _model_meta_path(model_path: Path) -> Path:
+    """
+    Sidecar recording what the model at model_path was trained on.
+    """
+    return model_path.with_name(model_path.stem + ".meta.json")
+
+
+def read_model_meta(model_path: Path) -> dict:
+    try:
+        return json.loads(_model_meta_path(model_path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def write_model_meta(model_path: Path, meta: dict) -> None:
+    _model_meta_path(model_path).write_text(json.dumps(meta, indent=2), encoding="utf-8")
+
+
 def ensure_category_model(
     *,
     csv_path: Optional[PathLike] = None,
@@ -38,21 +69,24 @@ def ensure_category_model(
     Ensure a trained category model exists.
 
     If the model file doesn't exist (or force_retrain=True), this will:
-      1) Generate purchase_training.jsonl from a CSV (swedish_csv_to_training)
-      2) Train and save the model (train_category_model)
+      1) Incrementally refresh purchase_training.jsonl from a CSV
+         (swedish_csv_to_training.update_training_jsonl converts only source
+         rows it has not converted before)
+      2) Train and save the model (train_category_model), unless the dataset
+         hash equals the one the current model was trained on
 
     Notes:
       - If joblib isn't installed, training will save a pickle fallback:
             category_model.joblib.pkl
         (assuming you've implemented the fallback in train_category_model.py)
+      - Delete category_model.meta.json to force a retrain on unchanged data.
 
     Returns:
       The preferred model path (category_model.joblib). The actual file may be
       category_model.joblib.pkl if joblib is unavailable.
     """
-    base_dir = _package_dir()
-    data_path = base_dir / "purchase_training.jsonl"
-    model_joblib_path = base_dir / "category_model.joblib"
+    data_path = default_training_jsonl()
+    model_joblib_path = default_model_path()
     model_pickle_path = model_joblib_path.with_suffix(model_joblib_path.suffix + ".pkl")
 
     model_exists = model_joblib_path.exists() or model_pickle_path.exists()
@@ -60,31 +94,49 @@ def ensure_category_model(
     if model_exists and not force_retrain:
         return model_joblib_path
 
-    # 1) Ensure training data exists (or regenerate)
-    if force_retrain or not data_path.exists():
-        from .swedish_csv_to_training import ConvertConfig, convert_csv_to_jsonl
-
-        if csv_path is None:
-            csv_path = _default_training_csv()
-
-        csv_path = Path(csv_path)
-        if not csv_path.exists():
-            raise FileNotFoundError(
-                "Training CSV not found.\n"
-                f"Looked for: {csv_path}\n"
-                "Pass csv_path=... to ensure_category_model(), or put the file in test_data/."
-            )
-
-        convert_csv_to_jsonl(ConvertConfig(csv_path=csv_path, out_jsonl=data_path))
+    from .swedish_csv_to_training import ConvertConfig, file_sha256, update_training_jsonl
+
+    # 1) Bring training data up to date with the CSV
+    if csv_path is None:
+        csv_path = _default_training_csv()
+
+    csv_path = Path(csv_path)
+    if csv_path.exists():
+        update_training_jsonl(ConvertConfig(csv_path=csv_path, out_jsonl=data_path))
+    elif not data_path.exists():
+        raise FileNotFoundError(
+            "Training CSV not found.\n"
+            f"Looked for: {csv_path}\n"
+            "Pass csv_path=... to ensure_category_model(), or put the file in test_data/."
+        )
+
+    # 2) Train and save model (skipped when the data hasn't changed)
+    dataset_hash = file_sha256(data_path)
+    meta = read_model_meta(model_joblib_path)
+    if model_exists and meta.get("dataset_sha256") == dataset_hash:
+        print("Training data unchanged; keeping the current category model.")
+        return model_joblib_path
 
-    # 2) Train and save model
     from .train_category_model import TrainConfig, train_and_save
 
     cfg = TrainConfig()
-    cfg = replace(cfg, data_path=data_path, model_out=model_joblib_path)
+    # Keep the pipeline variant a benchmark promotion picked (model_benchmark)
+    cfg = replace(cfg, data_path=data_path, model_out=model_joblib_path, variant=meta.get("variant", cfg.variant))
     train_and_save(cfg)
 
+    write_model_meta(model_joblib_path, {
+        "dataset_sha256": dataset_hash,
+        "variant": cfg.variant,
+        "trained_at": datetime.now(timezone.utc).isoformat(),
+    })
+
     return model_joblib_path
 
 
-__all__ = ["ensure_category_model"]
\ No newline at end of file
+__all__ = [
+    "default_model_path",
+    "default_training_jsonl",
+    "ensure_category_model",
+    "read_model_meta",
+    "write_model_meta",
+]
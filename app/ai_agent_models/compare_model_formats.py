@@ -0,0 +1,130 @@
+"""
+Side-by-side report of the category model variants on the same JSONL.
+
+For every pipeline variant in train_category_model.PIPELINE_VARIANTS this trains
+on the same split and reports:
+  - accuracy on the held-out rows (weighted by example weight)
+  - artifact size on disk (joblib)
+  - load time (median of several joblib.load calls)
+  - predictions/sec when predicting the held-out texts in one batch
+
+Run from the project root:
+> python -m app.ai_agent_models.compare_model_formats [training.jsonl] [report.json]
+"""
+from __future__ import annotations
+
+import json
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import List, Optional
+
+import joblib
+from sklearn.metrics import accuracy_score
+
+from .train_category_model import (
+    PIPELINE_VARIANTS,
+    TrainConfig,
+    fit_model,
+    load_weighted_jsonl,
+    split_dataset,
+)
+
+
+@dataclass
+class CompareConfig:
+    train: TrainConfig = field(default_factory=TrainConfig)
+    variants: tuple[str, ...] = tuple(PIPELINE_VARIANTS)
+    load_repeats: int = 5
+    # Predict at least this many rows when timing throughput (test set is repeated)
+    min_predict_rows: int = 5000
+    report_out: Optional[Path] = None
+
+
+def measure_artifact(model, directory: Path, name: str, load_repeats: int = 5) -> tuple[int, float]:
+    """
+    Dump the model with joblib and return (size_bytes, median_load_seconds).
+    """
+    path = directory / f"{name}.joblib"
+    joblib.dump(model, path)
+    size = path.stat().st_size
+
+    load_times = []
+    for _ in range(max(1, load_repeats)):
+        t0 = time.perf_counter()
+        joblib.load(path)
+        load_times.append(time.perf_counter() - t0)
+    return size, statistics.median(load_times)
+
+
+def measure_throughput(model, texts: List[str], min_rows: int = 5000) -> float:
+    """
+    Predictions/sec for one batched predict() call over at least min_rows texts.
+    """
+    if not texts:
+        return 0.0
+    batch = texts * max(1, -(-min_rows // len(texts)))
+    t0 = time.perf_counter()
+    model.predict(batch)
+    elapsed = time.perf_counter() - t0
+    return len(batch) / elapsed if elapsed > 0 else float("inf")
+
+
+def compare_variants(cfg: CompareConfig) -> list[dict]:
+    texts, labels, weights = load_weighted_jsonl(cfg.train.data_path)
+    x_train, x_test, y_train, y_test, w_train, w_test = split_dataset(texts, labels, weights, cfg.train)
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for variant in cfg.variants:
+            train_cfg = replace(cfg.train, variant=variant)
+
+            t0 = time.perf_counter()
+            model = fit_model(train_cfg, x_train, y_train, sample_weight=w_train)
+            fit_seconds = time.perf_counter() - t0
+
+            accuracy = accuracy_score(y_test, model.predict(x_test), sample_weight=w_test)
+            size, load_seconds = measure_artifact(model, Path(tmp), variant, cfg.load_repeats)
+            rate = measure_throughput(model, list(x_test), cfg.min_predict_rows)
+
+            rows.append({
+                "variant": variant,
+                "accuracy": round(float(accuracy), 4),
+                "artifact_bytes": size,
+                "load_ms": round(load_seconds * 1000.0, 2),
+                "predictions_per_sec": round(rate, 1),
+                "fit_seconds": round(fit_seconds, 3),
+            })
+    return rows
+
+
+def print_report(rows: list[dict]) -> None:
+    header = f"{'variant':<10} {'accuracy':>9} {'size (KB)':>10} {'load (ms)':>10} {'pred/sec':>12} {'fit (s)':>8}"
+    print(header)
+    print("-" * len(header))
+    for r in rows:
+        print(
+            f"{r['variant']:<10} {r['accuracy']:>9.4f} {r['artifact_bytes'] / 1024:>10.1f} "
+            f"{r['load_ms']:>10.2f} {r['predictions_per_sec']:>12.0f} {r['fit_seconds']:>8.3f}"
+        )
+
+
+def main(argv: list[str]) -> None:
+    cfg = CompareConfig()
+    if len(argv) > 0:
+        cfg = replace(cfg, train=replace(cfg.train, data_path=Path(argv[0])))
+    if len(argv) > 1:
+        cfg = replace(cfg, report_out=Path(argv[1]))
+
+    rows = compare_variants(cfg)
+    print_report(rows)
+
+    if cfg.report_out is not None:
+        cfg.report_out.write_text(json.dumps(rows, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
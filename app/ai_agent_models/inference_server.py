@@ -0,0 +1,279 @@
+"""
+Out-of-process category prediction.
+
+One worker process owns the loaded model and listens on a Unix socket. Requests
+from all web workers are queued and micro-batched: the batcher waits up to
+window_ms after the first request (or until max_batch_rows texts are queued),
+runs a single predict_proba over the combined texts and hands every caller its
+slice of labels and confidences. Before each batch the worker stats the model
+file and reloads it when it was replaced (promote-model swaps it atomically),
+so a promotion reaches the worker without a restart.
+
+Wire format: each message is a 4-byte big-endian length followed by UTF-8 JSON.
+  request:  {"texts": [...]}
+  response: {"labels": [...], "confidences": [...]} or {"error": "..."}
+
+Start the worker from the project root:
+> python -m app.ai_agent_models.inference_server --socket instance/category_inference.sock
+
+and point the web app at it with CATEGORY_INFERENCE_SOCKET.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import queue
+import socket
+import socketserver
+import struct
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Optional
+
+from .train_category_model import predict_with_confidence
+
+_HEADER = struct.Struct(">I")
+MAX_MESSAGE_BYTES = 64 * 1024 * 1024
+
+
+class InferenceUnavailable(Exception):
+    """The inference worker could not be reached or failed to answer."""
+
+
+def _recv_exact(sock: socket.socket, n: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            raise ConnectionError("socket closed")
+        buf.extend(chunk)
+    return bytes(buf)
+
+
+def send_message(sock: socket.socket, obj: dict) -> None:
+    payload = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+    sock.sendall(_HEADER.pack(len(payload)) + payload)
+
+
+def recv_message(sock: socket.socket) -> dict:
+    (size,) = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    if size > MAX_MESSAGE_BYTES:
+        raise ValueError(f"message too large: {size} bytes")
+    return json.loads(_recv_exact(sock, size).decode("utf-8"))
+
+
+def _file_signature(path: Path) -> Optional[tuple[int, int, int]]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+
+class MicroBatcher:
+    """
+    With model_path set, the model is reloaded from that file whenever its
+    inode, mtime or size changed since the last load.
+    """
+
+    def __init__(self, model, *, model_path: Optional[Path] = None, window_ms: float = 5.0, max_batch_rows: int = 4096):
+        self.model = model
+        self.model_path = Path(model_path) if model_path is not None else None
+        self._model_signature = _file_signature(self.model_path) if self.model_path is not None else None
+        self.window = window_ms / 1000.0
+        self.max_batch_rows = max_batch_rows
+        self._queue: queue.Queue[tuple[list[str], Future]] = queue.Queue()
+        self.batches = 0
+        self.rows = 0
+        self.reloads = 0
+        self._thread = threading.Thread(target=self._run, name="category-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, texts: list[str]) -> Future:
+        fut: Future = Future()
+        self._queue.put((texts, fut))
+        return fut
+
+    def _collect(self) -> list[tuple[list[str], Future]]:
+        pending = [self._queue.get()]
+        n_rows = len(pending[0][0])
+        deadline = time.monotonic() + self.window
+        while n_rows < self.max_batch_rows:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            pending.append(item)
+            n_rows += len(item[0])
+        return pending
+
+    def _maybe_reload(self) -> None:
+        if self.model_path is None:
+            return
+        signature = _file_signature(self.model_path)
+        if signature is None or signature == self._model_signature:
+            return
+        import joblib
+
+        try:
+            model = joblib.load(self.model_path)
+        except Exception as e:
+            # Keep serving the previous model; the next batch tries again
+            print(f"Could not reload category model from {self.model_path}: {e!r}")
+            return
+        self.model = model
+        self._model_signature = signature
+        self.reloads += 1
+        print(f"Reloaded category model from {self.model_path}")
+
+    def _run(self) -> None:
+        while True:
+            pending = self._collect()
+            texts = [t for item_texts, _ in pending for t in item_texts]
+            self._maybe_reload()
+            try:
+                labels, confidences = predict_with_confidence(self.model, texts)
+            except Exception as e:
+                for _, fut in pending:
+                    fut.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.rows += len(texts)
+            start = 0
+            for item_texts, fut in pending:
+                end = start + len(item_texts)
+                fut.set_result((labels[start:end], confidences[start:end]))
+                start = end
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self) -> None:
+        batcher: MicroBatcher = self.server.batcher  # type: ignore[attr-defined]
+        while True:
+            try:
+                request = recv_message(self.request)
+            except (ConnectionError, OSError, ValueError):
+                return
+            try:
+                texts = [str(t) for t in request.get("texts", [])]
+                labels, confidences = batcher.submit(texts).result()
+                response = {"labels": labels, "confidences": confidences}
+            except Exception as e:
+                response = {"error": repr(e)}
+            try:
+                send_message(self.request, response)
+            except OSError:
+                return
+
+
+class InferenceServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, batcher: MicroBatcher):
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        super().__init__(socket_path, _Handler)
+        self.batcher = batcher
+
+
+class InferenceClient:
+    """
+    Thread-safe client with one persistent connection per thread.
+
+    After a failed call the socket is skipped for retry_after seconds, so a
+    stopped worker costs callers one failed connect, not one per request.
+    """
+
+    def __init__(self, socket_path: str, *, timeout: float = 10.0, retry_after: float = 5.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._local = threading.local()
+        self._down_until = 0.0
+
+    def _connection(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            self._local.sock = sock
+        return sock
+
+    def _reset(self) -> None:
+        sock = getattr(self._local, "sock", None)
+        self._local.sock = None
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+
+    def predict(self, texts: list[str]) -> tuple[list[str], list[Optional[float]]]:
+        if not hasattr(socket, "AF_UNIX") or time.monotonic() < self._down_until:
+            raise InferenceUnavailable(f"inference worker at {self.socket_path} is unavailable")
+        try:
+            sock = self._connection()
+            send_message(sock, {"texts": list(texts)})
+            response = recv_message(sock)
+        except (OSError, ValueError) as e:
+            self._reset()
+            self._down_until = time.monotonic() + self.retry_after
+            raise InferenceUnavailable(f"inference worker at {self.socket_path} failed: {e!r}") from e
+
+        if "error" in response:
+            raise InferenceUnavailable(f"inference worker error: {response['error']}")
+        return response["labels"], response["confidences"]
+
+
+_CLIENTS: dict[str, InferenceClient] = {}
+_CLIENTS_LOCK = threading.Lock()
+
+
+def get_client(socket_path: str) -> InferenceClient:
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.get(socket_path)
+        if client is None:
+            client = _CLIENTS[socket_path] = InferenceClient(socket_path)
+        return client
+
+
+def serve(socket_path: str, model_path: Optional[Path] = None, *, window_ms: float = 5.0, max_batch_rows: int = 4096) -> None:
+    import joblib
+
+    if model_path is None:
+        from . import ensure_category_model
+        model_path = ensure_category_model()
+
+    batcher = MicroBatcher(
+        joblib.load(model_path), model_path=model_path, window_ms=window_ms, max_batch_rows=max_batch_rows
+    )
+    Path(socket_path).parent.mkdir(parents=True, exist_ok=True)
+    with InferenceServer(socket_path, batcher) as server:
+        print(f"Category inference worker listening on {socket_path} (model: {model_path})")
+        try:
+            server.serve_forever()
+        finally:
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Category model inference worker")
+    parser.add_argument("--socket", default=os.environ.get("CATEGORY_INFERENCE_SOCKET", "instance/category_inference.sock"))
+    parser.add_argument("--model", type=Path, default=None, help="defaults to the production model")
+    parser.add_argument("--window-ms", type=float, default=5.0)
+    parser.add_argument("--max-batch-rows", type=int, default=4096)
+    args = parser.parse_args(argv)
+    serve(args.socket, args.model, window_ms=args.window_ms, max_batch_rows=args.max_batch_rows)
+
+
+if __name__ == "__main__":
+    main()
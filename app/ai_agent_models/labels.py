@@ -0,0 +1,38 @@
+"""
+Category labels the model is trained to predict. Kept free of pandas so the
+web app can list and seed them without importing the training code.
+"""
+from __future__ import annotations
+
+TARGET_LABELS: tuple[str, ...] = (
+    "Dagligvaror",
+    "Restaurang",
+    "Fika & Kafé",
+    "Godis & Snacks",
+    "Alkohol",
+    "Boende: Hyra & avgifter",
+    "Hem & inredning",
+    "Bygg & verktyg",
+    "Lokaltrafik",
+    "Taxi & samåkning",
+    "Bil: bränsle & laddning",
+    "Bil: parkering & vägavgifter",
+    "Resor: transport & boende",
+    "Resor: mat & nöjen på resa",
+    "Apotek & medicin",
+    "Vård & tandvård",
+    "Kroppsvård & hygien",
+    "Optik",
+    "Kläder & skor",
+    "Elektronik",
+    "Övriga prylar",
+    "Nöjen & kultur",
+    "Sport & träning",
+    "Sportutrustning",
+    "Hobby & skapande",
+    "Böcker & media",
+    "Barn",
+    "Husdjur",
+    "Finans & avgifter",
+    "Övrigt/Okänt",
+)
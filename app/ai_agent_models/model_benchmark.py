@@ -0,0 +1,287 @@
+"""
+Model selection harness for the category classifier.
+
+Every candidate in train_category_model.PIPELINE_VARIANTS is scored with
+cross-validation (folds run in parallel) and timed end to end. Each fold is
+fit with fit_model(), so it gets the training sample weights and, for the
+hashed variants, compact_pipeline(): the score is that of the artifact that
+would ship. The report is written as JSON:
+  - macro_f1 (mean/std over the CV folds)
+  - train_seconds for a fit on the full dataset
+  - latency_ms_per_row (single-row predict calls, median)
+  - predictions_per_sec (one batched predict call)
+  - artifact_bytes and load_ms (joblib)
+
+A PromotionPolicy decides whether the best candidate replaces the production
+model (category_model.joblib).
+
+Run from the project root:
+> python -m app.ai_agent_models.model_benchmark [training.jsonl] [--promote]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import tempfile
+import time
+from collections import Counter
+from dataclasses import dataclass, replace
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Optional
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.metrics import f1_score
+from sklearn.model_selection import KFold, StratifiedKFold
+
+from . import default_model_path, default_training_jsonl, read_model_meta, write_model_meta
+from .compare_model_formats import measure_artifact, measure_throughput
+from .swedish_csv_to_training import file_sha256
+from .train_category_model import (
+    PIPELINE_VARIANTS,
+    TrainConfig,
+    fit_model,
+    load_weighted_jsonl,
+    train_and_save,
+)
+
+
+@dataclass
+class BenchmarkConfig:
+    data_path: Path = Path(__file__).with_name("purchase_training.jsonl")
+    report_out: Path = Path(__file__).with_name("model_benchmark.json")
+    candidates: tuple[str, ...] = tuple(PIPELINE_VARIANTS)
+    cv_folds: int = 5
+    n_jobs: int = -1  # parallel CV folds; -1 = all cores
+    random_state: int = 42
+    latency_samples: int = 200
+    min_predict_rows: int = 5000
+
+
+@dataclass(frozen=True)
+class PromotionPolicy:
+    """
+    A candidate is eligible when it satisfies every limit that is set. The
+    best eligible candidate (by macro-F1) is promoted when it differs from the
+    production variant and beats that variant's score by min_improvement.
+    """
+    min_improvement: float = 0.005
+    max_latency_ms: Optional[float] = 5.0
+    max_artifact_bytes: Optional[int] = 50 * 1024 * 1024
+    max_load_ms: Optional[float] = None
+
+
+def _cv_splitter(labels: list[str], cfg: BenchmarkConfig):
+    min_count = min(Counter(labels).values())
+    if min_count >= cfg.cv_folds:
+        return StratifiedKFold(n_splits=cfg.cv_folds, shuffle=True, random_state=cfg.random_state)
+    # Too few rows per class to stratify; a tiny dataset also caps the folds
+    n_splits = min(cfg.cv_folds, len(labels))
+    if n_splits < 2:
+        raise ValueError(f"Cross-validation needs at least 2 training rows, got {len(labels)}")
+    return KFold(n_splits=n_splits, shuffle=True, random_state=cfg.random_state)
+
+
+def _score_fold(train_cfg: TrainConfig, texts, labels, weights, train_idx, test_idx) -> tuple[float, float]:
+    t0 = time.perf_counter()
+    model = fit_model(train_cfg, list(texts[train_idx]), list(labels[train_idx]), sample_weight=list(weights[train_idx]))
+    fit_seconds = time.perf_counter() - t0
+    predicted = model.predict(list(texts[test_idx]))
+    score = f1_score(labels[test_idx], predicted, average="macro", sample_weight=weights[test_idx], zero_division=0)
+    return float(score), fit_seconds
+
+
+def cross_validate_variant(
+    variant: str,
+    texts: list[str],
+    labels: list[str],
+    weights: list[float],
+    cfg: BenchmarkConfig,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Weighted macro-F1 and fit seconds per fold.
+    """
+    train_cfg = TrainConfig(variant=variant, random_state=cfg.random_state)
+    x, y, w = np.asarray(texts, dtype=object), np.asarray(labels, dtype=object), np.asarray(weights, dtype=float)
+    folds = _cv_splitter(labels, cfg).split(x, y)
+    results = Parallel(n_jobs=cfg.n_jobs)(
+        delayed(_score_fold)(train_cfg, x, y, w, train_idx, test_idx) for train_idx, test_idx in folds
+    )
+    scores, fit_seconds = zip(*results)
+    return np.asarray(scores), np.asarray(fit_seconds)
+
+
+def _latency_ms_per_row(model, texts: list[str], samples: int) -> float:
+    timings = []
+    for text in texts[:samples]:
+        t0 = time.perf_counter()
+        model.predict([text])
+        timings.append(time.perf_counter() - t0)
+    return statistics.median(timings) * 1000.0 if timings else 0.0
+
+
+def benchmark_candidate(
+    variant: str,
+    texts: list[str],
+    labels: list[str],
+    weights: list[float],
+    cfg: BenchmarkConfig,
+    workdir: Path,
+) -> dict:
+    train_cfg = TrainConfig(variant=variant, random_state=cfg.random_state)
+
+    scores, fit_seconds = cross_validate_variant(variant, texts, labels, weights, cfg)
+
+    t0 = time.perf_counter()
+    model = fit_model(train_cfg, texts, labels, sample_weight=weights)
+    train_seconds = time.perf_counter() - t0
+
+    size, load_seconds = measure_artifact(model, workdir, variant)
+
+    return {
+        "variant": variant,
+        "macro_f1": round(float(scores.mean()), 4),
+        "macro_f1_std": round(float(scores.std()), 4),
+        "cv_fit_seconds": round(float(fit_seconds.mean()), 3),
+        "train_seconds": round(train_seconds, 3),
+        "latency_ms_per_row": round(_latency_ms_per_row(model, texts, cfg.latency_samples), 3),
+        "predictions_per_sec": round(measure_throughput(model, texts, cfg.min_predict_rows), 1),
+        "artifact_bytes": size,
+        "load_ms": round(load_seconds * 1000.0, 2),
+    }
+
+
+def run_benchmark(cfg: BenchmarkConfig) -> dict:
+    texts, labels, weights = load_weighted_jsonl(cfg.data_path)
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for variant in cfg.candidates:
+            print(f"Benchmarking {variant} ...")
+            results.append(benchmark_candidate(variant, texts, labels, weights, cfg, Path(tmp)))
+
+    report = {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "data_path": str(cfg.data_path),
+        "dataset_sha256": file_sha256(cfg.data_path),
+        "n_examples": len(texts),
+        "cv_folds": cfg.cv_folds,
+        "candidates": results,
+    }
+
+    cfg.report_out.parent.mkdir(parents=True, exist_ok=True)
+    cfg.report_out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Wrote benchmark report to: {cfg.report_out.resolve()}")
+    return report
+
+
+def print_report(report: dict) -> None:
+    header = f"{'variant':<12} {'macro-F1':>9} {'train (s)':>10} {'ms/row':>8} {'pred/sec':>10} {'size (KB)':>10} {'load (ms)':>10}"
+    print(header)
+    print("-" * len(header))
+    for c in report["candidates"]:
+        print(
+            f"{c['variant']:<12} {c['macro_f1']:>9.4f} {c['train_seconds']:>10.3f} {c['latency_ms_per_row']:>8.3f} "
+            f"{c['predictions_per_sec']:>10.0f} {c['artifact_bytes'] / 1024:>10.1f} {c['load_ms']:>10.2f}"
+        )
+
+
+def _eligible(candidate: dict, policy: PromotionPolicy) -> bool:
+    if policy.max_latency_ms is not None and candidate["latency_ms_per_row"] > policy.max_latency_ms:
+        return False
+    if policy.max_artifact_bytes is not None and candidate["artifact_bytes"] > policy.max_artifact_bytes:
+        return False
+    if policy.max_load_ms is not None and candidate["load_ms"] > policy.max_load_ms:
+        return False
+    return True
+
+
+def select_promotion(report: dict, policy: PromotionPolicy, current_variant: str) -> Optional[dict]:
+    """
+    Return the candidate to promote, or None to keep the production model.
+    """
+    eligible = [c for c in report["candidates"] if _eligible(c, policy)]
+    if not eligible:
+        return None
+
+    best = max(eligible, key=lambda c: c["macro_f1"])
+    if best["variant"] == current_variant:
+        return None
+
+    current = next((c for c in report["candidates"] if c["variant"] == current_variant), None)
+    if current is not None and best["macro_f1"] < current["macro_f1"] + policy.min_improvement:
+        return None
+    return best
+
+
+def promote(
+    candidate: dict,
+    report: dict,
+    *,
+    data_path: Path,
+    model_path: Optional[Path] = None,
+    on_promoted: Optional[Callable[[Path], None]] = None,
+) -> Path:
+    """
+    Train the candidate variant the same way ensure_category_model() does and
+    replace the production model atomically. on_promoted(model_path) runs after
+    the swap (e.g. to re-categorize stored transactions).
+    """
+    model_path = Path(model_path) if model_path is not None else default_model_path()
+    tmp_path = model_path.with_name(model_path.name + ".tmp")
+
+    cfg = replace(TrainConfig(), data_path=data_path, model_out=tmp_path, variant=candidate["variant"])
+    train_and_save(cfg)
+    tmp_path.replace(model_path)
+
+    write_model_meta(model_path, {
+        "dataset_sha256": report["dataset_sha256"],
+        "variant": candidate["variant"],
+        "trained_at": datetime.now(timezone.utc).isoformat(),
+        "benchmark": candidate,
+    })
+    print(f"Promoted {candidate['variant']} to: {model_path.resolve()}")
+
+    if on_promoted is not None:
+        on_promoted(model_path)
+    return model_path
+
+
+def benchmark_and_maybe_promote(
+    cfg: BenchmarkConfig,
+    policy: PromotionPolicy = PromotionPolicy(),
+    *,
+    model_path: Optional[Path] = None,
+    on_promoted: Optional[Callable[[Path], None]] = None,
+) -> Optional[Path]:
+    model_path = Path(model_path) if model_path is not None else default_model_path()
+    report = run_benchmark(cfg)
+
+    current_variant = read_model_meta(model_path).get("variant", TrainConfig().variant)
+    candidate = select_promotion(report, policy, current_variant)
+    if candidate is None:
+        print(f"Keeping production variant {current_variant!r}.")
+        return None
+
+    return promote(candidate, report, data_path=cfg.data_path, model_path=model_path, on_promoted=on_promoted)
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("data_path", nargs="?", type=Path, default=default_training_jsonl())
+    parser.add_argument("--report", type=Path, default=BenchmarkConfig.report_out)
+    parser.add_argument("--folds", type=int, default=BenchmarkConfig.cv_folds)
+    parser.add_argument("--promote", action="store_true", help="apply the default PromotionPolicy")
+    args = parser.parse_args(argv)
+
+    cfg = BenchmarkConfig(data_path=args.data_path, report_out=args.report, cv_folds=args.folds)
+    if args.promote:
+        benchmark_and_maybe_promote(cfg)
+    else:
+        print_report(run_benchmark(cfg))
+
+
+if __name__ == "__main__":
+    main()
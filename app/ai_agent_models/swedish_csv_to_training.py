@@ -1,46 +1,16 @@
 from __future__ import annotations
 
+import hashlib
 import json
 import re
+from collections import Counter
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Iterable, Optional
 
 import pandas as pd
 
-
-TARGET_LABELS: tuple[str, ...] = (
-    "Dagligvaror",
-    "Restaurang",
-    "Fika & Kafé",
-    "Godis & Snacks",
-    "Alkohol",
-    "Boende: Hyra & avgifter",
-    "Hem & inredning",
-    "Bygg & verktyg",
-    "Lokaltrafik",
-    "Taxi & samåkning",
-    "Bil: bränsle & laddning",
-    "Bil: parkering & vägavgifter",
-    "Resor: transport & boende",
-    "Resor: mat & nöjen på resa",
-    "Apotek & medicin",
-    "Vård & tandvård",
-    "Kroppsvård & hygien",
-    "Optik",
-    "Kläder & skor",
-    "Elektronik",
-    "Övriga prylar",
-    "Nöjen & kultur",
-    "Sport & träning",
-    "Sportutrustning",
-    "Hobby & skapande",
-    "Böcker & media",
-    "Barn",
-    "Husdjur",
-    "Finans & avgifter",
-    "Övrigt/Okänt",
-)
+from .labels import TARGET_LABELS
 
 
 # 1) Legacy-category -> target (coarse; merchant/keywords may override)
@@ -213,60 +183,57 @@ def _contains_any(haystack: str, needles: Iterable[str]) -> bool:
     return any(n in haystack for n in needles)
 
 
-def _keyword_based_target(spec: str) -> Optional[str]:
-    """
-    Keyword-only signal for cases like Pressbyrån / NK / Åhléns etc.
-    """
-    t = spec.lower()
-
+# Ordered (needles, target) rules; the first rule whose needle occurs in the spec wins.
+_KEYWORD_RULES: tuple[tuple[tuple[str, ...], str], ...] = (
     # transport / vehicle
-    if _contains_any(t, ("parkering", "p-bot", "pbot", "vägavgift", "broavgift", "trängsel")):
-        return "Bil: parkering & vägavgifter"
-    if _contains_any(t, ("bensin", "diesel", "tank", "tanka", "ladd", "el-ladd", "el.")):
-        return "Bil: bränsle & laddning"
+    (("parkering", "p-bot", "pbot", "vägavgift", "broavgift", "trängsel"), "Bil: parkering & vägavgifter"),
+    (("bensin", "diesel", "tank", "tanka", "ladd", "el-ladd", "el."), "Bil: bränsle & laddning"),
 
     # food/drink
-    if _contains_any(t, ("fika", "kaffe", "latte", "cappuccino", "semla", "konditori")):
-        return "Fika & Kafé"
-    if _contains_any(t, ("pizza", "lunch", "middag", "sushi", "hamburg", "restaurang", "korv")):
-        return "Restaurang"
-    if _contains_any(t, ("tuggummi", "läkerol", "godis", "choklad", "chips", "glass", "snacks", "halstabletter")):
-        return "Godis & Snacks"
+    (("fika", "kaffe", "latte", "cappuccino", "semla", "konditori"), "Fika & Kafé"),
+    (("pizza", "lunch", "middag", "sushi", "hamburg", "restaurang", "korv"), "Restaurang"),
+    (("tuggummi", "läkerol", "godis", "choklad", "chips", "glass", "snacks", "halstabletter"), "Godis & Snacks"),
 
     # health/body
-    if _contains_any(t, ("tabletter", "medicin", "penicillin", "recept", "salva")):
-        return "Apotek & medicin"
-    if _contains_any(t, ("tandläk", "tandvård", "undersökning", "hygienist")):
-        return "Vård & tandvård"
-    if _contains_any(t, ("schampo", "balsam", "deo", "nagellack", "smink", "parfym", "dusch")):
-        return "Kroppsvård & hygien"
+    (("tabletter", "medicin", "penicillin", "recept", "salva"), "Apotek & medicin"),
+    (("tandläk", "tandvård", "undersökning", "hygienist"), "Vård & tandvård"),
+    (("schampo", "balsam", "deo", "nagellack", "smink", "parfym", "dusch"), "Kroppsvård & hygien"),
 
     # books/media/electronics
-    if _contains_any(t, ("dvd", "bluray", "bok", "kindle", "ljudbok", "spel", "xbox", "switch", "ps3", "ps4", "steam")):
-        return "Böcker & media"
-    if _contains_any(t, ("router", "ssd", "hårddisk", "hdmi", "telefon", "ipad", "iphone", "laptop", "usb")):
-        return "Elektronik"
+    (("dvd", "bluray", "bok", "kindle", "ljudbok", "spel", "xbox", "switch", "ps3", "ps4", "steam"), "Böcker & media"),
+    (("router", "ssd", "hårddisk", "hdmi", "telefon", "ipad", "iphone", "laptop", "usb"), "Elektronik"),
 
     # clothing
-    if _contains_any(t, ("byxor", "tröja", "skor", "jacka", "strump", "underkläder", "klänning")):
-        return "Kläder & skor"
+    (("byxor", "tröja", "skor", "jacka", "strump", "underkläder", "klänning"), "Kläder & skor"),
 
     # home
-    if _contains_any(t, ("gardin", "lakan", "kudde", "duk", "glas", "bestick", "stekpanna", "kruka", "vas")):
-        return "Hem & inredning"
+    (("gardin", "lakan", "kudde", "duk", "glas", "bestick", "stekpanna", "kruka", "vas"), "Hem & inredning"),
 
     # sport
-    if _contains_any(t, ("medlemskap", "gymkort", "träning", "entré", "bad", "sim", "greenfee", "golf", "dyk")):
-        return "Sport & träning"
-    if _contains_any(t, ("handske", "hjälm", "skidor", "stavar", "pjäxor", "cykel", "löparskor", "underställ")):
-        return "Sportutrustning"
+    (("medlemskap", "gymkort", "träning", "entré", "bad", "sim", "greenfee", "golf", "dyk"), "Sport & träning"),
+    (("handske", "hjälm", "skidor", "stavar", "pjäxor", "cykel", "löparskor", "underställ"), "Sportutrustning"),
 
     # pets / kids
-    if _contains_any(t, ("papego", "katt", "hund", "pellets", "fågel", "bur", "kattsand")):
-        return "Husdjur"
-    if _contains_any(t, ("barn", "elsa", "lovisa", "leksak", "dagis", "skola")):
-        return "Barn"
+    (("papego", "katt", "hund", "pellets", "fågel", "bur", "kattsand"), "Husdjur"),
+    (("barn", "elsa", "lovisa", "leksak", "dagis", "skola"), "Barn"),
+)
+
+_GROCERY_PREFIXES: tuple[str, ...] = (
+    "ica",
+    "hemköp", "hemkop",
+    "coop",
+    "konsum",
+)
 
+
+def _keyword_based_target(spec: str) -> Optional[str]:
+    """
+    Keyword-only signal for cases like Pressbyrån / NK / Åhléns etc.
+    """
+    t = spec.lower()
+    for needles, target in _KEYWORD_RULES:
+        if _contains_any(t, needles):
+            return target
     return None
 
 
@@ -280,13 +247,7 @@ def map_to_target(stalle: str, legacy_cat: str, spec: str) -> str:
         return MERCHANT_TO_TARGET[st]
 
     # merchant rules (prefixes for chains / store variants)
-    grocery_prefixes = (
-        "ica",
-        "hemköp", "hemkop",
-        "coop",
-        "konsum",
-    )
-    if any(st.startswith(p) for p in grocery_prefixes):
+    if any(st.startswith(p) for p in _GROCERY_PREFIXES):
         return "Dagligvaror"
 
     # keyword rules (help disambiguate)
@@ -301,6 +262,53 @@ def map_to_target(stalle: str, legacy_cat: str, spec: str) -> str:
     return "Övrigt/Okänt"
 
 
+def _norm_series(s: pd.Series) -> pd.Series:
+    """
+    Column-wise _norm().
+    """
+    return (
+        s.fillna("")
+        .astype(str)
+        .str.replace("\u00a0", " ", regex=False)
+        .str.replace(r"\s+", " ", regex=True)
+        .str.strip()
+    )
+
+
+def _scrub_series(s: pd.Series) -> pd.Series:
+    """
+    Column-wise _scrub_text().
+    """
+    return s.str.replace(_RE_NUMBER_RUN, "<NUM>", regex=True)
+
+
+def map_to_target_series(stalle: pd.Series, legacy_cat: pd.Series, spec: pd.Series) -> pd.Series:
+    """
+    Column-wise map_to_target(): applies the same rule precedence
+    (exact merchant, grocery prefix, keywords, legacy category) to whole columns.
+    """
+    st = stalle.str.lower().str.strip()
+    sp = spec.str.lower().str.strip()
+    lc = legacy_cat.str.strip()
+
+    out = st.map(MERCHANT_TO_TARGET)
+
+    pending = out.isna()
+    out[pending & st.str.startswith(_GROCERY_PREFIXES)] = "Dagligvaror"
+
+    for needles, target in _KEYWORD_RULES:
+        pending = out.isna()
+        if not pending.any():
+            break
+        pattern = "|".join(re.escape(n) for n in needles)
+        out[pending & sp.str.contains(pattern, regex=True)] = target
+
+    pending = out.isna()
+    out[pending] = lc[pending].map(LEGACY_TO_TARGET)
+
+    return out.fillna("Övrigt/Okänt")
+
+
 @dataclass(frozen=True)
 class ConvertConfig:
     csv_path: Path
@@ -308,13 +316,14 @@ class ConvertConfig:
     delimiter: str = ";"
     encoding: str = "utf-8"
     text_template: str = "{ställe} | {specifikation}"
+    chunksize: int = 50_000
+    # Write each distinct (text, label) pair once with a "weight" count
+    collapse_duplicates: bool = True
 
 
-def convert_csv_to_jsonl(cfg: ConvertConfig) -> None:
-    df = pd.read_csv(cfg.csv_path, sep=cfg.delimiter, encoding=cfg.encoding, dtype=str)
-
+def _resolve_columns(columns: Iterable[str]) -> tuple[str, str, str]:
     # Accept either Swedish headers or variants
-    cols = {c.lower().strip(): c for c in df.columns}
+    cols = {c.lower().strip(): c for c in columns}
     col_stalle = cols.get("ställe") or cols.get("stalle")
     col_kategori = cols.get("kategori")
     col_spec = cols.get("specifikation") or cols.get("spec")
@@ -322,45 +331,237 @@ def convert_csv_to_jsonl(cfg: ConvertConfig) -> None:
     if not (col_stalle and col_kategori and col_spec):
         raise ValueError(
             "CSV must contain columns: Ställe;Kategori;Specifikation "
-            f"(found: {list(df.columns)})"
+            f"(found: {list(columns)})"
         )
+    return col_stalle, col_kategori, col_spec
 
-    examples = []
-    allowed = set(TARGET_LABELS)
 
-    for _, row in df.iterrows():
-        stalle = _norm(row.get(col_stalle))
-        legacy_cat = _norm(row.get(col_kategori))
-        spec = _norm(row.get(col_spec))
+def _normalized_columns(chunk: pd.DataFrame) -> tuple[pd.Series, pd.Series, pd.Series]:
+    """
+    Normalized Ställe/Kategori/Specifikation columns, totally empty rows dropped.
+    """
+    col_stalle, col_kategori, col_spec = _resolve_columns(chunk.columns)
+
+    stalle = _norm_series(chunk[col_stalle])
+    legacy_cat = _norm_series(chunk[col_kategori])
+    spec = _norm_series(chunk[col_spec])
+
+    # Skip totally empty rows
+    keep = (stalle != "") | (legacy_cat != "") | (spec != "")
+    return stalle[keep], legacy_cat[keep], spec[keep]
+
+
+def _examples_from_columns(
+    stalle: pd.Series,
+    legacy_cat: pd.Series,
+    spec: pd.Series,
+    cfg: ConvertConfig,
+) -> pd.DataFrame:
+    label = map_to_target_series(stalle=stalle, legacy_cat=legacy_cat, spec=spec)
+    label = label.where(label.isin(TARGET_LABELS), "Övrigt/Okänt")
+
+    text = pd.Series(
+        [
+            cfg.text_template.format(ställe=a, specifikation=b).strip()
+            for a, b in zip(_scrub_series(stalle), _scrub_series(spec))
+        ],
+        index=stalle.index,
+        dtype=object,
+    )
 
-        # Skip totally empty rows
-        if not (stalle or legacy_cat or spec):
-            continue
+    out = pd.DataFrame({"text": text, "label": label})
+    return out[out["text"] != ""]
 
-        label = map_to_target(stalle=stalle, legacy_cat=legacy_cat, spec=spec)
-        if label not in allowed:
-            label = "Övrigt/Okänt"
 
-        text = cfg.text_template.format(
-            ställe=_scrub_text(stalle),
-            specifikation=_scrub_text(spec),
-        ).strip()
+def convert_chunk(chunk: pd.DataFrame, cfg: ConvertConfig) -> pd.DataFrame:
+    """
+    Convert one CSV chunk into a DataFrame with columns text/label.
+    """
+    stalle, legacy_cat, spec = _normalized_columns(chunk)
+    return _examples_from_columns(stalle, legacy_cat, spec, cfg)
 
-        if not text:
-            continue
 
-        examples.append({"text": text, "label": label})
+def _read_chunks(cfg: ConvertConfig):
+    return pd.read_csv(
+        cfg.csv_path,
+        sep=cfg.delimiter,
+        encoding=cfg.encoding,
+        dtype=str,
+        chunksize=cfg.chunksize,
+    )
 
-    cfg.out_jsonl.parent.mkdir(parents=True, exist_ok=True)
-    with cfg.out_jsonl.open("w", encoding="utf-8") as f:
-        for ex in examples:
-            f.write(json.dumps(ex, ensure_ascii=False) + "\n")
 
-    counts = pd.Series([ex["label"] for ex in examples]).value_counts()
-    print(f"Wrote {len(examples)} rows to: {cfg.out_jsonl.resolve()}")
+def _write_examples(f, examples: pd.DataFrame) -> None:
+    for rec in examples.to_dict("records"):
+        f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+
+
+def _write_weighted(f, weights: Counter[tuple[str, str]]) -> None:
+    for (text, label), weight in weights.items():
+        f.write(json.dumps({"text": text, "label": label, "weight": int(weight)}, ensure_ascii=False) + "\n")
+
+
+def _read_weighted(path: Path) -> Counter[tuple[str, str]]:
+    weights: Counter[tuple[str, str]] = Counter()
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                obj = json.loads(line)
+                weights[(obj["text"], obj["label"])] += obj.get("weight", 1)
+    return weights
+
+
+def _print_summary(n_written: int, n_rows: int, label_counts: Counter[str], out_jsonl: Path) -> None:
+    counts = pd.Series(label_counts, dtype="int64").sort_values(ascending=False)
+    print(f"Wrote {n_written} examples ({n_rows} source rows) to: {out_jsonl.resolve()}")
     print("\nLabel distribution (top 20):")
     print(counts.head(20).to_string())
 
+
+def convert_csv_to_jsonl(cfg: ConvertConfig) -> None:
+    """
+    Stream the source CSV in chunks and write training examples as JSONL.
+
+    With collapse_duplicates, each distinct (text, label) pair is written once
+    with a "weight" holding its row count; only the distinct pairs are kept in
+    memory. Otherwise every row is written as soon as its chunk is converted.
+    """
+    weights: Counter[tuple[str, str]] = Counter()
+    label_counts: Counter[str] = Counter()
+    n_rows = 0
+
+    cfg.out_jsonl.parent.mkdir(parents=True, exist_ok=True)
+    with cfg.out_jsonl.open("w", encoding="utf-8") as f:
+        for chunk in _read_chunks(cfg):
+            examples = convert_chunk(chunk, cfg)
+            n_rows += len(examples)
+            label_counts.update(examples["label"].value_counts().to_dict())
+
+            if cfg.collapse_duplicates:
+                pairs = examples.groupby(["text", "label"], sort=False).size()
+                weights.update(dict(pairs.items()))
+            else:
+                _write_examples(f, examples)
+
+        if cfg.collapse_duplicates:
+            _write_weighted(f, weights)
+
+    _print_summary(len(weights) if cfg.collapse_duplicates else n_rows, n_rows, label_counts, cfg.out_jsonl)
+
+
+# --- Incremental refresh ---
+
+def file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with Path(path).open("rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def state_path_for(out_jsonl: Path) -> Path:
+    """
+    Sidecar file recording which source rows are already in out_jsonl.
+    """
+    return out_jsonl.with_name(out_jsonl.name + ".state.json")
+
+
+def _load_state(path: Path) -> Optional[dict]:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _row_hashes(stalle: pd.Series, legacy_cat: pd.Series, spec: pd.Series) -> pd.Series:
+    """
+    Stable 64-bit content hash per normalized source row, as hex strings.
+    """
+    frame = pd.DataFrame({"stalle": stalle, "kategori": legacy_cat, "spec": spec})
+    return pd.util.hash_pandas_object(frame, index=False).map("{:016x}".format)
+
+
+def update_training_jsonl(cfg: ConvertConfig) -> int:
+    """
+    Incrementally refresh cfg.out_jsonl from cfg.csv_path.
+
+    The state sidecar keeps, per row content hash, how many such rows have
+    already been converted, so a ledger that repeats identical rows still
+    contributes each new occurrence. Only rows beyond those counts are
+    converted. With collapse_duplicates their weights are added to the pairs
+    already in the file, which is rewritten (temp file + rename) so every
+    (text, label) pair keeps a single line; otherwise the rows are appended.
+    If the state is missing or the JSONL no longer matches the hash recorded
+    in it, the file is rebuilt from scratch.
+
+    Returns the number of source rows converted by this call.
+    """
+    state_path = state_path_for(cfg.out_jsonl)
+    state = _load_state(state_path)
+
+    if (
+        state is None
+        or not cfg.out_jsonl.exists()
+        or file_sha256(cfg.out_jsonl) != state.get("dataset_sha256")
+    ):
+        seen: Counter[str] = Counter()
+        mode = "w"
+    else:
+        seen = Counter(state.get("row_counts", {}))
+        mode = "a"
+
+    running: Counter[str] = Counter()
+    weights: Counter[tuple[str, str]] = Counter()
+    label_counts: Counter[str] = Counter()
+    n_new = 0
+
+    out_path = cfg.out_jsonl
+    if cfg.collapse_duplicates:
+        if mode == "a":
+            weights.update(_read_weighted(cfg.out_jsonl))
+        out_path, mode = cfg.out_jsonl.with_name(cfg.out_jsonl.name + ".tmp"), "w"
+
+    cfg.out_jsonl.parent.mkdir(parents=True, exist_ok=True)
+    with out_path.open(mode, encoding="utf-8") as f:
+        for chunk in _read_chunks(cfg):
+            stalle, legacy_cat, spec = _normalized_columns(chunk)
+            hashes = _row_hashes(stalle, legacy_cat, spec)
+
+            # 0-based occurrence of each row content across the whole CSV
+            occurrence = hashes.groupby(hashes, sort=False).cumcount() + hashes.map(running).astype(int)
+            running.update(hashes.value_counts().to_dict())
+
+            is_new = occurrence >= hashes.map(seen).astype(int)
+            if not is_new.any():
+                continue
+
+            examples = _examples_from_columns(stalle[is_new], legacy_cat[is_new], spec[is_new], cfg)
+            n_new += int(is_new.sum())
+            label_counts.update(examples["label"].value_counts().to_dict())
+
+            if cfg.collapse_duplicates:
+                weights.update(dict(examples.groupby(["text", "label"], sort=False).size().items()))
+            else:
+                _write_examples(f, examples)
+
+        if cfg.collapse_duplicates:
+            _write_weighted(f, weights)
+    if out_path != cfg.out_jsonl:
+        out_path.replace(cfg.out_jsonl)
+
+    new_state = {
+        "row_counts": dict(seen | running),
+        "dataset_sha256": file_sha256(cfg.out_jsonl),
+    }
+    tmp = state_path.with_name(state_path.name + ".tmp")
+    tmp.write_text(json.dumps(new_state), encoding="utf-8")
+    tmp.replace(state_path)
+
+    if n_new:
+        _print_summary(len(weights) if cfg.collapse_duplicates else n_new, n_new, label_counts, cfg.out_jsonl)
+    return n_new
+
+
 def _project_root() -> Path:
     """
     Best-effort project root resolver.
@@ -386,14 +587,13 @@ def _test_data_csv(filename: str) -> str:
         )
     return str(candidate)
 
-# ... existing code ...
 if __name__ == "__main__":
     # If you run this as a module, prefer:
     #   python -m app.ai_agent_models.swedish_csv_to_training
     csv_path = _test_data_csv("Ekonomi_copyfor_testingaa.csv")
 
-convert_csv_to_jsonl(
-    ConvertConfig(
-        csv_path=csv_path,
+    convert_csv_to_jsonl(
+        ConvertConfig(
+            csv_path=Path(csv_path),
+        )
     )
-)
\ No newline at end of file
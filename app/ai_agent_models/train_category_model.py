@@ -2,13 +2,15 @@
 import json
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 from collections import Counter
 import math
+from numbers import Integral
 
 import joblib
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.linear_model import LogisticRegression
+import numpy as np
+from sklearn.feature_extraction.text import CountVectorizer, HashingVectorizer, TfidfTransformer, TfidfVectorizer
+from sklearn.linear_model import LogisticRegression, SGDClassifier
 from sklearn.metrics import classification_report
 from sklearn.model_selection import train_test_split
 from sklearn.pipeline import Pipeline
@@ -20,10 +22,20 @@ class TrainConfig:
     model_out: Path = Path(__file__).with_name("category_model.joblib")
     test_size: float = 0.2
     random_state: int = 42
+    # Key of PIPELINE_VARIANTS: "tfidf" (default), "hashed", "hashed_sgd", "char_ngrams"
+    variant: str = "tfidf"
+    prune_threshold: float = 1e-4
 
 
-def load_jsonl(path: Path) -> Tuple[List[str], List[str]]:
-    texts, labels = [], []
+def load_weighted_jsonl(path: Path) -> Tuple[List[str], List[str], List[float]]:
+    """
+    Read training rows as distinct text/label pairs, in first-seen order.
+
+    The optional "weight" key (written when the converter collapses duplicate
+    pairs) defaults to 1, and lines repeating a pair add their weights, so
+    split_dataset() never puts the same pair on both sides of a split.
+    """
+    weights: dict[tuple[str, str], float] = {}
     with path.open("r", encoding="utf-8") as f:
         for line_no, line in enumerate(f, start=1):
             line = line.strip()
@@ -32,10 +44,15 @@ def load_jsonl(path: Path) -> Tuple[List[str], List[str]]:
             obj = json.loads(line)
             if "text" not in obj or "label" not in obj:
                 raise ValueError(f"Line {line_no}: expected keys 'text' and 'label'")
-            texts.append(str(obj["text"]))
-            labels.append(str(obj["label"]))
-    if not texts:
+            key = (str(obj["text"]), str(obj["label"]))
+            weights[key] = weights.get(key, 0.0) + float(obj.get("weight", 1))
+    if not weights:
         raise ValueError(f"No training rows found in {path}")
+    return [t for t, _ in weights], [l for _, l in weights], list(weights.values())
+
+
+def load_jsonl(path: Path) -> Tuple[List[str], List[str]]:
+    texts, labels, _ = load_weighted_jsonl(path)
     return texts, labels
 
 
@@ -57,6 +74,134 @@ def build_pipeline() -> Pipeline:
     )
 
 
+def build_hashed_pipeline(n_features: int = 2 ** 18) -> Pipeline:
+    """
+    Compact alternative to build_pipeline().
+
+    HashingVectorizer is stateless, so the pickled model carries no vocabulary
+    dict and inference skips the vocabulary lookup. Run compact_pipeline() after
+    fitting to prune and downcast the classifier weights.
+    """
+    return Pipeline(
+        steps=[
+            ("hash", HashingVectorizer(
+                n_features=n_features,
+                ngram_range=(1, 2),
+                lowercase=True,
+                alternate_sign=False,
+                norm="l2",
+                dtype=np.float32,
+            )),
+            ("clf", LogisticRegression(
+                max_iter=2000,
+                class_weight="balanced",
+                n_jobs=None,
+            )),
+        ]
+    )
+
+
+def build_hashed_sgd_pipeline(n_features: int = 2 ** 18) -> Pipeline:
+    """
+    Hashed features with a log-loss SGD classifier: much faster to fit than
+    LogisticRegression on wide hashed inputs, still exposes predict_proba.
+    """
+    return Pipeline(
+        steps=[
+            ("hash", HashingVectorizer(
+                n_features=n_features,
+                ngram_range=(1, 2),
+                lowercase=True,
+                alternate_sign=False,
+                norm="l2",
+                dtype=np.float32,
+            )),
+            ("clf", SGDClassifier(
+                loss="log_loss",
+                alpha=1e-5,
+                max_iter=50,
+                tol=1e-4,
+                class_weight="balanced",
+                random_state=42,
+            )),
+        ]
+    )
+
+
+def build_char_ngram_pipeline() -> Pipeline:
+    """
+    Character n-grams within word boundaries; tolerant of merchant name
+    variants and typos ("hemköp"/"hemkop", store numbers glued to names).
+    """
+    return Pipeline(
+        steps=[
+            ("tfidf", TfidfVectorizer(
+                analyzer="char_wb",
+                ngram_range=(2, 4),
+                min_df=2,
+                max_features=50000,
+                lowercase=True,
+                sublinear_tf=True,
+            )),
+            ("clf", LogisticRegression(
+                max_iter=2000,
+                class_weight="balanced",
+                n_jobs=None,
+            )),
+        ]
+    )
+
+
+def compact_pipeline(model: Pipeline, prune_threshold: float = 1e-4) -> Pipeline:
+    """
+    Shrink a fitted pipeline in place: float32 weights, near-zero coefficients
+    dropped and the coefficient matrix stored as scipy.sparse.
+
+    Most hashed feature columns never occur in training and keep a zero weight,
+    so the sparse matrix is a small fraction of the dense one.
+    """
+    clf = model.named_steps["clf"]
+    coef = np.asarray(clf.coef_.toarray() if hasattr(clf.coef_, "toarray") else clf.coef_, dtype=np.float32)
+    coef[np.abs(coef) < prune_threshold] = 0.0
+    clf.coef_ = coef
+    clf.intercept_ = np.asarray(clf.intercept_, dtype=np.float32)
+    clf.sparsify()
+    return model
+
+
+PIPELINE_VARIANTS = {
+    "tfidf": build_pipeline,
+    "hashed": build_hashed_pipeline,
+    "hashed_sgd": build_hashed_sgd_pipeline,
+    "char_ngrams": build_char_ngram_pipeline,
+}
+
+# Variants whose fitted weights are shrunk with compact_pipeline()
+COMPACT_VARIANTS = frozenset({"hashed", "hashed_sgd"})
+
+
+def build_model(variant: str = "tfidf") -> Pipeline:
+    try:
+        factory = PIPELINE_VARIANTS[variant]
+    except KeyError:
+        raise ValueError(f"Unknown pipeline variant {variant!r}. Expected one of {sorted(PIPELINE_VARIANTS)}")
+    return factory()
+
+
+def predict_with_confidence(model, texts: list[str]) -> tuple[list[str], list[Optional[float]]]:
+    """
+    Labels plus max class probability from one vectorization pass.
+    """
+    if not texts:
+        return [], []
+    if hasattr(model, "predict_proba"):
+        proba = model.predict_proba(texts)
+        idx = proba.argmax(axis=1)
+        labels = [str(c) for c in model.classes_[idx]]
+        return labels, [float(p) for p in proba[range(len(texts)), idx]]
+    return [str(c) for c in model.predict(texts)], [None] * len(texts)
+
+
 def _can_stratify(labels: List[str], test_size: float) -> bool:
     """
     Stratified splitting requires:
@@ -84,9 +229,18 @@ def _can_stratify(labels: List[str], test_size: float) -> bool:
     return True
 
 
-def train_and_save(cfg: TrainConfig) -> None:
-    texts, labels = load_jsonl(cfg.data_path)
+def split_dataset(texts: List[str], labels: List[str], weights: List[float], cfg: TrainConfig):
+    """
+    Train/test split shared by train_and_save() and the comparison reports,
+    so every variant is scored on the same held-out rows.
 
+    Rows are distinct text/label pairs (load_weighted_jsonl() merges repeated
+    lines), so all occurrences of a pair land on
+    the same side of the split; pass w_test to the metrics to weigh them by
+    occurrence.
+
+    Returns x_train, x_test, y_train, y_test, w_train, w_test.
+    """
     use_stratify = _can_stratify(labels, cfg.test_size)
     stratify_arg = labels if use_stratify else None
 
@@ -99,19 +253,96 @@ def train_and_save(cfg: TrainConfig) -> None:
             "Tip: add more examples per category (recommended) to enable stratification."
         )
 
-    x_train, x_test, y_train, y_test = train_test_split(
+    return train_test_split(
         texts,
         labels,
+        weights,
         test_size=cfg.test_size,
         random_state=cfg.random_state,
         stratify=stratify_arg,
     )
 
-    model = build_pipeline()
-    model.fit(x_train, y_train)
+
+def _fit_weighted_tfidf(model: Pipeline, texts: List[str], labels: List[str], weights: List[float]) -> None:
+    """
+    Fit a TfidfVectorizer pipeline on collapsed rows as if every duplicate
+    were still there, without tokenizing the duplicates again.
+
+    Each distinct row is counted once; document and term frequencies are
+    then the weighted column sums (X.T @ w), so min_df, max_df, max_features
+    and the idf count occurrences rather than distinct rows. Weights need not
+    be whole: a row of weight 0.5 adds half a document. The classifier gets
+    the weights as sample_weight.
+    """
+    vectorizer = model.steps[0][1]
+    params = vectorizer.get_params()
+    counter = CountVectorizer(**{
+        **{k: v for k, v in params.items() if k in CountVectorizer().get_params()},
+        "min_df": 1, "max_df": 1.0, "max_features": None,
+    })
+    counts = counter.fit_transform(texts)  # vocabulary in sorted order, as TfidfVectorizer keeps it
+    w = np.asarray(weights, dtype=np.float64)
+    n_docs = w.sum()
+    doc_freq = (counts > 0).T.astype(np.float64) @ w
+    term_freq = counts.T.astype(np.float64) @ w
+
+    max_df, min_df = vectorizer.max_df, vectorizer.min_df
+    max_doc_count = max_df if isinstance(max_df, Integral) else max_df * n_docs
+    min_doc_count = min_df if isinstance(min_df, Integral) else min_df * n_docs
+    if max_doc_count < min_doc_count:
+        raise ValueError("max_df corresponds to < documents than min_df")
+    # Same pruning as CountVectorizer._limit_features, on the weighted counts
+    mask = (doc_freq <= max_doc_count) & (doc_freq >= min_doc_count)
+    limit = vectorizer.max_features
+    if limit is not None and mask.sum() > limit:
+        keep = np.zeros_like(mask)
+        keep[np.flatnonzero(mask)[(-term_freq[mask]).argsort()[:limit]]] = True
+        mask = keep
+    if not mask.any():
+        raise ValueError("After pruning, no terms remain. Try a lower min_df or a higher max_df.")
+
+    new_index = np.cumsum(mask) - 1
+    vectorizer.vocabulary_ = {
+        term: int(new_index[i]) for term, i in counter.vocabulary_.items() if mask[i]
+    }
+    vectorizer.fixed_vocabulary_ = False
+    if vectorizer.use_idf:
+        smooth = int(vectorizer.smooth_idf)
+        idf = np.log((n_docs + smooth) / (doc_freq[mask] + smooth)) + 1
+        vectorizer.idf_ = idf.astype(vectorizer.dtype)
+    else:
+        vectorizer._tfidf = TfidfTransformer(norm=vectorizer.norm, use_idf=False,
+                                             sublinear_tf=vectorizer.sublinear_tf).fit(counts[:, mask])
+    model.named_steps["clf"].fit(vectorizer.transform(texts), labels, sample_weight=weights)
+
+
+def fit_model(
+    cfg: TrainConfig,
+    x_train: List[str],
+    y_train: List[str],
+    sample_weight: Optional[List[float]] = None,
+) -> Pipeline:
+    model = build_model(cfg.variant)
+    vectorizer = model.steps[0][1]
+    if sample_weight is not None and isinstance(vectorizer, TfidfVectorizer):
+        _fit_weighted_tfidf(model, x_train, y_train, sample_weight)
+    else:
+        fit_params = {} if sample_weight is None else {"clf__sample_weight": sample_weight}
+        model.fit(x_train, y_train, **fit_params)
+    if cfg.variant in COMPACT_VARIANTS:
+        compact_pipeline(model, prune_threshold=cfg.prune_threshold)
+    return model
+
+
+def train_and_save(cfg: TrainConfig) -> None:
+    texts, labels, weights = load_weighted_jsonl(cfg.data_path)
+
+    x_train, x_test, y_train, y_test, w_train, w_test = split_dataset(texts, labels, weights, cfg)
+
+    model = fit_model(cfg, x_train, y_train, sample_weight=w_train)
 
     y_pred = model.predict(x_test)
-    print(classification_report(y_test, y_pred, zero_division=0))
+    print(classification_report(y_test, y_pred, sample_weight=w_test, zero_division=0))
 
     joblib.dump(model, cfg.model_out)
     print(f"Saved model to: {cfg.model_out.resolve()}")
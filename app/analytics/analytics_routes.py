@@ -1,164 +1,350 @@
+import hashlib
 from datetime import datetime, timezone
+from pathlib import Path
 
-from flask import Blueprint, render_template, request
+from flask import (
+    Blueprint,
+    current_app,
+    flash,
+    jsonify,
+    make_response,
+    redirect,
+    render_template,
+    request,
+    session,
+    url_for,
+)
 from flask_login import current_user, login_required
 
+from ..database import read_only_db
 from ..extensions import db
-from ..models import MonthlyBudget, Transaction
+from .cache import cache_key, cached
+from .queries import decode_cursor, summarize_spending, transaction_page
+from .rollup import grouped_deltas, move_category
+from ..models import (
+    Category,
+    Merchant,
+    MonthlyBudget,
+    Transaction,
+    bump_data_version,
+    category_id,
+    from_minor,
+)
 
 analytics_bp = Blueprint("analytics", __name__, url_prefix="/analytics")
 
 
-@analytics_bp.get("/trend")
-@login_required
-def trend():
-    def _parse_date_arg(name: str):
-        raw = (request.args.get(name) or "").strip()
-        if not raw:
-            return None
-        try:
-            return Transaction.transaction_day.type.python_type.fromisoformat(raw)
-        except Exception:
-            return None
+def _parse_date_arg(name: str):
+    raw = (request.args.get(name) or "").strip()
+    if not raw:
+        return None
+    try:
+        return Transaction.transaction_day.type.python_type.fromisoformat(raw)
+    except Exception:
+        return None
+
+
+def _trend_filters():
+    return (
+        (request.args.get("category") or "").strip(),
+        _parse_date_arg("start"),
+        _parse_date_arg("end"),
+    )
+
+
+def _page_size() -> int:
+    return int(current_app.config.get("TRANSACTIONS_PAGE_SIZE", 100))
 
-    selected_category = (request.args.get("category") or "").strip()
-    start_date = _parse_date_arg("start")
-    end_date = _parse_date_arg("end")
 
-    category_expr = db.func.coalesce(Transaction.category, "Uncategorized")
-    category_norm = db.func.lower(db.func.trim(category_expr))
+def _view_key(view: str, *parts) -> str:
+    # data_version changes on every write that affects this user's analytics
+    return cache_key(view, current_user.id, current_user.data_version, *parts)
 
-    # --- Ensure all template variables are defined on every path ---
-    per_day_rows = []
-    chart_labels = []
-    chart_values = []
-    category_labels = []
-    category_values = []
-    top_category = ""
 
+def _asset_version() -> str:
+    """
+    ASSET_VERSION, or else a digest of the template and static file stamps
+    (path, size, mtime), taken once per process: a deploy that changes a
+    page's HTML or JS changes every ETag.
+    """
+    version = current_app.config.get("ASSET_VERSION")
+    if version:
+        return str(version)
+    version = current_app.extensions.get("asset_version")
+    if version is None:
+        digest = hashlib.sha1()
+        for folder in (current_app.template_folder, current_app.static_folder):
+            root = Path(current_app.root_path, folder or "")
+            for path in sorted(root.rglob("*")):
+                if path.is_file() and "__pycache__" not in path.parts:
+                    stat = path.stat()
+                    digest.update(f"{path.relative_to(root)}:{stat.st_size}:{stat.st_mtime_ns}\n".encode("utf-8"))
+        version = current_app.extensions["asset_version"] = digest.hexdigest()[:12]
+    return version
+
+
+def _conditional_response(key: str, build):
+    """
+    ETag derived from the cache key and _asset_version(): an unchanged view
+    answers If-None-Match with 304 without computing anything.
+    """
+    etag = hashlib.sha1(f"{_asset_version()}:{key}".encode("utf-8")).hexdigest()
+    # Pending flash messages are part of the page, so never short-circuit them
+    if etag in request.if_none_match and not session.get("_flashes"):
+        resp = current_app.response_class(status=304)
+    else:
+        resp = make_response(build())
+    resp.set_etag(etag)
+    resp.headers["Cache-Control"] = "private, no-cache"
+    return resp
+
+
+def _trend_data(user_id: int, selected_category: str, start_date, end_date, now: datetime) -> dict:
     # Current month budget for this user (if defined)
-    now = datetime.now(timezone.utc)
-    mb_amount = db.session.execute(
-        db.select(MonthlyBudget.amount).where(
-            MonthlyBudget.user_id == current_user.id,
+    budget_minor = db.session.execute(
+        db.select(MonthlyBudget.amount_minor).where(
+            MonthlyBudget.user_id == user_id,
             MonthlyBudget.year == now.year,
             MonthlyBudget.month == now.month,
         )
     ).scalar_one_or_none()
-    monthly_budget = float(mb_amount) if mb_amount is not None else None
 
-    # Categories for dropdown (unfiltered so you can always switch)
+    # Dropdown categories, per-day totals, category breakdown and total spend
+    # in one statement over the daily_spend rollup (see analytics.queries).
     # NOTE: Never include financial transactions in this view.
-    categories = db.session.execute(
-        db.select(category_expr.label("category"))
-        .where(
-            Transaction.transaction_day.isnot(None),
-            Transaction.is_financial_transaction.is_(False),
+    summary = summarize_spending(user_id, start_date, end_date, selected_category)
+
+    # First page of the transaction table (category + date-range filters);
+    # the page fetches further pages from /analytics/api/transactions on scroll.
+    tx_rows, tx_next = transaction_page(user_id, start_date, end_date, selected_category, limit=_page_size())
+
+    return {
+        "monthly_budget_minor": budget_minor,
+        "summary": summary,
+        "tx_rows": tx_rows,
+        "tx_next": tx_next,
+    }
+
+
+@analytics_bp.get("/trend")
+@read_only_db
+@login_required
+def trend():
+    selected_category, start_date, end_date = _trend_filters()
+    now = datetime.now(timezone.utc)
+    # The budget shown is the current month's, so the month is part of the key
+    key = _view_key("trend", selected_category, start_date, end_date, f"{now:%Y-%m}", _page_size())
+
+    def _render():
+        data = cached(key, lambda: _trend_data(current_user.id, selected_category, start_date, end_date, now))
+        summary = data["summary"]
+
+        per_day_rows = summary.per_day
+        chart_labels = [day.isoformat() for day, _ in per_day_rows]
+        chart_values = [from_minor(total) for _, total in per_day_rows]
+        category_labels = [category for category, _ in summary.category_totals]
+        category_values = [from_minor(total) for _, total in summary.category_totals]
+        budget_minor = data["monthly_budget_minor"]
+
+        return render_template(
+            "analytics/trend.html",
+            per_day=per_day_rows,
+            tx_rows=[(day, place, category, from_minor(amount_minor))
+                     for day, place, category, amount_minor in data["tx_rows"]],
+            tx_next=data["tx_next"],
+            chart_labels=chart_labels,
+            chart_values=chart_values,
+            category_labels=category_labels,
+            category_values=category_values,
+            categories=summary.categories,
+            selected_category=selected_category,
+            start_date=start_date.isoformat() if start_date else "",
+            end_date=end_date.isoformat() if end_date else "",
+            total_spending=from_minor(summary.total),
+            top_category=summary.top_category,
+            monthly_budget=from_minor(budget_minor) if budget_minor is not None else None,
+            savings=from_minor(budget_minor - summary.total) if budget_minor is not None else None,
         )
-        .group_by(category_expr)
-        .order_by(category_norm.asc())
-    ).scalars().all()
 
-    # ... existing code ...
+    return _conditional_response(key, _render)
 
-    # Transactions list for table (category + date-range filters)
-    # NOTE: Never include financial transactions in this view.
-    tx_filters = [
-        Transaction.transaction_day.isnot(None),
-        Transaction.is_financial_transaction.is_(False),
-    ]
-    if start_date is not None:
-        tx_filters.append(Transaction.transaction_day >= start_date)
-    if end_date is not None:
-        tx_filters.append(Transaction.transaction_day <= end_date)
-    if selected_category:
-        tx_filters.append(category_expr == selected_category)
-
-    # Per-day totals for trend (expenses only; displayed as positive)
-    per_day_rows = db.session.execute(
-        db.select(
-            Transaction.transaction_day.label("day"),
-            db.func.coalesce(db.func.sum(-Transaction.amount), 0.0).label("total"),
+
+def _summary(selected_category: str, start_date, end_date):
+    return cached(
+        _view_key("summary", selected_category, start_date, end_date),
+        lambda: summarize_spending(current_user.id, start_date, end_date, selected_category),
+    )
+
+
+@analytics_bp.get("/api/trend")
+@read_only_db
+@login_required
+def trend_api():
+    """
+    Per-day spend series for the trend chart as columnar arrays, plus the
+    total (honours ?category=, ?start=, ?end=).
+    """
+    selected_category, start_date, end_date = _trend_filters()
+    key = _view_key("api-trend", selected_category, start_date, end_date)
+
+    def _series():
+        summary = _summary(selected_category, start_date, end_date)
+        return jsonify(
+            days=[day.isoformat() for day, _ in summary.per_day],
+            totals=[from_minor(total) for _, total in summary.per_day],
+            total=from_minor(summary.total),
         )
-        .where(
-            *tx_filters,
-            Transaction.is_expense.is_(True),
+
+    return _conditional_response(key, _series)
+
+
+@analytics_bp.get("/api/categories")
+@read_only_db
+@login_required
+def categories_api():
+    """
+    Category breakdown as columnar arrays, largest first (honours ?start=
+    and ?end=; like the page, it ignores ?category=).
+    """
+    _, start_date, end_date = _trend_filters()
+    key = _view_key("api-categories", start_date, end_date)
+
+    def _series():
+        summary = _summary("", start_date, end_date)
+        return jsonify(
+            categories=[category for category, _ in summary.category_totals],
+            totals=[from_minor(total) for _, total in summary.category_totals],
+        )
+
+    return _conditional_response(key, _series)
+
+
+@analytics_bp.get("/api/transactions")
+@read_only_db
+@login_required
+def transactions_api():
+    """
+    Keyset-paginated transactions for the trend table: ?after=<cursor> from
+    the previous response's "next" (null on the last page).
+    """
+    selected_category, start_date, end_date = _trend_filters()
+
+    after = None
+    raw_after = (request.args.get("after") or "").strip()
+    if raw_after:
+        try:
+            after = decode_cursor(raw_after)
+        except ValueError:
+            return jsonify(error="invalid cursor"), 400
+
+    key = _view_key("transactions", selected_category, start_date, end_date, raw_after, _page_size())
+
+    def _page():
+        rows, next_cursor = cached(key, lambda: transaction_page(
+            current_user.id, start_date, end_date, selected_category, after=after, limit=_page_size()
+        ))
+        return jsonify(
+            rows=[
+                {"day": day.isoformat(), "place": place, "category": category, "amount": from_minor(amount_minor)}
+                for day, place, category, amount_minor in rows
+            ],
+            next=next_cursor,
         )
-        .group_by(Transaction.transaction_day)
-        .order_by(Transaction.transaction_day.asc())
-    ).all()
 
-    chart_labels = [row.day.isoformat() if row.day else "" for row in per_day_rows]
-    chart_values = [float(row.total or 0.0) for row in per_day_rows]
+    return _conditional_response(key, _page)
 
-    # Category breakdown (base + date filters; intentionally ignore selected_category)
-    breakdown_filters = [
-        Transaction.transaction_day.isnot(None),
-        Transaction.is_financial_transaction.is_(False),
-    ]
-    if start_date is not None:
-        breakdown_filters.append(Transaction.transaction_day >= start_date)
-    if end_date is not None:
-        breakdown_filters.append(Transaction.transaction_day <= end_date)
 
-    cat_rows = db.session.execute(
+@analytics_bp.get("/review")
+@read_only_db
+@login_required
+def review():
+    """
+    Low-confidence category suggestions, grouped by merchant text so one
+    decision applies to every matching row.
+    """
+    from ..ai_agent_models.labels import TARGET_LABELS
+
+    threshold = float(current_app.config.get("REVIEW_CONFIDENCE_THRESHOLD", 0.6))
+
+    # Grouped on integer ids (served by ix_transactions_user_confidence: one
+    # range scan), names joined afterwards
+    grouped = (
         db.select(
-            category_expr.label("category"),
-            db.func.coalesce(db.func.sum(-Transaction.amount), 0.0).label("total"),
+            Transaction.merchant_id,
+            Transaction.category_id,
+            db.func.count().label("n"),
+            db.func.min(Transaction.category_confidence).label("confidence"),
         )
         .where(
-            *breakdown_filters,
-            Transaction.is_expense.is_(True),
+            Transaction.user_id == current_user.id,
+            Transaction.category_confidence < threshold,
+            Transaction.category_confirmed.is_(False),
+            Transaction.merchant_id.isnot(None),
         )
-        .group_by(category_expr, category_norm)
-        .order_by(
-            db.func.coalesce(db.func.sum(-Transaction.amount), 0.0).desc(),
-            category_norm.asc(),
+        .group_by(Transaction.merchant_id, Transaction.category_id)
+        .subquery()
+    )
+    groups = db.session.execute(
+        db.select(
+            grouped.c.merchant_id,
+            Merchant.name.label("place"),
+            Category.name.label("category"),
+            grouped.c.n,
+            grouped.c.confidence,
         )
+        .join(Merchant, Merchant.id == grouped.c.merchant_id)
+        .join(Category, Category.id == grouped.c.category_id)
+        .order_by(grouped.c.n.desc(), Merchant.name.asc())
+        .limit(200)
     ).all()
 
-    category_labels = [row.category for row in cat_rows]
-    category_values = [float(row.total or 0.0) for row in cat_rows]
+    return render_template(
+        "analytics/review.html",
+        groups=groups,
+        threshold=threshold,
+        category_options=TARGET_LABELS,
+    )
 
-    # Top category name (first row after ordering by total desc)
-    top_category = (cat_rows[0].category if cat_rows else "") or ""
 
-    # Total spending should follow the same filters as the table,
-    # but only count expenses and display as positive.
-    total_spending = db.session.execute(
-        db.select(db.func.coalesce(db.func.sum(-Transaction.amount), 0.0))
-        .where(
-            *tx_filters,
-            Transaction.is_expense.is_(True),
-        )
-    ).scalar_one()
+@analytics_bp.post("/review")
+@login_required
+def review_post():
+    from ..ai_agent_models.labels import TARGET_LABELS
 
-    tx_rows = db.session.execute(
-        db.select(
-            Transaction.transaction_day,
-            Transaction.place_purchase,
-            Transaction.category,
-            Transaction.amount,
-        )
-        .where(*tx_filters)
-        .order_by(Transaction.transaction_day.asc(), Transaction.id.asc())
-    ).all()
+    merchant = db.session.get(Merchant, request.form.get("merchant_id", type=int) or 0)
+    category = (request.form.get("category") or "").strip()
 
-    # ... existing code ...
+    if merchant is None or not category:
+        flash("Please choose a merchant and a category.", "error")
+        return redirect(url_for("analytics.review"))
+    if category not in TARGET_LABELS:
+        flash(f"Unknown category: {category}.", "error")
+        return redirect(url_for("analytics.review"))
 
-    return render_template(
-        "analytics/trend.html",
-        per_day=per_day_rows,
-        tx_rows=tx_rows,
-        chart_labels=chart_labels,
-        chart_values=chart_values,
-        category_labels=category_labels,
-        category_values=category_values,
-        categories=categories,
-        selected_category=selected_category,
-        start_date=start_date.isoformat() if start_date else "",
-        end_date=end_date.isoformat() if end_date else "",
-        total_spending=float(total_spending or 0.0),
-        top_category=top_category,
-        monthly_budget=monthly_budget,
-    )
\ No newline at end of file
+    filters = (
+        Transaction.user_id == current_user.id,
+        Transaction.merchant_id == merchant.id,
+    )
+    moved = grouped_deltas(*filters)
+    new_category_id = category_id(category)
+
+    # One set-based UPDATE for every row of this user with the same merchant.
+    # The model's probability only stays on rows whose category was accepted as predicted
+    result = db.session.execute(
+        db.update(Transaction)
+        .where(*filters)
+        .values(
+            category_id=new_category_id,
+            category_confirmed=True,
+            category_confidence=db.case(
+                (Transaction.category_id == new_category_id, Transaction.category_confidence), else_=None
+            ),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    move_category(moved, new_category_id)
+    bump_data_version(current_user.id)
+    db.session.commit()
+
+    flash(f"Set {category} on {result.rowcount} transactions from {merchant.name}.", "success")
+    return redirect(url_for("analytics.review"))
@@ -0,0 +1,161 @@
+"""
+Cache for analytics computations.
+
+Keys include the user's data_version (models.User), so writes never delete
+entries: bump_data_version() makes the old ones unreachable and they age out
+by TTL / LRU order.
+
+Backends (ANALYTICS_CACHE_TYPE):
+  - "lru":        in-process, at most ANALYTICS_CACHE_MAX_ENTRIES entries (default)
+  - "filesystem": pickle files in ANALYTICS_CACHE_DIR, shared by every worker on the host
+  - "null":       no caching
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from flask import current_app
+
+from ..metrics import ANALYTICS_CACHE_LOOKUPS
+
+
+class NullCache:
+    def get(self, key: str) -> Optional[Any]:
+        return None
+
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+
+class LRUCache:
+    """
+    Thread-safe in-process LRU with a per-entry TTL.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class FileSystemCache:
+    """
+    One pickle file per key; writes are atomic (temp file + rename), so
+    concurrent workers never read a partial entry.
+    """
+
+    def __init__(self, directory: Path, ttl: float = 300.0, max_entries: int = 2000):
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / (hashlib.sha256(key.encode("utf-8")).hexdigest() + ".pkl")
+
+    def get(self, key: str) -> Optional[Any]:
+        path = self._path(key)
+        try:
+            with path.open("rb") as f:
+                expires, stored_key, value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        if stored_key != key:
+            return None
+        if expires < time.time():
+            path.unlink(missing_ok=True)
+            return None
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        path = self._path(key)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with tmp.open("wb") as f:
+                pickle.dump((time.time() + self.ttl, key, value), f, protocol=pickle.HIGHEST_PROTOCOL)
+            tmp.replace(path)
+        except OSError:
+            tmp.unlink(missing_ok=True)
+            return
+        self._prune()
+
+    def _prune(self) -> None:
+        files = list(self.directory.glob("*.pkl"))
+        if len(files) <= self.max_entries:
+            return
+
+        def _mtime(p: Path) -> float:
+            try:
+                return p.stat().st_mtime
+            except OSError:
+                return 0.0
+
+        files.sort(key=_mtime)
+        for stale in files[: len(files) - self.max_entries]:
+            stale.unlink(missing_ok=True)
+
+
+def init_cache(app) -> None:
+    kind = (app.config.get("ANALYTICS_CACHE_TYPE") or "lru").lower()
+    ttl = float(app.config.get("ANALYTICS_CACHE_TTL", 300))
+    max_entries = int(app.config.get("ANALYTICS_CACHE_MAX_ENTRIES", 512))
+
+    if kind == "lru":
+        cache = LRUCache(max_entries=max_entries, ttl=ttl)
+    elif kind == "filesystem":
+        directory = app.config.get("ANALYTICS_CACHE_DIR") or os.path.join(app.instance_path, "analytics_cache")
+        cache = FileSystemCache(Path(directory), ttl=ttl, max_entries=max_entries)
+    elif kind == "null":
+        cache = NullCache()
+    else:
+        raise ValueError(f"Unknown ANALYTICS_CACHE_TYPE: {kind!r}")
+
+    app.extensions["analytics_cache"] = cache
+
+
+def get_cache():
+    return current_app.extensions["analytics_cache"]
+
+
+def cache_key(*parts: Any) -> str:
+    return "|".join("" if p is None else str(p) for p in parts)
+
+
+def cached(key: str, compute: Callable[[], Any]) -> Any:
+    """
+    Cached value for key, computing and storing it on a miss.
+    """
+    cache = get_cache()
+    value = cache.get(key)
+    ANALYTICS_CACHE_LOOKUPS.inc(result="miss" if value is None else "hit")
+    if value is None:
+        value = compute()
+        cache.set(key, value)
+    return value
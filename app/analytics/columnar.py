@@ -0,0 +1,295 @@
+"""
+Optional columnar analytics store: Parquet files queried with embedded DuckDB.
+
+Enabled with ANALYTICS_BACKEND = "duckdb" (needs the duckdb package). The
+SQL tables stay the source of truth; this is a per-user copy of the columns
+the trend aggregations read, laid out as
+
+    <ANALYTICS_PARQUET_DIR>/user_id=<id>/v<version>/upload_id=<id>.parquet
+    <ANALYTICS_PARQUET_DIR>/user_id=<id>/_version
+    <ANALYTICS_PARQUET_DIR>/user_id=<id>/.lock
+
+A version directory is never modified once published. Writers build the
+next one in a staging directory (unchanged files are hard links, so an
+upload only writes its own file), rename it into place and then repoint
+`_version`; readers list the directory `_version` names. Every write holds
+the user's `.lock` (flock), and the two newest version directories are
+kept, so a reader that listed the previous version can still open it.
+
+`_version` holds the User.transactions_version the files reflect. Uploads
+and upload deletions advance it incrementally; any other transaction write
+(review corrections, re-categorization) leaves it behind, and the next read
+re-exports that user's partition from the database (flask export-parquet
+does it for everyone). Budget saves do not touch transactions_version. A
+read that finds the partition stale while another process is rebuilding it
+is answered from SQL instead of waiting.
+
+init_columnar_store() also sets up ANALYTICS_BACKEND = "memory"
+(analytics.inmemory); both stores offer summarize() and the upload hooks.
+"""
+from __future__ import annotations
+
+import os
+import shutil
+import uuid
+from contextlib import contextmanager
+from datetime import date
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking
+    fcntl = None
+
+from flask import current_app
+
+from ..extensions import db
+from ..models import Category, Transaction, User
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+COLUMNS = ["transaction_day", "category_id", "amount_minor", "is_expense", "is_financial_transaction"]
+
+_COPY_SELECT = """
+    SELECT CAST(transaction_day AS DATE) AS transaction_day,
+           CAST(category_id AS INTEGER) AS category_id,
+           CAST(amount_minor AS BIGINT) AS amount_minor,
+           CAST(is_expense AS BOOLEAN) AS is_expense,
+           CAST(is_financial_transaction AS BOOLEAN) AS is_financial_transaction
+    FROM frame
+    WHERE transaction_day IS NOT NULL
+"""
+
+
+def _sql_string(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+class ParquetStore:
+    keep_versions = 2
+
+    def __init__(self, directory: Path):
+        import duckdb  # optional dependency, only needed for this backend
+
+        self._duckdb = duckdb
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def user_dir(self, user_id: int) -> Path:
+        return self.directory / f"user_id={user_id}"
+
+    def version(self, user_id: int) -> Optional[int]:
+        directory = self.user_dir(user_id)
+        try:
+            version = int((directory / "_version").read_text())
+        except (OSError, ValueError):
+            return None
+        # A pointer without its directory (pre-versioned layout) counts as stale
+        return version if (directory / f"v{version}").is_dir() else None
+
+    def files(self, user_id: int) -> list[Path]:
+        """
+        Parquet files of the current version.
+        """
+        version = self.version(user_id)
+        if version is None:
+            return []
+        return sorted((self.user_dir(user_id) / f"v{version}").glob("*.parquet"))
+
+    @contextmanager
+    def _locked(self, user_id: int, blocking: bool = True) -> Iterator[bool]:
+        directory = self.user_dir(user_id)
+        directory.mkdir(parents=True, exist_ok=True)
+        if fcntl is None:
+            yield True
+            return
+        with open(directory / ".lock", "a") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _write(self, path: Path, frame: pd.DataFrame) -> None:
+        tmp = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+        with self._duckdb.connect() as con:
+            con.register("frame", frame[COLUMNS])
+            con.execute(f"COPY ({_COPY_SELECT}) TO {_sql_string(str(tmp))} (FORMAT PARQUET)")
+        tmp.replace(path)
+
+    def _publish(self, user_id: int, build: Callable[[Path], None], version: int) -> None:
+        """
+        Build version `version` in a staging directory and make it current.
+        Call with the user's lock held.
+        """
+        directory = self.user_dir(user_id)
+        staging = directory / f".staging.{uuid.uuid4().hex}"
+        staging.mkdir()
+        try:
+            build(staging)
+            target = directory / f"v{version}"
+            if target.exists():  # left by a run that died before repointing
+                shutil.rmtree(target)
+            os.replace(staging, target)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        tmp = directory / f"_version.{uuid.uuid4().hex}.tmp"
+        tmp.write_text(str(version))
+        tmp.replace(directory / "_version")
+        self._prune(directory, version)
+
+    def _prune(self, directory: Path, current: int) -> None:
+        versions = []
+        for path in directory.iterdir():
+            if path.name.startswith(".staging."):
+                shutil.rmtree(path, ignore_errors=True)  # nobody else builds while we hold the lock
+            elif path.suffix == ".parquet":
+                path.unlink(missing_ok=True)  # pre-versioned layout
+            elif path.name.startswith("v") and path.name[1:].isdigit() and int(path.name[1:]) != current:
+                versions.append(int(path.name[1:]))
+        for old in sorted(versions)[:-(self.keep_versions - 1) or None]:
+            shutil.rmtree(directory / f"v{old}", ignore_errors=True)
+
+    def _maintain(self, user_id: int, prior_version: int, change: Callable[[Path], None]) -> None:
+        """
+        Apply an incremental change if the files were current before the
+        write and no other write committed since; otherwise leave the
+        partition stale for the next read to rebuild.
+        """
+        with self._locked(user_id):
+            current = db.session.execute(
+                db.select(User.transactions_version).where(User.id == user_id)
+            ).scalar_one()
+            if self.version(user_id) != prior_version or current != prior_version + 1:
+                return
+            previous = self.files(user_id)
+
+            def build(staging: Path) -> None:
+                for path in previous:
+                    _link(path, staging / path.name)
+                change(staging)
+
+            self._publish(user_id, build, current)
+
+    def record_upload(self, user_id: int, upload_id: int, frame: pd.DataFrame, prior_version: int) -> None:
+        self._maintain(
+            user_id, prior_version, lambda d: self._write(d / f"upload_id={upload_id}.parquet", frame)
+        )
+
+    def record_delete(self, user_id: int, upload_id: int, prior_version: int) -> None:
+        self._maintain(
+            user_id, prior_version, lambda d: (d / f"upload_id={upload_id}.parquet").unlink(missing_ok=True)
+        )
+
+    def rebuild_user(self, user_id: int, blocking: bool = True) -> bool:
+        """
+        Re-export one user's partition from the database into a new version
+        directory. Without blocking, returns False at once if another process
+        holds the user's lock.
+        """
+        with self._locked(user_id, blocking) as acquired:
+            if not acquired:
+                return False
+            version = db.session.execute(
+                db.select(User.transactions_version).where(User.id == user_id)
+            ).scalar_one()
+            if self.version(user_id) == version:
+                return True  # rebuilt by whoever held the lock before us
+            rows = db.session.execute(
+                db.select(Transaction.upload_id, *(getattr(Transaction, c) for c in COLUMNS))
+                .where(Transaction.user_id == user_id, Transaction.transaction_day.isnot(None))
+            ).all()
+            import pandas as pd
+
+            frame = pd.DataFrame(rows, columns=["upload_id", *COLUMNS])
+
+            def build(staging: Path) -> None:
+                for upload_id, part in frame.groupby("upload_id", sort=False):
+                    self._write(staging / f"upload_id={upload_id}.parquet", part)
+
+            self._publish(user_id, build, version)
+            return True
+
+    def summarize(self, user_id: int, start_date: Optional[date], end_date: Optional[date], category: str):
+        from .queries import SpendSummary, reduce_day_category_rows
+
+        user = db.session.get(User, user_id)
+        if self.version(user_id) != user.transactions_version and not self.rebuild_user(user_id, blocking=False):
+            return None  # another process is rebuilding; the caller answers from SQL
+        files = self.files(user_id)
+        if not files:
+            return SpendSummary()
+
+        in_range, params = ["is_expense"], []
+        if start_date is not None:
+            in_range.append("transaction_day >= ?")
+            params.append(start_date)
+        if end_date is not None:
+            in_range.append("transaction_day <= ?")
+            params.append(end_date)
+        selected, selected_params = list(in_range), list(params)
+        if category:
+            selected.append("category_id = ?")
+            selected_params.append(
+                db.session.execute(db.select(Category.id).where(Category.name == category)).scalar_one_or_none()
+            )
+
+        sources = ", ".join(_sql_string(str(f)) for f in files)
+        with self._duckdb.connect() as con:
+            grouped = con.execute(
+                f"""
+                SELECT transaction_day, category_id,
+                       SUM(CASE WHEN {' AND '.join(in_range)} THEN -amount_minor END),
+                       SUM(CASE WHEN {' AND '.join(selected)} THEN -amount_minor END)
+                FROM read_parquet([{sources}])
+                WHERE NOT is_financial_transaction
+                GROUP BY transaction_day, category_id
+                """,
+                params + selected_params,
+            ).fetchall()
+
+        names = {
+            cid: (name, normalized)
+            for cid, name, normalized in db.session.execute(
+                db.select(Category.id, Category.name, Category.normalized_name)
+                .where(Category.id.in_({cid for _, cid, _, _ in grouped}))
+            )
+        }
+        return reduce_day_category_rows(
+            (day, *names[cid], range_spend, selected_spend) for day, cid, range_spend, selected_spend in grouped
+        )
+
+
+def _link(source: Path, target: Path) -> None:
+    try:
+        os.link(source, target)
+    except OSError:  # no hard links on this filesystem
+        shutil.copy2(source, target)
+
+
+def init_columnar_store(app) -> None:
+    backend = (app.config.get("ANALYTICS_BACKEND") or "sql").lower()
+    if backend == "sql":
+        store = None
+    elif backend == "duckdb":
+        directory = app.config.get("ANALYTICS_PARQUET_DIR") or os.path.join(app.instance_path, "parquet")
+        store = ParquetStore(Path(directory))
+    elif backend == "memory":
+        from .inmemory import MemoryStore
+        store = MemoryStore(int(app.config.get("ANALYTICS_MEMORY_BUDGET_MB", 256)) * 1024 * 1024)
+    else:
+        raise ValueError(f"Unknown ANALYTICS_BACKEND: {backend!r}")
+
+    app.extensions["columnar_store"] = store
+
+
+def get_store() -> Optional[ParquetStore]:
+    return current_app.extensions.get("columnar_store")
@@ -0,0 +1,176 @@
+"""
+In-process columnar engine for the trend summary (ANALYTICS_BACKEND = "memory").
+
+A user's non-financial transactions are loaded once into NumPy arrays sorted
+by day (day ordinals, category codes, spend in öre, expense flags). Date
+filters become a searchsorted slice and the per-day / per-category sums are
+int64 reductions (exact öre, no float round trip), so re-filtering the same history costs microseconds instead of a
+database round trip.
+
+Arrays are kept per user in an LRU bounded by ANALYTICS_MEMORY_BUDGET_MB and
+tagged with the User.transactions_version they were loaded at: any write to
+the user's transactions makes them stale, and uploads / upload deletions drop
+them right away.
+"""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date
+from typing import Optional
+
+import numpy as np
+
+from ..extensions import db
+from ..models import Category, Transaction, User
+
+
+@dataclass
+class UserColumns:
+    days: np.ndarray        # int32 date ordinals, ascending
+    codes: np.ndarray       # int32 index into names
+    spend: np.ndarray       # int64 öre, -amount (money out is positive)
+    is_expense: np.ndarray  # bool
+    names: list[str]
+    normalized: list[str]
+
+    @property
+    def nbytes(self) -> int:
+        return self.days.nbytes + self.codes.nbytes + self.spend.nbytes + self.is_expense.nbytes
+
+
+def load_user_columns(user_id: int) -> UserColumns:
+    """
+    One ordered read of the user's non-financial rows (served by
+    ix_transactions_user_day_nonfinancial) plus one categories lookup.
+    """
+    rows = db.session.execute(
+        db.select(
+            Transaction.transaction_day,
+            Transaction.category_id,
+            Transaction.amount_minor,
+            Transaction.is_expense,
+        )
+        .where(
+            Transaction.user_id == user_id,
+            Transaction.transaction_day.isnot(None),
+            Transaction.is_financial_transaction.is_(False),
+        )
+        .order_by(Transaction.transaction_day, Transaction.id)
+    ).all()
+
+    n = len(rows)
+    days = np.fromiter((r[0].toordinal() for r in rows), dtype=np.int32, count=n)
+    category_ids = np.fromiter((r[1] for r in rows), dtype=np.int64, count=n)
+    spend = -np.fromiter((r[2] for r in rows), dtype=np.int64, count=n)
+    is_expense = np.fromiter((bool(r[3]) for r in rows), dtype=bool, count=n)
+
+    unique_ids, codes = np.unique(category_ids, return_inverse=True)
+    labels = {
+        cid: (name, normalized)
+        for cid, name, normalized in db.session.execute(
+            db.select(Category.id, Category.name, Category.normalized_name)
+            .where(Category.id.in_(unique_ids.tolist()))
+        )
+    } if n else {}
+    names = [labels[int(cid)][0] for cid in unique_ids]
+    normalized = [labels[int(cid)][1] for cid in unique_ids]
+    return UserColumns(days, codes.astype(np.int32), spend, is_expense, names, normalized)
+
+
+def summarize_columns(cols: UserColumns, start_date: Optional[date], end_date: Optional[date], category: str):
+    """
+    Same result as queries.summarize_spending(), computed with array masks.
+    """
+    from .queries import SpendSummary
+
+    lo = int(np.searchsorted(cols.days, start_date.toordinal(), "left")) if start_date else 0
+    hi = int(np.searchsorted(cols.days, end_date.toordinal(), "right")) if end_date else len(cols.days)
+    expense = cols.is_expense[lo:hi]
+    days, codes, spend = cols.days[lo:hi][expense], cols.codes[lo:hi][expense], cols.spend[lo:hi][expense]
+
+    n_categories = len(cols.names)
+    # bincount(weights=) would sum in float64; öre totals are accumulated as int64
+    by_category = np.zeros(n_categories, dtype=np.int64)
+    np.add.at(by_category, codes, spend)
+    present = np.bincount(codes, minlength=n_categories)
+    totals = {int(i): int(by_category[i]) for i in np.flatnonzero(present)}
+    category_totals = [
+        (cols.names[i], totals[i])
+        for i in sorted(totals, key=lambda i: (-totals[i], cols.normalized[i], cols.names[i]))
+    ]
+
+    if category:
+        code = cols.names.index(category) if category in cols.names else -1
+        selected = codes == code
+        days, spend = days[selected], spend[selected]
+
+    per_day = []
+    if len(days):
+        # days stay sorted through the masks, so each day is one run
+        starts = np.flatnonzero(np.r_[True, days[1:] != days[:-1]])
+        day_sums = np.add.reduceat(spend, starts)
+        per_day = [(date.fromordinal(int(day)), int(total)) for day, total in zip(days[starts], day_sums)]
+
+    order = sorted(range(n_categories), key=lambda i: (cols.normalized[i], cols.names[i]))
+    return SpendSummary(
+        categories=[cols.names[i] for i in order],
+        per_day=per_day,
+        category_totals=category_totals,
+        total=sum(total for _, total in per_day),
+    )
+
+
+class MemoryStore:
+    """
+    Thread-safe LRU of UserColumns bounded by total array bytes. A single
+    history larger than the budget is served but not kept.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[int, tuple[int, UserColumns]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def _drop(self, user_id: int) -> None:
+        entry = self._entries.pop(user_id, None)
+        if entry is not None:
+            self._bytes -= entry[1].nbytes
+
+    def columns(self, user_id: int, version: int) -> UserColumns:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(user_id)
+                return entry[1]
+
+        cols = load_user_columns(user_id)
+        with self._lock:
+            self._drop(user_id)
+            if cols.nbytes <= self.max_bytes:
+                self._entries[user_id] = (version, cols)
+                self._bytes += cols.nbytes
+                while self._bytes > self.max_bytes:
+                    self._drop(next(iter(self._entries)))
+        return cols
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._drop(user_id)
+
+    def summarize(self, user_id: int, start_date: Optional[date], end_date: Optional[date], category: str):
+        version = db.session.get(User, user_id).transactions_version
+        return summarize_columns(self.columns(user_id, version), start_date, end_date, category)
+
+    # Write hooks shared with columnar.ParquetStore
+    def record_upload(self, user_id: int, upload_id: int, frame, prior_version: int) -> None:
+        self.invalidate(user_id)
+
+    def record_delete(self, user_id: int, upload_id: int, prior_version: int) -> None:
+        self.invalidate(user_id)
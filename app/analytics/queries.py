@@ -0,0 +1,238 @@
+"""
+Analytics query layer over the daily_spend rollup.
+
+summarize_spending() answers everything the trend page aggregates (category
+dropdown, per-day totals, category breakdown, total spend) with a single
+statement:
+  - PostgreSQL: GROUPING SETS ((day), (category), ()) with conditional sums
+  - other backends: one scan grouped by (day, category), reduced in Python
+  - ANALYTICS_BACKEND = "duckdb": the same scan over Parquet (analytics.columnar)
+  - ANALYTICS_BACKEND = "memory": NumPy arrays per user (analytics.inmemory)
+Grouping and filtering use the integer category_id; names come from a join
+with the small categories table. Amounts are integer öre throughout; callers
+convert to kronor for display (models.from_minor).
+
+transaction_page() serves the transaction table one keyset page at a time,
+ordered by (transaction_day, id).
+
+Financial transactions are never included.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Iterable, Optional
+
+from ..extensions import db
+from ..models import Category, DailySpend, Merchant, Transaction
+from .columnar import get_store
+
+# GROUPING(day, category) bitmask: 1 = column rolled up in that grouping set
+_BY_DAY, _BY_CATEGORY, _GRAND_TOTAL = 0b01, 0b10, 0b11
+
+
+@dataclass
+class SpendSummary:
+    categories: list[str] = field(default_factory=list)
+    per_day: list[tuple[date, int]] = field(default_factory=list)
+    category_totals: list[tuple[str, int]] = field(default_factory=list)
+    total: int = 0
+
+    @property
+    def top_category(self) -> str:
+        return self.category_totals[0][0] if self.category_totals else ""
+
+
+def _category_id(name: str):
+    """
+    Id of a category name as a scalar subquery, so filters compare integers
+    without an extra round trip.
+    """
+    return db.select(Category.id).where(Category.name == name).scalar_subquery()
+
+
+def _spend_columns(start_date: Optional[date], end_date: Optional[date], category: str):
+    """
+    Conditional sums: expense spend in the date range (breakdown), and the
+    same restricted to the selected category (per-day totals, grand total).
+    NULL when no row qualifies, so empty groups can be told apart from 0.
+    """
+    in_range = [DailySpend.is_expense.is_(True)]
+    if start_date is not None:
+        in_range.append(DailySpend.day >= start_date)
+    if end_date is not None:
+        in_range.append(DailySpend.day <= end_date)
+    selected = list(in_range)
+    if category:
+        selected.append(DailySpend.category_id == _category_id(category))
+
+    range_spend = db.func.sum(db.case((db.and_(*in_range), -DailySpend.amount_minor_sum)))
+    selected_spend = db.func.sum(db.case((db.and_(*selected), -DailySpend.amount_minor_sum)))
+    return range_spend.label("range_spend"), selected_spend.label("selected_spend")
+
+
+def _base_filters(user_id: int):
+    # The dropdown lists every category, so the date range is not a WHERE filter
+    return (
+        DailySpend.user_id == user_id,
+        DailySpend.is_financial_transaction.is_(False),
+    )
+
+
+def _summarize_grouping_sets(user_id, start_date, end_date, category) -> SpendSummary:
+    range_spend, selected_spend = _spend_columns(start_date, end_date, category)
+    rows = db.session.execute(
+        db.select(
+            db.func.grouping(DailySpend.day, Category.id).label("grp"),
+            DailySpend.day,
+            Category.name,
+            Category.normalized_name,
+            range_spend,
+            selected_spend,
+        )
+        .select_from(DailySpend)
+        .join(Category, Category.id == DailySpend.category_id)
+        .where(*_base_filters(user_id))
+        .group_by(
+            db.func.grouping_sets(
+                db.tuple_(DailySpend.day),
+                db.tuple_(Category.id, Category.name, Category.normalized_name),
+                db.tuple_(),
+            )
+        )
+    ).all()
+
+    summary = SpendSummary()
+    categories, per_day, category_totals = [], [], []
+    for row in rows:
+        if row.grp == _BY_DAY:
+            if row.selected_spend is not None:
+                per_day.append((row.day, int(row.selected_spend)))
+        elif row.grp == _BY_CATEGORY:
+            categories.append((row.normalized_name, row.name))
+            if row.range_spend is not None:
+                category_totals.append((-int(row.range_spend), row.normalized_name, row.name))
+        elif row.grp == _GRAND_TOTAL:
+            summary.total = int(row.selected_spend or 0)
+
+    summary.categories = [name for _, name in sorted(categories)]
+    summary.per_day = sorted(per_day)
+    summary.category_totals = [(name, -neg_total) for neg_total, _, name in sorted(category_totals)]
+    return summary
+
+
+def reduce_day_category_rows(rows: Iterable[tuple]) -> SpendSummary:
+    """
+    SpendSummary from (day, category name, normalized name, range_spend,
+    selected_spend) rows grouped by (day, category).
+    """
+    categories: dict[str, str] = {}
+    per_day: dict[date, int] = {}
+    by_category: dict[str, int] = {}
+    for day, name, normalized_name, range_spend, selected_spend in rows:
+        categories[name] = normalized_name
+        if range_spend is not None:
+            by_category[name] = by_category.get(name, 0) + int(range_spend)
+        if selected_spend is not None:
+            per_day[day] = per_day.get(day, 0) + int(selected_spend)
+
+    return SpendSummary(
+        categories=sorted(categories, key=lambda name: (categories[name], name)),
+        per_day=sorted(per_day.items()),
+        category_totals=sorted(by_category.items(), key=lambda ct: (-ct[1], categories[ct[0]], ct[0])),
+        total=sum(per_day.values()),
+    )
+
+
+def _summarize_single_scan(user_id, start_date, end_date, category) -> SpendSummary:
+    range_spend, selected_spend = _spend_columns(start_date, end_date, category)
+    rows = db.session.execute(
+        db.select(DailySpend.day, Category.name, Category.normalized_name, range_spend, selected_spend)
+        .select_from(DailySpend)
+        .join(Category, Category.id == DailySpend.category_id)
+        .where(*_base_filters(user_id))
+        .group_by(DailySpend.day, Category.id, Category.name, Category.normalized_name)
+    )
+    return reduce_day_category_rows(rows)
+
+
+def summarize_spending(
+    user_id: int,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    category: str = "",
+) -> SpendSummary:
+    """
+    Category list, per-day totals, category breakdown and total spend for one
+    user in a single round trip. Per-day totals and the total honour
+    `category`; the breakdown intentionally ignores it.
+    """
+    store = get_store()
+    if store is not None:
+        summary = store.summarize(user_id, start_date, end_date, category)
+        if summary is not None:
+            return summary
+    if db.session.get_bind().dialect.name == "postgresql":
+        return _summarize_grouping_sets(user_id, start_date, end_date, category)
+    return _summarize_single_scan(user_id, start_date, end_date, category)
+
+
+def encode_cursor(day: date, tx_id: int) -> str:
+    return f"{day.isoformat()}_{tx_id}"
+
+
+def decode_cursor(cursor: str) -> tuple[date, int]:
+    """
+    Inverse of encode_cursor(); raises ValueError on malformed input.
+    """
+    day, _, tx_id = cursor.partition("_")
+    return date.fromisoformat(day), int(tx_id)
+
+
+def transaction_page(
+    user_id: int,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    category: str = "",
+    after: Optional[tuple[date, int]] = None,
+    limit: int = 100,
+):
+    """
+    Up to `limit` (transaction_day, merchant, category, amount_minor) rows
+    after the `after` position, plus the cursor of the next page (None on the
+    last page). Cost is independent of how deep the page is.
+    """
+    filters = [
+        Transaction.user_id == user_id,
+        Transaction.transaction_day.isnot(None),
+        Transaction.is_financial_transaction.is_(False),
+    ]
+    if start_date is not None:
+        filters.append(Transaction.transaction_day >= start_date)
+    if end_date is not None:
+        filters.append(Transaction.transaction_day <= end_date)
+    if category:
+        filters.append(Transaction.category_id == _category_id(category))
+    if after is not None:
+        filters.append(db.tuple_(Transaction.transaction_day, Transaction.id) > db.tuple_(*after))
+
+    rows = db.session.execute(
+        db.select(
+            Transaction.transaction_day,
+            Merchant.name,
+            Category.name,
+            Transaction.amount_minor,
+            Transaction.id,
+        )
+        .join(Category, Category.id == Transaction.category_id)
+        .outerjoin(Merchant, Merchant.id == Transaction.merchant_id)
+        .where(*filters)
+        .order_by(Transaction.transaction_day.asc(), Transaction.id.asc())
+        .limit(limit + 1)
+    ).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].transaction_day, rows[-1].id)
+    return [tuple(row[:4]) for row in rows], next_cursor
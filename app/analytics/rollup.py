@@ -0,0 +1,175 @@
+"""
+Incremental maintenance of the daily_spend rollup (models.DailySpend).
+
+Every write path that changes `transactions` turns its change into deltas
+keyed by (user_id, day, category_id, is_expense, is_financial_transaction) and
+applies them here, inside the caller's DB transaction (callers commit):
+  - upload_post adds the new rows
+  - upload deletion subtracts the upload's rows
+  - category changes (review page, re-categorization) move rows between keys
+
+rebuild_rollup() recomputes the table from `transactions` in one
+INSERT ... SELECT (flask rebuild-rollup).
+"""
+from __future__ import annotations
+
+from typing import Iterable, Optional
+
+from sqlalchemy.dialects import postgresql, sqlite
+
+from ..extensions import db
+from ..models import DailySpend, Transaction
+
+# (user_id, day, category_id, is_expense, is_financial_transaction)
+RollupKey = tuple
+Deltas = dict  # RollupKey -> [amount_minor_sum, tx_count]
+
+_KEY_COLUMNS = ("user_id", "day", "category_id", "is_expense", "is_financial_transaction")
+
+
+def aggregate(records: Iterable[tuple]) -> Deltas:
+    """
+    Fold (user_id, day, category_id, is_expense, is_financial_transaction, amount_minor)
+    records into deltas. Records without a day are skipped.
+    """
+    deltas: Deltas = {}
+    for user_id, day, category_id, is_expense, is_financial, amount_minor in records:
+        if day is None or day != day:  # None or NaT
+            continue
+        key = (user_id, day, category_id, bool(is_expense), bool(is_financial))
+        acc = deltas.get(key)
+        if acc is None:
+            deltas[key] = [int(amount_minor), 1]
+        else:
+            acc[0] += int(amount_minor)
+            acc[1] += 1
+    return deltas
+
+
+def _grouped_source(*filters):
+    """
+    SELECT of transactions aggregated to rollup keys.
+    """
+    return (
+        db.select(
+            Transaction.user_id,
+            Transaction.transaction_day,
+            Transaction.category_id,
+            Transaction.is_expense,
+            Transaction.is_financial_transaction,
+            db.func.sum(Transaction.amount_minor),
+            db.func.count(),
+        )
+        .where(Transaction.transaction_day.isnot(None), *filters)
+        .group_by(
+            Transaction.user_id,
+            Transaction.transaction_day,
+            Transaction.category_id,
+            Transaction.is_expense,
+            Transaction.is_financial_transaction,
+        )
+    )
+
+
+def grouped_deltas(*filters) -> Deltas:
+    """
+    Current rollup contribution of the transactions matching filters,
+    aggregated in SQL.
+    """
+    rows = db.session.execute(_grouped_source(*filters)).all()
+    return {
+        (user_id, day, category_id, bool(is_expense), bool(is_financial)): [int(total or 0), int(n)]
+        for user_id, day, category_id, is_expense, is_financial, total, n in rows
+    }
+
+
+def with_category(deltas: Deltas, category_id: int) -> Deltas:
+    """
+    The same deltas re-keyed to another category (merging collisions).
+    """
+    out: Deltas = {}
+    for (user_id, day, _, is_expense, is_financial), (total, n) in deltas.items():
+        key = (user_id, day, category_id, is_expense, is_financial)
+        acc = out.setdefault(key, [0, 0])
+        acc[0] += total
+        acc[1] += n
+    return out
+
+
+def _upsert_statement():
+    dialect = db.session.get_bind().dialect.name
+    if dialect == "sqlite":
+        insert = sqlite.insert
+    elif dialect == "postgresql":
+        insert = postgresql.insert
+    else:
+        return None
+
+    table = DailySpend.__table__
+    stmt = insert(table)
+    return stmt.on_conflict_do_update(
+        index_elements=list(_KEY_COLUMNS),
+        set_={
+            "amount_minor_sum": table.c.amount_minor_sum + stmt.excluded.amount_minor_sum,
+            "tx_count": table.c.tx_count + stmt.excluded.tx_count,
+        },
+    )
+
+
+def apply_deltas(deltas: Deltas, sign: int = 1) -> None:
+    """
+    Add (sign=1) or subtract (sign=-1) deltas; groups that drop to zero rows
+    are deleted.
+    """
+    params = [
+        dict(zip(_KEY_COLUMNS, key), amount_minor_sum=sign * total, tx_count=sign * n)
+        for key, (total, n) in deltas.items()
+        if n
+    ]
+    if not params:
+        return
+
+    stmt = _upsert_statement()
+    if stmt is not None:
+        db.session.execute(stmt, params)
+    else:
+        for p in params:
+            row = db.session.get(DailySpend, tuple(p[c] for c in _KEY_COLUMNS))
+            if row is None:
+                db.session.add(DailySpend(**p))
+            else:
+                row.amount_minor_sum += p["amount_minor_sum"]
+                row.tx_count += p["tx_count"]
+        db.session.flush()
+
+    if sign < 0:
+        user_ids = {key[0] for key in deltas}
+        db.session.execute(
+            db.delete(DailySpend).where(DailySpend.user_id.in_(user_ids), DailySpend.tx_count <= 0)
+        )
+
+
+def move_category(deltas: Deltas, category_id: int) -> None:
+    """
+    Move rolled-up rows to a new category (deltas from grouped_deltas()
+    taken before the category UPDATE).
+    """
+    apply_deltas(deltas, sign=-1)
+    apply_deltas(with_category(deltas, category_id), sign=1)
+
+
+def rebuild_rollup(user_id: Optional[int] = None) -> None:
+    """
+    Recompute daily_spend (for one user or everyone) from `transactions`.
+    """
+    clear = db.delete(DailySpend)
+    if user_id is not None:
+        clear = clear.where(DailySpend.user_id == user_id)
+    db.session.execute(clear)
+
+    filters = [] if user_id is None else [Transaction.user_id == user_id]
+    source = _grouped_source(*filters)
+
+    db.session.execute(
+        db.insert(DailySpend).from_select([*_KEY_COLUMNS, "amount_minor_sum", "tx_count"], source)
+    )
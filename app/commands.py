@@ -0,0 +1,75 @@
+"""
+Flask CLI commands (run with: flask --app main <command>).
+"""
+from __future__ import annotations
+
+from pathlib import Path
+
+import click
+
+
+def register_commands(app) -> None:
+    @app.cli.command("recategorize")
+    @click.option("--chunk-size", default=2000, show_default=True, help="Transactions per keyset page.")
+    @click.option("--pause", default=0.05, show_default=True, help="Seconds to sleep between chunks.")
+    @click.option("--user-id", type=int, default=None, help="Only re-categorize this user's transactions.")
+    @click.option("--restart", is_flag=True, help="Ignore the checkpoint and start from the first row.")
+    def recategorize_command(chunk_size: int, pause: float, user_id: int | None, restart: bool):
+        """Re-run category prediction over stored transactions."""
+        from .ingest.recategorize import RecategorizeConfig, recategorize_transactions
+
+        stats = recategorize_transactions(
+            RecategorizeConfig(chunk_size=chunk_size, pause_seconds=pause, user_id=user_id, resume=not restart)
+        )
+        if stats.resumed_from:
+            click.echo(f"Resumed after transaction id {stats.resumed_from}.")
+        click.echo(
+            f"Scanned {stats.scanned} transactions ({stats.distinct_texts} distinct texts) "
+            f"in {stats.chunks} chunks; updated {stats.updated}."
+        )
+
+    @app.cli.command("rebuild-rollup")
+    @click.option("--user-id", type=int, default=None, help="Only rebuild this user's rows.")
+    def rebuild_rollup_command(user_id: int | None):
+        """Recompute the daily_spend rollup from transactions."""
+        from .analytics.rollup import rebuild_rollup
+        from .extensions import db
+
+        rebuild_rollup(user_id)
+        db.session.commit()
+        click.echo("Rebuilt daily_spend.")
+
+    @app.cli.command("export-parquet")
+    @click.option("--user-id", type=int, default=None, help="Only export this user's partition.")
+    def export_parquet_command(user_id: int | None):
+        """Re-export stale partitions of the Parquet analytics store (ANALYTICS_BACKEND=duckdb)."""
+        from .analytics.columnar import get_store
+        from .extensions import db
+        from .models import User
+
+        store = get_store()
+        if store is None:
+            raise click.UsageError("ANALYTICS_BACKEND is not 'duckdb'.")
+        user_ids = [user_id] if user_id is not None else db.session.execute(db.select(User.id)).scalars().all()
+        for uid in user_ids:
+            store.rebuild_user(uid)
+        click.echo(f"Exported {len(user_ids)} user partition(s) to {store.directory}.")
+
+    @app.cli.command("promote-model")
+    @click.argument("data_path", required=False, type=click.Path(path_type=Path))
+    @click.option("--folds", default=5, show_default=True)
+    @click.option("--no-recategorize", is_flag=True, help="Skip re-categorizing transactions after a promotion.")
+    def promote_model_command(data_path: Path | None, folds: int, no_recategorize: bool):
+        """Benchmark candidate models and promote the best one by policy."""
+        from .ai_agent_models import default_training_jsonl
+        from .ai_agent_models.model_benchmark import BenchmarkConfig, benchmark_and_maybe_promote
+        from .ingest.recategorize import recategorize_transactions
+
+        def _after_promotion(_model_path: Path) -> None:
+            stats = recategorize_transactions()
+            click.echo(f"Re-categorized: updated {stats.updated} of {stats.scanned} transactions.")
+
+        benchmark_and_maybe_promote(
+            BenchmarkConfig(data_path=data_path or default_training_jsonl(), cv_folds=folds),
+            on_promoted=None if no_recategorize else _after_promotion,
+        )
@@ -0,0 +1,115 @@
+"""
+Engine tuning, schema bootstrap and the read-only analytics pool.
+
+SQLITE_PRAGMAS are applied to every new SQLite connection through a
+"connect" event (WAL lets readers proceed while an upload commits; the
+others size the page cache / memory map and make writers wait for locks
+instead of failing).
+
+With ANALYTICS_READ_POOL, a second engine (app.extensions[READ_ENGINE])
+serves the analytics views: same database (or ANALYTICS_READ_DATABASE_URI,
+e.g. a replica), its own connection pool, and read-only connections
+(`query_only` on SQLite, read-only transactions on PostgreSQL). Views opt in with @read_only_db; everything else uses the
+primary engine. It is not a Flask-SQLAlchemy bind: binds get their own
+MetaData, which create_all()/drop_all() would then expect on every app.
+"""
+from __future__ import annotations
+
+from functools import wraps
+
+import sqlalchemy as sa
+from flask import current_app, g, has_app_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+READ_ENGINE = "analytics_read_engine"
+
+# Only meaningful on the connection that writes; the mode is stored in the database file
+_WRITER_ONLY_PRAGMAS = {"journal_mode"}
+
+
+class RoutingSession(Session):
+    """
+    Sends statements to the read pool during @read_only_db requests.
+    Flushes always go to the primary engine.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and has_app_context() and g.get("read_only_db"):
+            engine = current_app.extensions.get(READ_ENGINE)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def read_only_db(view):
+    """
+    Route this view's queries to the analytics read pool (if configured).
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.read_only_db = True
+        return view(*args, **kwargs)
+
+    return wrapper
+
+
+def _pragma_listener(pragmas: dict, read_only: bool):
+    statements = [
+        f"PRAGMA {name} = {value}"
+        for name, value in pragmas.items()
+        if not (read_only and name in _WRITER_ONLY_PRAGMAS)
+    ]
+    if read_only:
+        statements.append("PRAGMA query_only = ON")
+
+    def _on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+
+    return _on_connect
+
+
+def init_schema(db) -> None:
+    """
+    create_all() on a database without any tables. Any existing schema,
+    stamped by Alembic or not, is left to `flask db stamp` / `flask db
+    upgrade` (migrations/README.txt): creating the head tables next to an
+    older schema would make its next migration fail.
+    """
+    if sa.inspect(db.engine).get_table_names():
+        return
+    db.create_all()
+
+
+def _tune(engine, pragmas: dict, read_only: bool) -> None:
+    if engine.dialect.name == "sqlite" and (pragmas or read_only):
+        event.listen(engine, "connect", _pragma_listener(pragmas, read_only))
+
+
+def init_engines(app, db) -> None:
+    """
+    Attach SQLITE_PRAGMAS to the app's engine and create the read pool;
+    call after db.init_app() and before the first connection.
+    """
+    pragmas = app.config.get("SQLITE_PRAGMAS") or {}
+    with app.app_context():
+        primary = db.engine
+    _tune(primary, pragmas, read_only=False)
+
+    if not app.config.get("ANALYTICS_READ_POOL"):
+        return
+    # primary.url has Flask-SQLAlchemy's instance-relative SQLite path already resolved
+    url = sa.engine.make_url(app.config.get("ANALYTICS_READ_DATABASE_URI") or primary.url)
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return  # an in-memory database cannot be shared with a second pool
+    options = {"pool_size": int(app.config.get("ANALYTICS_READ_POOL_SIZE", 5))}
+    if url.get_backend_name() == "postgresql":
+        options["execution_options"] = {"postgresql_readonly": True}
+    read_engine = sa.create_engine(url, **options)
+    _tune(read_engine, pragmas, read_only=True)
+    app.extensions[READ_ENGINE] = read_engine
@@ -0,0 +1,78 @@
+"""
+Bulk insert of an upload's prepared transaction rows.
+
+On PostgreSQL the frame is streamed with COPY ... FROM STDIN (CSV), which
+skips per-row statement parsing and planning; elsewhere it is one Core
+executemany. Both run on the session's connection, inside the upload's
+transaction.
+
+tests/test_postgres.py runs the COPY path against PostgreSQL 16 with both
+psycopg 3 (cursor.copy) and psycopg2 (copy_expert), including NULL dates,
+ids and text and boolean columns; benchmarks/postgres_ingest_benchmark.py has
+the throughput.
+"""
+from __future__ import annotations
+
+import io
+from typing import TYPE_CHECKING
+
+from ..extensions import db
+from ..models import Transaction
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Columns upload_post fills; everything else keeps its column default
+TRANSACTION_COLUMNS = [
+    "currency", "booking_day", "transaction_day", "description", "amount_minor", "is_expense",
+    "is_financial_transaction", "category_confidence", "category_id", "merchant_id", "upload_id", "user_id",
+]
+
+COPY_CHUNK_ROWS = 50_000
+
+
+def _copy(cursor, statement: str, frame: pd.DataFrame) -> None:
+    # psycopg 3: cursor.copy() context manager; psycopg2: copy_expert() with a file
+    if hasattr(cursor, "copy"):
+        with cursor.copy(statement) as copy:
+            for offset in range(0, len(frame), COPY_CHUNK_ROWS):
+                copy.write(frame.iloc[offset:offset + COPY_CHUNK_ROWS].to_csv(index=False, header=False))
+    else:
+        buffer = io.StringIO()
+        frame.to_csv(buffer, index=False, header=False)
+        buffer.seek(0)
+        cursor.copy_expert(statement, buffer)
+
+
+def _prepared(frame: pd.DataFrame) -> pd.DataFrame:
+    # A nullable id column (ids mapped with NaN for missing names) arrives as float64
+    return frame[TRANSACTION_COLUMNS].astype({"merchant_id": "Int64"})
+
+
+def copy_transactions(frame: pd.DataFrame) -> None:
+    """
+    COPY the frame into transactions. Empty fields are NULL (the CSV
+    default), so text columns must hold None rather than "".
+    """
+    columns = ", ".join(TRANSACTION_COLUMNS)
+    statement = f"COPY {Transaction.__tablename__} ({columns}) FROM STDIN WITH (FORMAT csv)"
+    cursor = db.session.connection().connection.cursor()
+    try:
+        _copy(cursor, statement, _prepared(frame))
+    finally:
+        cursor.close()
+
+
+def executemany_transactions(frame: pd.DataFrame) -> None:
+    prepared = _prepared(frame).astype(object)
+    records = prepared.where(prepared.notna(), None).to_dict("records")
+    db.session.execute(db.insert(Transaction), records)
+
+
+def insert_transactions(frame: pd.DataFrame) -> None:
+    if frame.empty:
+        return
+    if db.session.get_bind().dialect.name == "postgresql":
+        copy_transactions(frame)
+    else:
+        executemany_transactions(frame)
@@ -1,13 +1,59 @@
 from flask import Blueprint, flash, redirect, render_template, request, url_for
 from flask_login import current_user, login_required
 
+from ..analytics.columnar import COLUMNS, get_store
+from ..analytics.rollup import aggregate, apply_deltas, grouped_deltas
 from ..extensions import db
-from ..models import Upload, Transaction
-from .services import parse_csv_to_dataframe
+from ..metrics import INGEST_STAGE_SECONDS, UPLOAD_BYTES, UPLOAD_ROWS, Stages
+from ..models import UNCATEGORIZED, Upload, Transaction, bump_data_version, category_ids, merchant_ids
+from .bulk import TRANSACTION_COLUMNS, insert_transactions
 
 ingest_bp = Blueprint("ingest", __name__)
 
 
+def parse_csv_to_dataframe(file_storage):
+    # services pulls in pandas and joblib; load them on the first upload, not at startup
+    from .services import parse_csv_to_dataframe as parse
+
+    return parse(file_storage)
+
+
+def _transaction_frame(df, upload_id: int, user_id: int):
+    """
+    The parsed CSV as TRANSACTION_COLUMNS, built column by column. Blank text
+    becomes None (NULL), and names are interned with one lookup per dimension.
+    """
+    import pandas as pd
+
+    def text(column):
+        return df[column].fillna("").astype(str).str.strip().replace("", None)
+
+    if "category" in df.columns:
+        categories = text("category").fillna(UNCATEGORIZED)
+    else:
+        categories = pd.Series(UNCATEGORIZED, index=df.index)
+    merchants = text("reference")
+
+    return pd.DataFrame({
+        "currency": text("currency"),
+        "booking_day": df["transactionday"],
+        "transaction_day": df["transactionday"],
+        "description": text("description"),
+        "amount_minor": df["amount_minor"].astype("int64"),
+        "is_expense": df["is_expense"].astype(bool),
+        "is_financial_transaction": (
+            df["is_financial_transaction"].astype(bool) if "is_financial_transaction" in df.columns else False
+        ),
+        "category_confidence": (
+            df["category_confidence"].astype("float64") if "category_confidence" in df.columns else None
+        ),
+        "category_id": categories.map(category_ids(categories.unique())),
+        "merchant_id": merchants.map(merchant_ids(merchants.dropna().unique())),
+        "upload_id": upload_id,
+        "user_id": user_id,
+    }, index=df.index, columns=TRANSACTION_COLUMNS).reset_index(drop=True)
+
+
 @ingest_bp.get("/")
 def home():
     return redirect(url_for("ingest.upload"))
@@ -31,11 +77,13 @@ def upload_post():
         flash("Only .csv files are allowed.", "error")
         return redirect(url_for("ingest.upload"))
 
+    stages = Stages(INGEST_STAGE_SECONDS)
     try:
         df = parse_csv_to_dataframe(file)
     except Exception as e:
         flash(f"Upload failed: {e}", "error")
         return redirect(url_for("ingest.upload"))
+    stages.mark("parse")
 
     upload_row = Upload(
         original_filename=file.filename,
@@ -45,37 +93,27 @@ def upload_post():
     db.session.add(upload_row)
     db.session.flush()  # get upload_row.id
 
-    txs = []
-    for _, r in df.iterrows():
-        category = None
-        if "category" in df.columns:
-            category = str(r["category"]).strip()
-            if category == "":
-                category = None
-
-        is_financial = False
-        if "is_financial_transaction" in df.columns:
-            is_financial = bool(r["is_financial_transaction"])
-
-        txs.append(
-            Transaction(
-                currency=str(r["currency"]).strip() if str(r["currency"]).strip() != "" else None,
-                booking_day=r["transactionday"],
-                transaction_day=r["transactionday"],
-                place_purchase=str(r["reference"]).strip() if str(r["reference"]).strip() != "" else None,
-                description=str(r["description"]).strip() if str(r["description"]).strip() != "" else None,
-                amount=float(r["amount"]),
-                is_expense=bool(r["is_expense"]),
-                category=category or "Uncategorized",
-                is_financial_transaction=is_financial,
-                upload_id=upload_row.id,
-            )
-        )
-
-    db.session.add_all(txs)
+    frame = _transaction_frame(df, upload_row.id, current_user.id)
+    stages.mark("prepare")
+    insert_transactions(frame)
+    stages.mark("insert")
+    rollup_columns = ["user_id", "transaction_day", "category_id", "is_expense", "is_financial_transaction",
+                      "amount_minor"]
+    apply_deltas(aggregate(frame[rollup_columns].astype(object).itertuples(index=False, name=None)))
+    stages.mark("rollup")
+    user_id, upload_id, prior_version = current_user.id, upload_row.id, current_user.transactions_version
+    bump_data_version(user_id)
     db.session.commit()
-
-    flash(f"Uploaded {len(txs)} rows from {file.filename}", "success")
+    stages.mark("commit")
+    # Columnar copy of the normalized rows for the optional Parquet store
+    store = get_store()
+    if store is not None:
+        store.record_upload(user_id, upload_id, frame[COLUMNS], prior_version)
+        stages.mark("columnar")
+    UPLOAD_BYTES.observe(request.content_length or 0)
+    UPLOAD_ROWS.observe(len(frame))
+
+    flash(f"Uploaded {len(frame)} rows from {file.filename}", "success")
     return redirect(url_for("ingest.uploads"))
 
 
@@ -89,4 +127,28 @@ def uploads():
         .scalars()
         .all()
     )
-    return render_template("ingest/uploads.html", uploads=uploads_list)
\ No newline at end of file
+    return render_template("ingest/uploads.html", uploads=uploads_list)
+
+@ingest_bp.post("/uploads/<int:upload_id>/delete")
+@login_required
+def delete_upload(upload_id: int):
+    upload_row = db.session.execute(
+        db.select(Upload).where(Upload.id == upload_id, Upload.user_id == current_user.id)
+    ).scalar_one_or_none()
+    if upload_row is None:
+        flash("Upload not found.", "error")
+        return redirect(url_for("ingest.uploads"))
+
+    # Rollup first (it aggregates the rows being deleted), then set-based deletes
+    apply_deltas(grouped_deltas(Transaction.upload_id == upload_id), sign=-1)
+    db.session.execute(db.delete(Transaction).where(Transaction.upload_id == upload_id))
+    db.session.execute(db.delete(Upload).where(Upload.id == upload_id))
+    user_id, prior_version = current_user.id, current_user.transactions_version
+    bump_data_version(user_id)
+    db.session.commit()
+    store = get_store()
+    if store is not None:
+        store.record_delete(user_id, upload_id, prior_version)
+
+    flash(f"Deleted {upload_row.original_filename}.", "success")
+    return redirect(url_for("ingest.uploads"))
@@ -0,0 +1,190 @@
+"""
+Batch re-categorization of stored transactions after the category model changed.
+
+Transactions are walked in primary-key order (keyset pagination, no OFFSET),
+the model only sees the distinct texts of each chunk, and only rows whose
+category actually changes (or whose stored confidence drifted by more than
+confidence_tolerance) are written, with one executemany UPDATE per chunk.
+Categories a user confirmed on the review page are never overwritten.
+Progress is checkpointed after every committed chunk, so an interrupted run
+resumes where it stopped as long as the model is unchanged.
+"""
+from __future__ import annotations
+
+import json
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from flask import current_app
+
+from ..analytics.rollup import aggregate, apply_deltas
+from ..extensions import db
+from ..models import Merchant, Transaction, bump_data_version, category_ids
+
+
+@dataclass
+class RecategorizeConfig:
+    chunk_size: int = 2000
+    # Throttle: sleep between chunks so web requests keep getting the database
+    pause_seconds: float = 0.05
+    confidence_tolerance: float = 0.05
+    user_id: Optional[int] = None
+    resume: bool = True
+    checkpoint_path: Optional[Path] = None
+
+
+@dataclass
+class RecategorizeStats:
+    scanned: int = 0
+    distinct_texts: int = 0
+    updated: int = 0
+    chunks: int = 0
+    resumed_from: int = 0
+    changed_user_ids: set[int] = field(default_factory=set)
+
+
+def _default_checkpoint_path() -> Path:
+    return Path(current_app.instance_path) / "recategorize.checkpoint.json"
+
+
+def _load_checkpoint(path: Path) -> dict:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_checkpoint(path: Path, data: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(data), encoding="utf-8")
+    tmp.replace(path)
+
+
+def _model_fingerprint(model=None) -> str:
+    """
+    The production model file's sha256, or a hash of the pickled estimator
+    when one was passed in, so a checkpoint never carries over to another model.
+    """
+    if model is not None:
+        import joblib
+
+        return "estimator:" + joblib.hash(model)
+
+    from ..ai_agent_models import default_model_path
+    from ..ai_agent_models.swedish_csv_to_training import file_sha256
+
+    path = default_model_path()
+    return file_sha256(path) if path.exists() else ""
+
+
+def _fetch_chunk(after_id: int, cfg: RecategorizeConfig):
+    stmt = (
+        db.select(
+            Transaction.id,
+            Transaction.description,
+            Merchant.name.label("place_purchase"),
+            Transaction.category_id,
+            Transaction.category_confidence,
+            Transaction.transaction_day,
+            Transaction.amount_minor,
+            Transaction.is_expense,
+            Transaction.is_financial_transaction,
+            Transaction.user_id,
+        )
+        .outerjoin(Merchant, Merchant.id == Transaction.merchant_id)
+        .where(
+            Transaction.id > after_id,
+            Transaction.category_confirmed.is_(False),
+        )
+        .order_by(Transaction.id.asc())
+        .limit(cfg.chunk_size)
+    )
+    if cfg.user_id is not None:
+        stmt = stmt.where(Transaction.user_id == cfg.user_id)
+    return db.session.execute(stmt).all()
+
+
+def recategorize_transactions(cfg: Optional[RecategorizeConfig] = None, model=None) -> RecategorizeStats:
+    """
+    Re-run category prediction over stored transactions and persist changes.
+
+    Pass model= to use a specific estimator; by default the production model
+    is (re)loaded from disk.
+    """
+    from ..ai_agent_models.train_category_model import predict_with_confidence
+    from .services import _load_category_model, build_category_text, reset_category_model
+
+    cfg = cfg or RecategorizeConfig()
+    checkpoint_path = cfg.checkpoint_path or _default_checkpoint_path()
+
+    if model is None:
+        fingerprint = _model_fingerprint()
+        reset_category_model()
+        model = _load_category_model()
+    else:
+        fingerprint = _model_fingerprint(model)
+    scope = {"model": fingerprint, "user_id": cfg.user_id}
+
+    stats = RecategorizeStats()
+    checkpoint = _load_checkpoint(checkpoint_path) if cfg.resume else {}
+    after_id = 0
+    if checkpoint.get("scope") == scope:
+        if checkpoint.get("done"):
+            return stats
+        after_id = int(checkpoint.get("last_id", 0))
+        stats.resumed_from = after_id
+
+    while True:
+        rows = _fetch_chunk(after_id, cfg)
+        if not rows:
+            break
+
+        texts = [build_category_text(r.description, r.place_purchase) for r in rows]
+        distinct = list(dict.fromkeys(texts))
+        labels, confidences = predict_with_confidence(model, distinct)
+        label_ids = category_ids(labels)
+        predicted = dict(zip(distinct, zip((label_ids[label] for label in labels), confidences)))
+
+        changes = []
+        moved_from, moved_to = [], []
+        chunk_user_ids = set()
+        for row, text in zip(rows, texts):
+            new_category_id, confidence = predicted[text]
+            if new_category_id != row.category_id:
+                changes.append({"id": row.id, "category_id": new_category_id, "category_confidence": confidence})
+                chunk_user_ids.add(row.user_id)
+                rollup_record = (row.user_id, row.transaction_day, row.category_id, row.is_expense,
+                                 row.is_financial_transaction, row.amount_minor)
+                moved_from.append(rollup_record)
+                moved_to.append(rollup_record[:2] + (new_category_id,) + rollup_record[3:])
+            elif confidence is not None and (
+                row.category_confidence is None
+                or abs(confidence - row.category_confidence) > cfg.confidence_tolerance
+            ):
+                changes.append({"id": row.id, "category_confidence": confidence})
+
+        if changes:
+            db.session.execute(db.update(Transaction), changes)
+            apply_deltas(aggregate(moved_from), sign=-1)
+            apply_deltas(aggregate(moved_to), sign=1)
+            bump_data_version(*chunk_user_ids)
+            stats.changed_user_ids |= chunk_user_ids
+        after_id = rows[-1].id
+        db.session.commit()
+        _save_checkpoint(checkpoint_path, {"scope": scope, "last_id": after_id, "done": False})
+
+        stats.scanned += len(rows)
+        stats.distinct_texts += len(distinct)
+        stats.updated += len(changes)
+        stats.chunks += 1
+
+        if len(rows) < cfg.chunk_size:
+            break
+        if cfg.pause_seconds > 0:
+            time.sleep(cfg.pause_seconds)
+
+    _save_checkpoint(checkpoint_path, {"scope": scope, "last_id": after_id, "done": True})
+    return stats
@@ -1,11 +1,12 @@
-import re
 import tempfile
 import os
 import pandas as pd
+from flask import current_app, has_app_context
 from app.ingest.flexible_csv_reader_utility import read_whole_line_quoted_csv, normalize_columns, clean_data
+from app.metrics import MODEL_PREDICTIONS
+from app.models import MINOR_UNITS
 
 from app.ai_agent_models import ensure_category_model
-import joblib
 
 
 REQUIRED_COLUMNS = ["date", "metric", "value"]
@@ -41,6 +42,8 @@ def _load_category_model():
     if _CATEGORY_MODEL is not None:
         return _CATEGORY_MODEL
 
+    import joblib
+
     model_path = ensure_category_model()
     # ensure_category_model() returns the preferred .joblib path; if your training code
     # ever falls back to .pkl, it should still be loadable by joblib as well.
@@ -48,6 +51,53 @@ def _load_category_model():
     return _CATEGORY_MODEL
 
 
+def reset_category_model() -> None:
+    """
+    Drop the cached model so the next prediction loads the file from disk
+    (e.g. after a benchmark promotion replaced it).
+    """
+    global _CATEGORY_MODEL
+    _CATEGORY_MODEL = None
+
+
+def build_category_text(description: str | None, reference: str | None) -> str:
+    """
+    Scalar twin of _build_category_text() for rows read back from the database.
+    """
+    return (f"{(description or '').strip()} {(reference or '').strip()}").strip()
+
+
+def _inference_socket_path() -> str | None:
+    if has_app_context():
+        return current_app.config.get("CATEGORY_INFERENCE_SOCKET")
+    return os.environ.get("CATEGORY_INFERENCE_SOCKET")
+
+
+def predict_categories(texts: list[str]) -> tuple[list[str], list[float | None]]:
+    """
+    Predict category labels and confidences (max class probability).
+
+    Uses the out-of-process inference worker when CATEGORY_INFERENCE_SOCKET is
+    configured and reachable; otherwise predicts in-process with the cached
+    model. Both paths vectorize the texts once.
+    """
+    from app.ai_agent_models.train_category_model import predict_with_confidence
+
+    socket_path = _inference_socket_path()
+    if socket_path:
+        from app.ai_agent_models.inference_server import InferenceUnavailable, get_client
+        try:
+            result = get_client(socket_path).predict(texts)
+            MODEL_PREDICTIONS.inc(len(texts), path="worker")
+            return result
+        except InferenceUnavailable:
+            pass  # fall back to in-process prediction
+
+    result = predict_with_confidence(_load_category_model(), texts)
+    MODEL_PREDICTIONS.inc(len(texts), path="in_process")
+    return result
+
+
 def _build_category_text(df: pd.DataFrame) -> pd.Series:
     """
     Build the text input expected by the trained model.
@@ -59,29 +109,36 @@ def _build_category_text(df: pd.DataFrame) -> pd.Series:
     return text
 
 
-def _parse_swedish_number(x) -> float | None:
+def parse_amounts_minor(values: pd.Series) -> pd.Series:
     """
-    Accepts typical Swedish/European number formats:
+    Vectorized parse of typical Swedish/European number formats to integer
+    öre (Int64, <NA> where blank):
       - "1 234,56"
       - "1234,56"
       - "1234.56"
       - "-99,00"
-    Returns float or None if blank.
+    Integer and fraction digits are taken apart as text, so no amount passes
+    through float; more than two decimals round half away from zero.
     """
-    if x is None:
-        return None
-    s = str(x).strip()
-    if s == "":
-        return None
-
-    s = s.replace("\u00A0", " ")  # non-breaking space
-    s = s.replace(" ", "")        # remove thousand separators spaces
-    s = s.replace(",", ".")       # decimal comma -> dot
+    s = values.astype("string").str.strip()
+    s = s.str.replace("\u00A0", "", regex=False)  # non-breaking space
+    s = s.str.replace(" ", "", regex=False)        # remove thousand separators spaces
+    s = s.str.replace(",", ".", regex=False)       # decimal comma -> dot
+    s = s.mask(s == "")
 
     # Keep digits, one leading '-', and dot
-    if not re.fullmatch(r"-?\d+(\.\d+)?", s):
-        raise ValueError(f"Invalid number: {x!r}")
-    return float(s)
+    parts = s.str.extract(r"^(-?)(\d+)(?:\.(\d+))?$")
+    invalid = s.notna() & parts[1].isna()
+    if invalid.any():
+        raise ValueError(f"Invalid number: {values[invalid].iloc[0]!r}")
+
+    fraction = parts[2].fillna("").str.ljust(3, "0")
+    magnitude = (
+        pd.to_numeric(parts[1]).astype("Int64") * 100
+        + pd.to_numeric(fraction.str[:2]).astype("Int64")
+        + (fraction.str[2] >= "5").astype("Int64")
+    )
+    return magnitude.where(parts[0] != "-", -magnitude)
 
 
 def derive_transaction_fields(df: pd.DataFrame) -> pd.DataFrame:
@@ -125,15 +182,9 @@ def derive_transaction_fields(df: pd.DataFrame) -> pd.DataFrame:
     # but you'll likely want description/reference in your input CSV.
     texts = _build_category_text(df)
 
-    model = _load_category_model()
-    df["category"] = model.predict(texts.tolist())
-
-    # Optional confidence if supported by the sklearn estimator
-    if hasattr(model, "predict_proba"):
-        proba = model.predict_proba(texts.tolist())
-        df["category_confidence"] = proba.max(axis=1)
-    else:
-        df["category_confidence"] = pd.NA
+    labels, confidences = predict_categories(texts.tolist())
+    df["category"] = labels
+    df["category_confidence"] = pd.Series(confidences, index=df.index, dtype="float64")  # NaN if unknown
 
     return df
 
@@ -177,12 +228,14 @@ def parse_csv_to_dataframe(file_storage) -> pd.DataFrame:
         for col in ["transactionday"]:
             df[col] = pd.to_datetime(df[col], errors="coerce").dt.date
 
-        # Parse numbers
-        df["amount"] = df["amount"].map(_parse_swedish_number)
+        # Parse numbers: exact öre, plus kronor for the derived fields
+        df["amount_minor"] = parse_amounts_minor(df["amount"])
 
         # Required fields checks
-        if df["amount"].isna().any():
+        if df["amount_minor"].isna().any():
             raise ValueError("Column 'amount' contains empty/invalid values.")
+        df["amount_minor"] = df["amount_minor"].astype("int64")
+        df["amount"] = df["amount_minor"] / MINOR_UNITS
 
         df = derive_transaction_fields(df)
         return df
@@ -1,7 +1,10 @@
-from flask import redirect, url_for
+import hmac
+
+from flask import abort, current_app, redirect, request, url_for
 from flask_login import current_user
 
 from . import main_bp
+from .. import metrics
 
 
 @main_bp.get("/")
@@ -13,4 +16,21 @@ def root():
 
 @main_bp.get("/hello/<name>")
 def say_hello(name: str):
-    return {"message": f"Hello {name}"}
\ No newline at end of file
+    return {"message": f"Hello {name}"}
+
+
+@main_bp.get("/metrics")
+def prometheus_metrics():
+    # Off until METRICS_TOKEN is set; the scraper sends it as a bearer token.
+    # Behind a reverse proxy every request comes from the proxy's address, so
+    # the proxy must not forward /metrics at all.
+    config = current_app.config
+    token = config.get("METRICS_TOKEN")
+    if (
+        not config.get("METRICS_ENABLED", True)
+        or not token
+        or request.remote_addr not in config.get("METRICS_ALLOWED_ADDRS", ())
+        or not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}")
+    ):
+        abort(404)
+    return metrics.render(), 200, {"Content-Type": metrics.CONTENT_TYPE}
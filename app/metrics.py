@@ -0,0 +1,375 @@
+"""
+Counters and histograms served at /metrics in the Prometheus text format.
+The endpoint is off until METRICS_TOKEN is configured (see config.py).
+
+Values live in process memory. With several worker processes set METRICS_DIR
+(one directory per deployment, emptied before the workers start): each
+process writes a JSON snapshot `<host>-<pid>-<random>.json` there at most
+every METRICS_FLUSH_INTERVAL seconds (temp file + rename, like the filesystem
+analytics cache), and /metrics sums the snapshots of every process, so any
+worker can answer the scrape. The random part is drawn per process, so a
+worker that inherits a recycled PID never overwrites an earlier worker's
+totals.
+
+Exited workers' counts must stay in the sum to keep counters monotonic.
+When a scrape finds snapshots from this host whose PID is no longer
+running, it adds them into `retired.json` and deletes them. Snapshots from
+other hosts, or with a PID that is running again, are never merged. Merging
+holds an exclusive flock on `.lock` and reading holds a shared one, so no
+scrape sees a file both merged and still present.
+"""
+from __future__ import annotations
+
+import json
+import math
+import os
+import socket
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Optional
+
+from flask import current_app, g, request
+from sqlalchemy import event
+
+try:
+    import fcntl
+except ImportError:  # Windows: snapshots are summed but never merged
+    fcntl = None
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_lock = threading.Lock()
+REGISTRY: dict[str, "Metric"] = {}
+
+
+class Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), registry: Optional[dict] = None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: dict[tuple[str, ...], object] = {}
+        (REGISTRY if registry is None else registry)[name] = self
+
+    def _key(self, labels: dict) -> tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _label_text(self, key: tuple[str, ...], extra: Optional[tuple[str, str]] = None) -> str:
+        pairs = list(zip(self.labelnames, key)) + ([extra] if extra else [])
+        if not pairs:
+            return ""
+        escaped = (v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, v in pairs)
+        return "{" + ",".join(f'{n}="{v}"' for (n, _), v in zip(pairs, escaped)) + "}"
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with _lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    @staticmethod
+    def merge(a, b):
+        return a + b
+
+    def render(self, values: dict) -> list[str]:
+        return [f"{self.name}{self._label_text(key)} {_number(v)}" for key, v in sorted(values.items())]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets: Iterable[float] = (),
+                 registry: Optional[dict] = None):
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with _lock:
+            # [count per bucket..., count above the last bucket, sum]
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            i = 0
+            while i < len(self.buckets) and value > self.buckets[i]:
+                i += 1
+            state[i] += 1
+            state[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    @staticmethod
+    def merge(a, b):
+        return [x + y for x, y in zip(a, b)]
+
+    def render(self, values: dict) -> list[str]:
+        lines = []
+        for key, state in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), state):
+                cumulative += count
+                le = "+Inf" if bound == math.inf else _number(bound)
+                lines.append(f"{self.name}_bucket{self._label_text(key, ('le', le))} {cumulative}")
+            lines.append(f"{self.name}_sum{self._label_text(key)} {_number(state[-1])}")
+            lines.append(f"{self.name}_count{self._label_text(key)} {cumulative}")
+        return lines
+
+
+class Stages:
+    """
+    Times consecutive stages of one operation: each mark() observes the time
+    since the previous mark (or construction) under that stage label.
+    """
+
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+        self._last = time.perf_counter()
+
+    def mark(self, stage: str) -> None:
+        now = time.perf_counter()
+        self.histogram.observe(now - self._last, stage=stage)
+        self._last = now
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+UPLOAD_BYTES = Histogram(
+    "bi_upload_bytes", "Size of uploaded CSV files.",
+    buckets=(16e3, 64e3, 256e3, 1e6, 4e6, 16e6),
+)
+UPLOAD_ROWS = Histogram(
+    "bi_upload_rows", "Transactions per upload.",
+    buckets=(10, 100, 1_000, 10_000, 100_000),
+)
+INGEST_STAGE_SECONDS = Histogram(
+    "bi_ingest_stage_seconds", "Time per upload_post stage.", ["stage"], buckets=LATENCY_BUCKETS,
+)
+MODEL_PREDICTIONS = Counter(
+    "bi_model_predictions_total", "Category predictions made, by where the model ran.", ["path"],
+)
+ANALYTICS_CACHE_LOOKUPS = Counter(
+    "bi_analytics_cache_lookups_total", "Analytics cache lookups by result.", ["result"],
+)
+REQUEST_SECONDS = Histogram(
+    "bi_request_seconds", "Request latency per endpoint.", ["endpoint", "method"], buckets=LATENCY_BUCKETS,
+)
+POOL_CHECKOUT_SECONDS = Histogram(
+    "bi_db_pool_checkout_seconds", "Wait for a pooled database connection.", ["engine"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5),
+)
+
+
+# Multi-process snapshots
+
+RETIRED = "retired.json"
+_last_flush = 0.0
+_snapshot_name: Optional[str] = None
+_snapshot_pid: Optional[int] = None
+
+
+def _snapshot() -> dict:
+    with _lock:
+        return {
+            name: [[list(key), value] for key, value in metric._values.items()]
+            for name, metric in REGISTRY.items()
+        }
+
+
+def _snapshot_path(directory: Path) -> Path:
+    global _snapshot_name, _snapshot_pid
+    pid = os.getpid()
+    if _snapshot_pid != pid:  # first flush, or a worker forked after import
+        _snapshot_pid = pid
+        _snapshot_name = f"{socket.gethostname()}-{pid}-{uuid.uuid4().hex[:12]}.json"
+    return directory / _snapshot_name
+
+
+def _write_json(path: Path, data: dict) -> None:
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_text(json.dumps(data))
+    tmp.replace(path)
+
+
+def flush(directory: Path) -> None:
+    global _last_flush
+    directory.mkdir(parents=True, exist_ok=True)
+    _write_json(_snapshot_path(directory), _snapshot())
+    _last_flush = time.monotonic()
+
+
+def _metrics_dir() -> Optional[Path]:
+    directory = current_app.config.get("METRICS_DIR")
+    return Path(directory) if directory else None
+
+
+def _merge(merged: dict[str, dict], snapshot: dict) -> None:
+    for name, entries in snapshot.items():
+        metric = REGISTRY.get(name)
+        if metric is None:
+            continue
+        values = merged.setdefault(name, {})
+        for key, value in entries:
+            key = tuple(key)
+            values[key] = metric.merge(values[key], value) if key in values else value
+
+
+def _read(path: Path) -> Optional[dict]:
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def _exited(path: Path, host: str) -> bool:
+    """True for a `<host>-<pid>-<random>.json` of this host whose process is gone."""
+    file_host, _, pid_text = path.stem.rpartition("-")[0].rpartition("-")
+    if file_host != host or not pid_text.isdigit() or int(pid_text) == os.getpid():
+        return False
+    try:
+        os.kill(int(pid_text), 0)
+    except ProcessLookupError:
+        return True
+    except OSError:
+        pass  # running, owned by another user
+    return False
+
+
+@contextmanager
+def _dir_lock(directory: Path, mode: int):
+    if fcntl is None:
+        yield True
+        return
+    with open(directory / ".lock", "a") as lock_file:
+        try:
+            fcntl.flock(lock_file, mode)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _retire_exited(directory: Path) -> None:
+    if fcntl is None:
+        return
+    host = socket.gethostname()
+    with _dir_lock(directory, fcntl.LOCK_EX | fcntl.LOCK_NB) as locked:
+        if not locked:
+            return  # another worker is merging
+        exited = [p for p in directory.glob("*.json") if p.name != RETIRED and _exited(p, host)]
+        if not exited:
+            return
+        merged: dict[str, dict] = {}
+        for path in [directory / RETIRED, *exited]:
+            snapshot = _read(path)
+            if snapshot is not None:
+                _merge(merged, snapshot)
+        _write_json(directory / RETIRED, {
+            name: [[list(key), value] for key, value in values.items()] for name, values in merged.items()
+        })
+        for path in exited:
+            path.unlink(missing_ok=True)
+
+
+def _collect() -> dict[str, dict]:
+    directory = _metrics_dir()
+    if directory is None:
+        with _lock:
+            return {name: dict(metric._values) for name, metric in REGISTRY.items()}
+
+    flush(directory)
+    _retire_exited(directory)
+    merged: dict[str, dict] = {name: {} for name in REGISTRY}
+    with _dir_lock(directory, fcntl.LOCK_SH if fcntl else 0):
+        for path in directory.glob("*.json"):
+            snapshot = _read(path)
+            if snapshot is not None:  # None: a worker replacing its file right now
+                _merge(merged, snapshot)
+    return merged
+
+
+def render() -> str:
+    collected = _collect()
+    lines = []
+    for name, metric in REGISTRY.items():
+        lines.append(f"# HELP {name} {metric.documentation}")
+        lines.append(f"# TYPE {name} {metric.kind}")
+        lines.extend(metric.render(collected.get(name, {})))
+    return "\n".join(lines) + "\n"
+
+
+# App wiring
+
+def _start_timer():
+    g.metrics_start = time.perf_counter()
+
+
+def _observe_request(response):
+    start = g.pop("metrics_start", None)
+    if start is not None:
+        REQUEST_SECONDS.observe(
+            time.perf_counter() - start, endpoint=request.endpoint or "unmatched", method=request.method
+        )
+    directory = _metrics_dir()
+    interval = current_app.config.get("METRICS_FLUSH_INTERVAL", 5)
+    if directory is not None and time.monotonic() - _last_flush >= interval:
+        flush(directory)
+    return response
+
+
+def _time_checkouts(engine, label: str) -> None:
+    pool = engine.pool
+    if "connect" in vars(pool):
+        return
+    checkout = pool.connect
+
+    def connect():
+        start = time.perf_counter()
+        try:
+            return checkout()
+        finally:
+            POOL_CHECKOUT_SECONDS.observe(time.perf_counter() - start, engine=label)
+
+    pool.connect = connect
+
+
+def _instrument(engine, label: str) -> None:
+    _time_checkouts(engine, label)
+    # engine.dispose() swaps in a fresh pool
+    event.listen(engine, "engine_disposed", lambda e: _time_checkouts(e, label))
+
+
+def init_metrics(app, db) -> None:
+    """
+    Time requests and pool checkouts; call after init_engines().
+    """
+    if not app.config.get("METRICS_ENABLED", True):
+        return
+    from .database import READ_ENGINE
+
+    with app.app_context():
+        _instrument(db.engine, "primary")
+    read_engine = app.extensions.get(READ_ENGINE)
+    if read_engine is not None:
+        _instrument(read_engine, "read")
+    app.before_request(_start_timer)
+    app.after_request(_observe_request)
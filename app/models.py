@@ -1,6 +1,11 @@
 from datetime import datetime, timezone, date
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Iterable
 
+from flask import current_app
 from flask_login import UserMixin
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from werkzeug.security import check_password_hash, generate_password_hash
 
 from .extensions import db, login_manager
@@ -11,6 +16,11 @@ class User(UserMixin, db.Model):
     email = db.Column(db.String(255), unique=True, nullable=False, index=True)
     password_hash = db.Column(db.String(255), nullable=False)
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+    # Bumped by every write that changes what analytics show (see bump_data_version)
+    data_version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    # NEW FIELDS revision 1_13
+    # Bumped only by writes to the user's transactions; versions the columnar stores
+    transactions_version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
 
     uploads = db.relationship("Upload", back_populates="user", cascade="all, delete-orphan")
     monthly_budgets = db.relationship(
@@ -26,12 +36,35 @@ class User(UserMixin, db.Model):
     def check_password(self, password: str) -> bool:
         return check_password_hash(self.password_hash, password)
 
+    @property
+    def is_admin(self) -> bool:
+        admin = current_app.config.get("FLASKY_ADMIN")
+        return bool(admin) and self.email.lower() == admin.lower()
+
 
 @login_manager.user_loader
 def load_user(user_id: str):
     return db.session.get(User, int(user_id))
 
 
+def bump_data_version(*user_ids: int, transactions: bool = True) -> None:
+    """
+    Invalidate cached analytics of these users. Call inside the write's DB
+    transaction (the caller commits). Pass transactions=False for writes that
+    leave transactions alone (budgets), so the columnar copies stay current.
+    """
+    if user_ids:
+        values = {"data_version": User.data_version + 1}
+        if transactions:
+            values["transactions_version"] = User.transactions_version + 1
+        db.session.execute(
+            db.update(User)
+            .where(User.id.in_(user_ids))
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+
+
 class Upload(db.Model):
     __tablename__ = "uploads"
     id = db.Column(db.Integer, primary_key=True)
@@ -45,6 +78,112 @@ class Upload(db.Model):
     transactions = db.relationship("Transaction", back_populates="upload", cascade="all, delete-orphan")
 
 
+UNCATEGORIZED = "Uncategorized"
+
+# Amounts are stored as integer öre: sums are exact and need no float/Decimal handling
+MINOR_UNITS = 100
+
+
+def to_minor(amount) -> int:
+    """
+    Kronor (str, Decimal, int or float) to öre, rounding half away from zero.
+    """
+    return int((Decimal(str(amount)) * MINOR_UNITS).to_integral_value(ROUND_HALF_UP))
+
+
+def from_minor(amount_minor) -> float:
+    return amount_minor / MINOR_UNITS
+
+
+def normalize_category(name: str) -> str:
+    return name.strip().lower()
+
+
+class Category(db.Model):
+    """
+    Lookup table of category names; transactions and daily_spend store the
+    integer id. Seeded with the model labels by migration 1_8; any other
+    name (and every name on a create_all() database) is added on first use.
+    """
+    __tablename__ = "categories"
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(64), unique=True, nullable=False)
+    # normalize_category(name), precomputed so ordering needs no expression
+    normalized_name = db.Column(db.String(64), nullable=False, index=True)
+
+
+# Bound parameters per lookup (SQLite's limit is 32766 on recent builds, 999 on old ones)
+_INTERN_CHUNK = 900
+
+
+def _intern(model, names: Iterable[str], normalize) -> dict[str, int]:
+    """
+    Ids for the names of a lookup table (Category, Merchant), inserting the
+    missing ones: one SELECT per chunk, plus an INSERT and a second SELECT
+    only when something is new.
+    """
+    wanted = sorted(set(names))
+    if not wanted:
+        return {}
+
+    def _lookup(subset):
+        found = {}
+        for i in range(0, len(subset), _INTERN_CHUNK):
+            found.update(db.session.execute(
+                db.select(model.name, model.id).where(model.name.in_(subset[i:i + _INTERN_CHUNK]))
+            ).all())
+        return found
+
+    found = _lookup(wanted)
+    missing = [name for name in wanted if name not in found]
+    if missing:
+        rows = [{"name": name, "normalized_name": normalize(name)} for name in missing]
+        dialect = db.session.get_bind().dialect.name
+        if dialect in ("sqlite", "postgresql"):
+            insert = sqlite_insert if dialect == "sqlite" else postgresql_insert
+            # A concurrent request may add the same name; keep whichever row won
+            db.session.execute(insert(model).on_conflict_do_nothing(index_elements=["name"]), rows)
+        else:
+            db.session.execute(db.insert(model), rows)
+        found.update(_lookup(missing))
+    return found
+
+
+def category_ids(names: Iterable[str]) -> dict[str, int]:
+    return _intern(Category, names, normalize_category)
+
+
+def category_id(name: str) -> int:
+    return category_ids([name])[name]
+
+
+def normalize_merchant(name: str) -> str:
+    return " ".join(name.split()).lower()
+
+
+class Merchant(db.Model):
+    """
+    Interned place_purchase strings (the CSV's Referens); transactions store
+    the integer id. canonical_id optionally points several spellings of one
+    merchant at a single row.
+    """
+    __tablename__ = "merchants"
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(256), unique=True, nullable=False)              # raw text as imported
+    normalized_name = db.Column(db.String(256), nullable=False, index=True)    # normalize_merchant(name)
+    canonical_id = db.Column(db.Integer, db.ForeignKey("merchants.id"), nullable=True)
+
+    canonical = db.relationship("Merchant", remote_side=[id])
+
+
+def merchant_ids(names: Iterable[str]) -> dict[str, int]:
+    return _intern(Merchant, names, normalize_merchant)
+
+
+def merchant_id(name: str) -> int:
+    return merchant_ids([name])[name]
+
+
 class Transaction(db.Model):
     """
     CSV schema (bank transactions) based on provided header:
@@ -53,30 +192,92 @@ class Transaction(db.Model):
     __tablename__ = "transactions"
     id = db.Column(db.Integer, primary_key=True)
 
-    currency = db.Column(db.String(8), nullable=True, index=True)           # Currency
+    currency = db.Column(db.String(8), nullable=True)                       # Currency
 
-    booking_day = db.Column(db.Date, nullable=True, index=True)             # Bokföringsdag
-    transaction_day = db.Column(db.Date, nullable=True, index=True)         # Transaktionsdag
-    currency_day = db.Column(db.Date, nullable=True, index=True)            # Valutadag day of currency conversion
+    booking_day = db.Column(db.Date, nullable=True)                         # Bokföringsdag
+    transaction_day = db.Column(db.Date, nullable=True)                     # Transaktionsdag
+    currency_day = db.Column(db.Date, nullable=True)                        # Valutadag day of currency conversion
 
-    place_purchase = db.Column(db.String(256), nullable=True, index=True)    #Place of purchase
     description = db.Column(db.String(512), nullable=True)                   #Reference
 
-    amount = db.Column(db.Float, nullable=False)                               # Belopp (can be +/-)
+    # NEW FIELDS revision 1_10 (replaces the float amount)
+    amount_minor = db.Column(db.BigInteger, nullable=False)                  # Belopp in öre (can be +/-)
 
     # NEW FIELDS revision 1_1
-    is_expense = db.Column(db.Boolean, nullable=False, default=True, index=True)
-    category = db.Column(db.String(64), nullable=False, default="Uncategorized", index=True)
+    is_expense = db.Column(db.Boolean, nullable=False, default=True)
 
     # NWE FIELDS revision 1_2
     # Tag: financial transaction (e.g., Överföring, Lön)
-    is_financial_transaction = db.Column(db.Boolean, nullable=False, default=False, index=True)
+    is_financial_transaction = db.Column(db.Boolean, nullable=False, default=False)
 
     # END NEW FIELDS 1_1
 
+    # NEW FIELDS revision 1_3
+    # Max class probability of the predicted category (model output only)
+    category_confidence = db.Column(db.Float, nullable=True)
+
     upload_id = db.Column(db.Integer, db.ForeignKey("uploads.id"), nullable=False, index=True)
     upload = db.relationship("Upload", back_populates="transactions")
 
+    # NEW FIELDS revision 1_6
+    # Copy of uploads.user_id so per-user queries need no join
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+
+    # NEW FIELDS revision 1_8 (replaces the category string of revision 1_1)
+    category_id = db.Column(db.Integer, db.ForeignKey("categories.id"), nullable=False)
+    category = db.relationship("Category")
+
+    # NEW FIELDS revision 1_9 (replaces the place_purchase string)
+    # Place of purchase
+    merchant_id = db.Column(db.Integer, db.ForeignKey("merchants.id"), nullable=True)
+    merchant = db.relationship("Merchant")
+
+    # NEW FIELDS revision 1_12
+    # A user accepted/corrected the category on the review page; re-categorization never overwrites it
+    category_confirmed = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
+
+    # Every index here is paid for on each ingest insert, so only query shapes
+    # that actually run get one (revision 1_7 audit; benchmarks/ingest_write_benchmark.py).
+    # Aggregates are served by daily_spend, not by indexes on transactions.
+    __table_args__ = (
+        # Category-filtered pages; rollup rebuilds / deltas grouped per user
+        db.Index("ix_transactions_user_category_day", "user_id", "category_id", "transaction_day"),
+        # Keyset pages of the trend table, ordered by (transaction_day, id); the
+        # view never shows financial transactions, so they are left out of the index.
+        # On PostgreSQL the page's other columns are INCLUDEd for index-only scans (revision 1_11)
+        db.Index(
+            "ix_transactions_user_day_nonfinancial",
+            "user_id", "transaction_day", "id",
+            sqlite_where=db.text("is_financial_transaction IS 0"),
+            postgresql_where=db.text("is_financial_transaction IS false"),
+            postgresql_include=["category_id", "merchant_id", "amount_minor"],
+        ),
+        # Review queue: low-confidence rows of one user
+        db.Index("ix_transactions_user_confidence", "user_id", "category_confidence"),
+        # Review corrections: every row of one merchant for a user
+        db.Index("ix_transactions_user_merchant", "user_id", "merchant_id"),
+    )
+
+
+class DailySpend(db.Model):
+    """
+    Rollup of transactions per (user, day, category, is_expense, is_financial_transaction).
+
+    Maintained incrementally by app.analytics.rollup in the same DB transaction
+    as every write to `transactions`; rebuild with `flask rebuild-rollup`.
+    Rows without a transaction_day are not rolled up.
+    """
+    __tablename__ = "daily_spend"
+
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    category_id = db.Column(db.Integer, db.ForeignKey("categories.id"), primary_key=True)
+    is_expense = db.Column(db.Boolean, primary_key=True)
+    is_financial_transaction = db.Column(db.Boolean, primary_key=True)
+
+    amount_minor_sum = db.Column(db.BigInteger, nullable=False, default=0)   # SUM(amount_minor), signed
+    tx_count = db.Column(db.Integer, nullable=False, default=0)
+
 
 class MonthlyBudget(db.Model):
     __tablename__ = "monthly_budgets"
@@ -89,8 +290,8 @@ class MonthlyBudget(db.Model):
     year = db.Column(db.Integer, nullable=False, index=True)
     month = db.Column(db.Integer, nullable=False, index=True)  # 1..12
 
-    # Use Numeric to avoid float rounding for money
-    amount = db.Column(db.Numeric(12, 2), nullable=False)
+    # Öre, like Transaction.amount_minor, so budgets compare with spend sums directly
+    amount_minor = db.Column(db.BigInteger, nullable=False)
 
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
     updated_at = db.Column(
@@ -102,4 +303,8 @@ class MonthlyBudget(db.Model):
 
     __table_args__ = (
         db.UniqueConstraint("user_id", "year", "month", name="uq_user_budget_month"),
-    )
\ No newline at end of file
+    )
+
+    @property
+    def amount(self) -> float:
+        return from_minor(self.amount_minor)
\ No newline at end of file
@@ -0,0 +1,158 @@
+"""
+On-demand sampling profiler for single requests.
+
+With PROFILER_ENABLED, a request carrying a profile token in the
+X-Profile-Token header is sampled while it runs. The token is minted on
+/admin/profiles, signed with SECRET_KEY and bound to one user (usually the
+admin) and optionally one path, and it expires after PROFILER_TOKEN_MAX_AGE
+seconds. It is accepted only on that user's session, so a leaked token
+profiles nobody else's requests. Tokens are header-only, never query
+parameters, to keep them out of access logs and Referer headers.
+
+A background thread reads the request thread's stack every
+PROFILER_INTERVAL seconds, in practice at most once per GIL switch interval.
+The samples are written in collapsed-stack format
+(`frame;frame;frame count`) to PROFILER_DIR, which speedscope and
+flamegraph.pl open directly. Each process starts at most one profile per
+PROFILER_MIN_INTERVAL seconds, and only the newest PROFILER_MAX_FILES
+profiles are kept.
+
+With PROFILER_ENABLED off, no hook is installed at all.
+"""
+from __future__ import annotations
+
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+from flask import current_app, g, request
+from flask_login import current_user
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+
+TOKEN_HEADER = "X-Profile-Token"
+PROFILE_SUFFIX = ".folded"
+
+_rate_lock = threading.Lock()
+_last_started = float("-inf")
+
+
+class SamplingProfiler:
+    """
+    Counts the stacks of one thread, sampled from a daemon thread.
+    """
+
+    def __init__(self, thread_id: int, interval: float = 0.001):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: Counter[tuple[str, ...]] = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.samples[tuple(reversed(stack))] += 1
+
+    def collapsed(self) -> str:
+        return "".join(
+            ";".join(part.replace(";", ":") for part in stack) + f" {count}\n"
+            for stack, count in self.samples.most_common()
+        )
+
+
+def _serializer() -> URLSafeTimedSerializer:
+    return URLSafeTimedSerializer(current_app.config["SECRET_KEY"], salt="request-profiler")
+
+
+def issue_token(admin_email: str, user_id: int, path: Optional[str] = None) -> str:
+    """A token that profiles user_id's requests, to `path` only when given."""
+    return _serializer().dumps({"admin": admin_email, "user": user_id, "path": path})
+
+
+def _token_matches(token: str) -> bool:
+    try:
+        claims = _serializer().loads(token, max_age=current_app.config.get("PROFILER_TOKEN_MAX_AGE", 600))
+    except BadSignature:
+        return False
+    if not isinstance(claims, dict):
+        return False
+    admin = current_app.config.get("FLASKY_ADMIN")
+    if not admin or str(claims.get("admin", "")).lower() != admin.lower():
+        return False
+    if claims.get("path") and claims["path"] != request.path:
+        return False
+    return current_user.is_authenticated and claims.get("user") == current_user.id
+
+
+def _take_slot() -> bool:
+    global _last_started
+    min_interval = float(current_app.config.get("PROFILER_MIN_INTERVAL", 1.0))
+    with _rate_lock:
+        now = time.monotonic()
+        if now - _last_started < min_interval:
+            return False
+        _last_started = now
+        return True
+
+
+def profile_dir() -> Path:
+    return Path(current_app.config.get("PROFILER_DIR") or os.path.join(current_app.instance_path, "profiles"))
+
+
+def _start():
+    token = request.headers.get(TOKEN_HEADER)
+    if not token or not _token_matches(token) or not _take_slot():
+        return
+    profiler = SamplingProfiler(threading.get_ident(), float(current_app.config.get("PROFILER_INTERVAL", 0.001)))
+    g.request_profiler = (profiler, time.perf_counter(), current_user.get_id())
+    profiler.start()
+
+
+def _finish(exc=None):
+    entry = g.pop("request_profiler", None)
+    if entry is None:
+        return
+    profiler, started, user = entry
+    profiler.stop()
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+    endpoint = re.sub(r"[^A-Za-z0-9_.-]", "_", request.endpoint or "unmatched")
+    directory = profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{stamp}_{endpoint}_user{user or '-'}_{elapsed_ms:.0f}ms{PROFILE_SUFFIX}"
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(profiler.collapsed(), encoding="utf-8")
+    tmp.replace(path)
+    _prune(directory, int(current_app.config.get("PROFILER_MAX_FILES", 200)))
+
+
+def _prune(directory: Path, keep: int) -> None:
+    # names start with a UTC timestamp, so name order is age order
+    for old in sorted(directory.glob(f"*{PROFILE_SUFFIX}"), reverse=True)[keep:]:
+        old.unlink(missing_ok=True)
+
+
+def init_profiler(app) -> None:
+    if not app.config.get("PROFILER_ENABLED"):
+        return
+    app.before_request(_start)
+    app.teardown_request(_finish)
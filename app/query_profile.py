@@ -0,0 +1,122 @@
+"""
+Per-request SQL profiling.
+
+before/after_cursor_execute listeners on the app's engines time every
+statement of a profiled request: count, total time and the slowest
+statements (text only, never parameters). A request is profiled with
+probability QUERY_PROFILE_SAMPLE_RATE, so the listeners cost one g lookup
+on all other requests.
+
+A profiled request over QUERY_BUDGET_COUNT statements or QUERY_BUDGET_MS
+of database time is logged as a warning. With QUERY_PROFILE_EXPOSE on, a
+request sending `X-Query-Profile: 1` is always profiled and gets the
+breakdown back in a Server-Timing header and a JSON X-Query-Profile header.
+"""
+from __future__ import annotations
+
+import heapq
+import json
+import random
+import time
+from dataclasses import dataclass, field
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+
+from .database import READ_ENGINE
+
+REQUEST_HEADER = "X-Query-Profile"
+_STATEMENT_CHARS = 300
+
+
+@dataclass
+class QueryProfile:
+    keep: int = 5
+    count: int = 0
+    total: float = 0.0  # seconds
+    slowest: list[tuple[float, int, str]] = field(default_factory=list)  # min-heap of (seconds, seq, sql)
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.count += 1
+        self.total += elapsed
+        entry = (elapsed, self.count, statement)
+        if len(self.slowest) < self.keep:
+            heapq.heappush(self.slowest, entry)
+        elif elapsed > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, entry)
+
+    def breakdown(self) -> dict:
+        return {
+            "count": self.count,
+            "total_ms": round(self.total * 1000, 2),
+            "slowest": [
+                {"ms": round(elapsed * 1000, 2), "statement": " ".join(sql.split())[:_STATEMENT_CHARS]}
+                for elapsed, _, sql in sorted(self.slowest, reverse=True)
+            ],
+        }
+
+
+def _current_profile():
+    return g.get("query_profile") if has_request_context() else None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_profile() is not None:
+        conn.info.setdefault("query_profile_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current_profile()
+    if profile is not None:
+        starts = conn.info.get("query_profile_start")
+        if starts:
+            profile.record(statement, time.perf_counter() - starts.pop())
+
+
+def _handle_error(exception_context):
+    starts = exception_context.connection.info.get("query_profile_start") if exception_context.connection else None
+    if starts:
+        starts.pop()
+
+
+def _start_profile():
+    config = current_app.config
+    requested = config.get("QUERY_PROFILE_EXPOSE") and request.headers.get(REQUEST_HEADER) == "1"
+    if requested or random.random() < config.get("QUERY_PROFILE_SAMPLE_RATE", 0.0):
+        g.query_profile = QueryProfile(keep=int(config.get("QUERY_PROFILE_SLOWEST", 5)))
+        g.query_profile_requested = requested
+
+
+def _finish_profile(response):
+    profile = g.pop("query_profile", None)
+    if profile is None:
+        return response
+    config = current_app.config
+    over_count = profile.count > config.get("QUERY_BUDGET_COUNT", 50)
+    over_time = profile.total * 1000 > config.get("QUERY_BUDGET_MS", 500)
+    if over_count or over_time:
+        current_app.logger.warning(
+            "Query budget exceeded: %s %s -> %s", request.method, request.path, json.dumps(profile.breakdown())
+        )
+    if g.pop("query_profile_requested", False):
+        response.headers["Server-Timing"] = f'db;dur={profile.total * 1000:.2f};desc="{profile.count} queries"'
+        response.headers[REQUEST_HEADER] = json.dumps(profile.breakdown())
+    return response
+
+
+def init_query_profile(app, db) -> None:
+    """
+    Instrument the app's engines and hook its requests; a no-op while the
+    sample rate is 0 and the debug header is off. Call after init_engines().
+    """
+    if not app.config.get("QUERY_PROFILE_SAMPLE_RATE") and not app.config.get("QUERY_PROFILE_EXPOSE"):
+        return
+    with app.app_context():
+        engines = [db.engine, app.extensions.get(READ_ENGINE)]
+    for engine in filter(None, engines):
+        if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+            event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+            event.listen(engine, "handle_error", _handle_error)
+    app.before_request(_start_profile)
+    app.after_request(_finish_profile)
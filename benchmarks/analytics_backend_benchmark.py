@@ -0,0 +1,163 @@
+"""
+Trend aggregation latency for one user with a long history, per backend:
+
+  sqlite-scan    GROUP BY over the transactions table (no rollup)
+  sqlite-rollup  summarize_spending() over daily_spend (ANALYTICS_BACKEND=sql)
+  duckdb         summarize_spending() over the Parquet copy (ANALYTICS_BACKEND=duckdb)
+  memory         summarize_spending() over cached NumPy arrays (ANALYTICS_BACKEND=memory),
+                 after the one-off load
+
+Each query is the full trend summary (dropdown, per-day series, category
+breakdown, total) for the whole history and for one category in the last
+year. Needs duckdb. Run from the project root:
+> python -m benchmarks.analytics_backend_benchmark --rows 1000000
+> python -m benchmarks.analytics_backend_benchmark --rows 10000000
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+
+CATEGORIES = ["Dagligvaror", "Restaurang", "Transport", "Nöje", "Hälsa", "Kläder", "Hem", "Övrigt"]
+START = date(2016, 1, 1)
+DAYS = 10 * 365
+CHUNK = 200_000
+
+_SCAN = """
+    SELECT transaction_day, category_id,
+           SUM(CASE WHEN is_expense AND transaction_day >= :start THEN -amount_minor END),
+           SUM(CASE WHEN is_expense AND transaction_day >= :start AND category_id = :category THEN -amount_minor END)
+    FROM transactions
+    WHERE user_id = :user_id AND transaction_day IS NOT NULL AND is_financial_transaction = 0
+    GROUP BY transaction_day, category_id
+"""
+
+
+def _make_app(workdir: Path):
+    from config import TestingConfig, config
+
+    config["benchmark"] = type("BenchmarkConfig", (TestingConfig,), {
+        "TESTING": False,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{workdir / 'bench.db'}",
+        "ANALYTICS_BACKEND": "duckdb",
+        "ANALYTICS_PARQUET_DIR": str(workdir / "parquet"),
+    })
+    from app import create_app
+    return create_app("benchmark")
+
+
+def _load(total_rows: int, seed: int = 0) -> int:
+    from app.extensions import db
+    from app.models import Upload, User, category_ids
+
+    user = User(email="bench@example.com", password_hash="x")
+    db.session.add(user)
+    db.session.flush()
+    cat_ids = list(category_ids(CATEGORIES).values())
+    user_id = user.id
+    db.session.commit()
+
+    rng = np.random.default_rng(seed)
+    raw = db.engine.raw_connection()
+    try:
+        cur = raw.cursor()
+        for offset in range(0, total_rows, CHUNK):
+            n = min(CHUNK, total_rows - offset)
+            upload = Upload(original_filename="bench.csv", user_id=user_id, row_count=n)
+            db.session.add(upload)
+            db.session.commit()
+            days = [(START + timedelta(days=int(d))).isoformat() for d in rng.integers(0, DAYS, n)]
+            expense = rng.random(n) < 0.9
+            amounts = np.where(expense, -rng.integers(500, 250_000, n), rng.integers(10_000, 4_000_000, n))
+            cats = rng.choice(cat_ids, n)
+            financial = rng.random(n) < 0.05
+            cur.executemany(
+                "INSERT INTO transactions (transaction_day, amount_minor, is_expense, is_financial_transaction,"
+                " upload_id, user_id, category_id) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                zip(days, amounts.tolist(), expense.tolist(), financial.tolist(),
+                    [upload.id] * n, [user_id] * n, cats.tolist()),
+            )
+            raw.commit()
+    finally:
+        raw.close()
+    return user_id
+
+
+def _median_ms(fn, repeat: int) -> float:
+    fn()  # warm-up (and, for duckdb, the initial export)
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = _make_app(Path(tmp))
+        with app.app_context():
+            from app.analytics.queries import summarize_spending
+            from app.analytics.rollup import rebuild_rollup
+            from app.extensions import db
+            from app.models import category_id
+
+            t0 = time.perf_counter()
+            user_id = _load(args.rows)
+            print(f"loaded {args.rows:,} rows into SQLite in {time.perf_counter() - t0:.1f}s")
+            t0 = time.perf_counter()
+            rebuild_rollup()
+            db.session.commit()
+            print(f"built daily_spend in {time.perf_counter() - t0:.1f}s")
+            store = app.extensions["columnar_store"]
+            t0 = time.perf_counter()
+            store.rebuild_user(user_id)
+            print(f"exported Parquet in {time.perf_counter() - t0:.1f}s")
+
+            last_year = START + timedelta(days=DAYS - 365)
+            cases = {"whole history": (None, None, ""), "1 category, last year": (last_year, None, "Restaurang")}
+
+            from app.analytics.inmemory import MemoryStore
+
+            memory = MemoryStore(max_bytes=1 << 30)
+            t0 = time.perf_counter()
+            memory.summarize(user_id, None, None, "")
+            print(f"loaded NumPy arrays in {time.perf_counter() - t0:.1f}s ({memory.nbytes / 2**20:.0f} MiB)")
+
+            def with_store(backend, case):
+                app.extensions["columnar_store"] = backend
+                try:
+                    return summarize_spending(user_id, *case)
+                finally:
+                    app.extensions["columnar_store"] = store
+
+            def sql_scan(case):
+                start, _, category = case
+                return db.session.execute(db.text(_SCAN), {
+                    "user_id": user_id, "start": start or START,
+                    "category": category_id(category) if category else -1,
+                }).all()
+
+            print(f"\n{'query':<22} {'sqlite-scan':>12} {'sqlite-rollup':>14} {'duckdb':>10} {'memory':>10}"
+                  "   (median ms)")
+            for label, case in cases.items():
+                scan = _median_ms(lambda: sql_scan(case), args.repeat)
+                rollup = _median_ms(lambda: with_store(None, case), args.repeat)
+                duck = _median_ms(lambda: with_store(store, case), args.repeat)
+                mem = _median_ms(lambda: with_store(memory, case), args.repeat)
+                print(f"{label:<22} {scan:>12.1f} {rollup:>14.1f} {duck:>10.1f} {mem:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Latency/throughput of category prediction under concurrent uploads:
+in-process prediction in every web worker vs. the micro-batching inference
+worker (app.ai_agent_models.inference_server).
+
+Each simulated web worker is a separate process that sends --requests uploads
+of --rows texts each. Run from the project root:
+> python -m benchmarks.inference_server_benchmark --model app/ai_agent_models/category_model.joblib
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+_MODEL = None
+_CLIENT = None
+
+SAMPLE_TEXTS = [
+    "ICA Nära Hornstull", "SL Access", "Systembolaget 123", "Pressbyrån T-Centralen",
+    "Sushi Yama lunch", "Apoteket Hjärtat", "Webhallen USB-kabel", "Coop Forum",
+    "Taxi Stockholm", "Espresso House fika", "Stadium löparskor", "Spotify",
+]
+
+
+def _init_in_process(model_path: str) -> None:
+    global _MODEL
+    import joblib
+    _MODEL = joblib.load(model_path)
+
+
+def _init_client(socket_path: str) -> None:
+    global _CLIENT
+    from app.ai_agent_models.inference_server import InferenceClient
+    _CLIENT = InferenceClient(socket_path)
+
+
+def _texts(rows: int, seed: int) -> list[str]:
+    return [f"{SAMPLE_TEXTS[(seed + i) % len(SAMPLE_TEXTS)]} {i}" for i in range(rows)]
+
+
+def _worker(args: tuple[str, int, int, int]) -> list[float]:
+    mode, requests, rows, seed = args
+    from app.ai_agent_models.train_category_model import predict_with_confidence
+
+    latencies = []
+    for r in range(requests):
+        texts = _texts(rows, seed + r)
+        t0 = time.perf_counter()
+        if mode == "server":
+            _CLIENT.predict(texts)
+        else:
+            predict_with_confidence(_MODEL, texts)
+        latencies.append(time.perf_counter() - t0)
+    return latencies
+
+
+def run(mode: str, target: str, workers: int, requests: int, rows: int) -> dict:
+    initializer = _init_client if mode == "server" else _init_in_process
+    with ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=(target,)) as pool:
+        # Warm-up so model loading / connecting is not measured
+        list(pool.map(_worker, [(mode, 1, rows, 0)] * workers))
+        t0 = time.perf_counter()
+        results = list(pool.map(_worker, [(mode, requests, rows, w) for w in range(workers)]))
+        wall = time.perf_counter() - t0
+
+    latencies = sorted(x for r in results for x in r)
+    return {
+        "mode": mode,
+        "p50_ms": statistics.median(latencies) * 1000.0,
+        "p95_ms": latencies[int(0.95 * (len(latencies) - 1))] * 1000.0,
+        "rows_per_sec": workers * requests * rows / wall,
+    }
+
+
+def _wait_for_socket(path: str, proc: subprocess.Popen, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not os.path.exists(path):
+        if proc.poll() is not None or time.monotonic() > deadline:
+            raise RuntimeError("inference worker did not start")
+        time.sleep(0.05)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--model", type=Path, required=True)
+    parser.add_argument("--workers", type=int, default=8, help="concurrent simulated web workers")
+    parser.add_argument("--requests", type=int, default=100, help="uploads per worker")
+    parser.add_argument("--rows", type=int, default=20, help="rows per upload")
+    parser.add_argument("--window-ms", type=float, default=5.0)
+    args = parser.parse_args(argv)
+
+    results = [run("in-process", str(args.model), args.workers, args.requests, args.rows)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        socket_path = os.path.join(tmp, "inference.sock")
+        proc = subprocess.Popen([
+            sys.executable, "-m", "app.ai_agent_models.inference_server",
+            "--socket", socket_path, "--model", str(args.model), "--window-ms", str(args.window_ms),
+        ], stdout=subprocess.DEVNULL)
+        try:
+            _wait_for_socket(socket_path, proc)
+            results.append(run("server", socket_path, args.workers, args.requests, args.rows))
+        finally:
+            proc.terminate()
+            proc.wait()
+
+    print(f"{args.workers} workers x {args.requests} uploads x {args.rows} rows")
+    print(f"{'mode':<12} {'p50 (ms)':>9} {'p95 (ms)':>9} {'rows/sec':>10}")
+    for r in results:
+        print(f"{r['mode']:<12} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['rows_per_sec']:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Insert throughput of the transactions table under the current index set vs.
+the pre-audit one (a single-column index on nearly every column plus the
+first composite indexes; see migration Rev1_7_TransactionIndexAudit).
+
+Rows are inserted the way upload_post does it: one executemany and one
+commit per upload of --batch rows. Each variant gets a fresh SQLite file.
+Run from the project root:
+> python -m benchmarks.ingest_write_benchmark --rows 200000
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import sqlalchemy as sa
+
+# Indexes dropped by the audit (name -> columns); string columns mapped to their id replacements
+LEGACY_INDEXES = {
+    "ix_transactions_currency": ["currency"],
+    "ix_transactions_booking_day": ["booking_day"],
+    "ix_transactions_transaction_day": ["transaction_day"],
+    "ix_transactions_currency_day": ["currency_day"],
+    "ix_transactions_merchant_id": ["merchant_id"],
+    "ix_transactions_is_expense": ["is_expense"],
+    "ix_transactions_category_id": ["category_id"],
+    "ix_transactions_is_financial_transaction": ["is_financial_transaction"],
+    "ix_transactions_user_fin_expense_day": ["user_id", "is_financial_transaction", "is_expense", "transaction_day"],
+    "ix_transactions_user_fin_day": ["user_id", "is_financial_transaction", "transaction_day", "id"],
+}
+
+CATEGORIES = ["Dagligvaror", "Restaurang", "Transport", "Nöje", "Hälsa", "Kläder", "Hem", "Övrigt"]
+MERCHANTS = 2000
+
+
+def _rows(n: int, upload_id: int, user_id: int, seed: int) -> list[dict]:
+    rnd = random.Random(seed)
+    start = date(2020, 1, 1)
+    rows = []
+    for _ in range(n):
+        day = start + timedelta(days=rnd.randrange(6 * 365))
+        amount = -rnd.randint(500, 250_000) if rnd.random() < 0.9 else rnd.randint(10_000, 4_000_000)
+        merchant = rnd.randrange(MERCHANTS)
+        rows.append({
+            "currency": "SEK",
+            "booking_day": day,
+            "transaction_day": day,
+            "currency_day": day,
+            "merchant_id": merchant + 1,
+            "description": f"Merchant {merchant}",
+            "amount_minor": amount,
+            "is_expense": amount < 0,
+            "category_id": rnd.randrange(len(CATEGORIES)) + 1,
+            "is_financial_transaction": rnd.random() < 0.05,
+            "category_confidence": rnd.random(),
+            "upload_id": upload_id,
+            "user_id": user_id,
+        })
+    return rows
+
+
+def run(variant: str, total_rows: int, batch: int, workdir: Path) -> dict:
+    from app.extensions import db
+    from app.models import Category, Merchant, Transaction, Upload, User
+
+    engine = sa.create_engine(f"sqlite:///{workdir / (variant + '.db')}")
+    db.metadata.create_all(
+        engine, tables=[User.__table__, Upload.__table__, Category.__table__, Merchant.__table__, Transaction.__table__]
+    )
+
+    table = Transaction.__table__
+    with engine.begin() as conn:
+        if variant == "before":
+            # Plain DDL: an sa.Index on table.c would attach itself to the shared model metadata
+            for name, columns in LEGACY_INDEXES.items():
+                conn.exec_driver_sql(f"CREATE INDEX {name} ON transactions ({', '.join(columns)})")
+        user_id = conn.execute(
+            User.__table__.insert().values(email="bench@example.com", password_hash="x", created_at=sa.func.now(),
+                                           data_version=0)
+        ).inserted_primary_key[0]
+        conn.execute(Category.__table__.insert(), [{"name": c, "normalized_name": c.lower()} for c in CATEGORIES])
+        conn.execute(
+            Merchant.__table__.insert(),
+            [{"name": f"Merchant {i}", "normalized_name": f"merchant {i}"} for i in range(MERCHANTS)],
+        )
+        n_indexes = len(sa.inspect(conn).get_indexes("transactions"))
+
+    batches = [_rows(min(batch, total_rows - i), 0, user_id, seed=i) for i in range(0, total_rows, batch)]
+
+    t0 = time.perf_counter()
+    for rows in batches:
+        with engine.begin() as conn:
+            upload_id = conn.execute(
+                Upload.__table__.insert().values(original_filename="bench.csv", user_id=user_id,
+                                                 row_count=len(rows), uploaded_at=sa.func.now())
+            ).inserted_primary_key[0]
+            for r in rows:
+                r["upload_id"] = upload_id
+            conn.execute(table.insert(), rows)
+    elapsed = time.perf_counter() - t0
+    engine.dispose()
+
+    return {"variant": variant, "indexes": n_indexes, "rows_per_sec": total_rows / elapsed, "seconds": elapsed}
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--batch", type=int, default=5_000, help="Rows per upload (one commit each).")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = [run(variant, args.rows, args.batch, Path(tmp)) for variant in ("before", "after")]
+
+    print(f"{'variant':<8} {'indexes':>7} {'rows/s':>12} {'seconds':>8}")
+    for r in results:
+        print(f"{r['variant']:<8} {r['indexes']:>7} {r['rows_per_sec']:>12,.0f} {r['seconds']:>8.2f}")
+    before, after = results
+    print(f"after/before: {after['rows_per_sec'] / before['rows_per_sec']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
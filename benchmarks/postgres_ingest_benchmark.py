@@ -0,0 +1,124 @@
+"""
+Upload insert throughput: SQLite (executemany, the development path) vs.
+PostgreSQL with executemany and with COPY FROM STDIN (the production path,
+app/ingest/bulk.py).
+
+Rows are written the way upload_post does it: one Upload row, the prepared
+frame, one commit per upload of --batch rows. The PostgreSQL paths need a
+database (emptied first) and psycopg; without --postgres-url only the SQLite
+baseline runs. Run from the project root:
+> python -m benchmarks.postgres_ingest_benchmark --postgres-url postgresql+psycopg://localhost/bi_bench
+
+1-CPU dev container, PostgreSQL 16.2 on the same machine (local TCP), 200,000
+rows in uploads of 5,000:
+                         psycopg 3               psycopg2
+  sqlite-executemany     ~18,000 rows/s (11 s)   ~17,400 rows/s (11 s)
+  postgres-executemany    ~8,800 rows/s (23 s)    ~6,500 rows/s (31 s)
+  postgres-copy          ~15,400 rows/s (13 s)   ~16,900 rows/s (12 s)
+COPY is about 2x executemany on PostgreSQL. Building the CSV (to_csv) is
+~2 s of the COPY time; the rest is the server writing rows and indexes on
+the CPU it shares with the client, so a separate database host gains more.
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+CATEGORIES = ["Dagligvaror", "Restaurang", "Transport", "Nöje", "Hälsa", "Kläder", "Hem", "Övrigt"]
+MERCHANTS = 2000
+
+
+def _make_app(name: str, url: str):
+    from config import TestingConfig, config
+
+    config[name] = type("BenchmarkConfig", (TestingConfig,), {"TESTING": False, "SQLALCHEMY_DATABASE_URI": url})
+    from app import create_app
+    return create_app(name)
+
+
+def _frames(total_rows: int, batch: int, user_id: int, cat_ids: list[int], merchant_ids: list[int]):
+    rng = np.random.default_rng(0)
+    start = np.datetime64(date(2020, 1, 1))
+    for offset in range(0, total_rows, batch):
+        n = min(batch, total_rows - offset)
+        days = pd.Series(start + rng.integers(0, 6 * 365, n)).dt.date
+        expense = rng.random(n) < 0.9
+        merchants = rng.choice(merchant_ids, n)
+        yield pd.DataFrame({
+            "currency": "SEK",
+            "booking_day": days,
+            "transaction_day": days,
+            "description": [f"Merchant {m}" for m in merchants],
+            "amount_minor": np.where(expense, -rng.integers(500, 250_000, n), rng.integers(10_000, 4_000_000, n)),
+            "is_expense": expense,
+            "is_financial_transaction": rng.random(n) < 0.05,
+            "category_confidence": rng.random(n),
+            "category_id": rng.choice(cat_ids, n),
+            "merchant_id": merchants,
+            "upload_id": 0,
+            "user_id": user_id,
+        })
+
+
+def run(label: str, url: str, insert, total_rows: int, batch: int) -> dict:
+    from app.extensions import db
+    from app.models import Upload, User, category_ids, merchant_ids
+
+    app = _make_app(f"bench-{label}", url)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        user = User(email="bench@example.com", password_hash="x")
+        db.session.add(user)
+        db.session.flush()
+        user_id = user.id
+        cat_ids = list(category_ids(CATEGORIES).values())
+        place_ids = list(merchant_ids(f"Merchant {i}" for i in range(MERCHANTS)).values())
+        db.session.commit()
+        frames = list(_frames(total_rows, batch, user_id, cat_ids, place_ids))
+
+        t0 = time.perf_counter()
+        for frame in frames:
+            upload = Upload(original_filename="bench.csv", user_id=user_id, row_count=len(frame))
+            db.session.add(upload)
+            db.session.flush()
+            frame["upload_id"] = upload.id
+            insert(frame)
+            db.session.commit()
+        elapsed = time.perf_counter() - t0
+        db.drop_all()
+        db.engine.dispose()
+    return {"path": label, "rows_per_sec": total_rows / elapsed, "seconds": elapsed}
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--postgres-url", default=None, help="Omit to run only the SQLite baseline.")
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--batch", type=int, default=5_000, help="Rows per upload (one commit each).")
+    args = parser.parse_args(argv)
+
+    from app.ingest.bulk import copy_transactions, executemany_transactions
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sqlite_url = f"sqlite:///{Path(tmp) / 'bench.db'}"
+        results = [run("sqlite-executemany", sqlite_url, executemany_transactions, args.rows, args.batch)]
+        if args.postgres_url:
+            results += [
+                run("postgres-executemany", args.postgres_url, executemany_transactions, args.rows, args.batch),
+                run("postgres-copy", args.postgres_url, copy_transactions, args.rows, args.batch),
+            ]
+
+    print(f"{'path':<22} {'rows/s':>12} {'seconds':>8}")
+    for r in results:
+        print(f"{r['path']:<22} {r['rows_per_sec']:>12,.0f} {r['seconds']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
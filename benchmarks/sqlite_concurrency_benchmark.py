@@ -0,0 +1,181 @@
+"""
+Dashboard reads while uploads commit, on SQLite, with and without the engine
+tuning in app/database.py:
+
+  default  rollback journal, driver defaults, one shared pool
+  tuned    SQLITE_PRAGMAS (WAL, synchronous=NORMAL, cache/mmap, busy_timeout)
+           and the separate read-only analytics pool
+
+One writer process repeats upload_post's work (insert a batch, update the
+rollup, bump data_version, commit) while reader processes run the trend
+view's queries (summary + first transaction page) on the analytics path.
+Each variant gets a fresh database file. Run from the project root:
+> python -m benchmarks.sqlite_concurrency_benchmark --readers 4 --seconds 10
+"""
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import random
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+CATEGORIES = ["Dagligvaror", "Restaurang", "Transport", "Nöje", "Hälsa", "Kläder", "Hem", "Övrigt"]
+START = date(2022, 1, 1)
+
+
+def _make_app(variant: str, workdir: Path):
+    from config import DevelopmentConfig, config
+
+    overrides = {"DEBUG": False, "SQLALCHEMY_DATABASE_URI": f"sqlite:///{workdir / (variant + '.db')}"}
+    if variant == "default":
+        overrides.update(SQLITE_PRAGMAS={}, ANALYTICS_READ_POOL=False)
+    config[f"bench-{variant}"] = type("BenchmarkConfig", (DevelopmentConfig,), overrides)
+
+    from app import create_app
+    return create_app(f"bench-{variant}")
+
+
+def _write_upload(user_id: int, cat_ids: list[int], rows: int, rnd: random.Random) -> None:
+    from app.analytics.rollup import aggregate, apply_deltas
+    from app.extensions import db
+    from app.models import Transaction, Upload, bump_data_version
+
+    upload = Upload(original_filename="bench.csv", user_id=user_id, row_count=rows)
+    db.session.add(upload)
+    db.session.flush()
+    params = []
+    for _ in range(rows):
+        amount = -rnd.randint(500, 250_000)
+        params.append({
+            "transaction_day": START + timedelta(days=rnd.randrange(4 * 365)),
+            "amount_minor": amount, "is_expense": True, "is_financial_transaction": False,
+            "category_id": rnd.choice(cat_ids), "upload_id": upload.id, "user_id": user_id,
+        })
+    db.session.execute(db.insert(Transaction), params)
+    apply_deltas(aggregate(
+        (user_id, p["transaction_day"], p["category_id"], True, False, p["amount_minor"]) for p in params
+    ))
+    bump_data_version(user_id)
+    db.session.commit()
+
+
+def _writer(variant, workdir, user_id, cat_ids, batch, ready, stop, results):
+    from app.extensions import db
+
+    app = _make_app(variant, workdir)
+    rnd = random.Random(1)
+    writes, errors = 0, 0
+    ready.wait()
+    with app.app_context():
+        while not stop.is_set():
+            try:
+                _write_upload(user_id, cat_ids, batch, rnd)
+                writes += 1
+            except Exception:  # e.g. "database is locked"; count and keep going
+                db.session.rollback()
+                errors += 1
+    results.put(("write", writes, errors))
+
+
+def _reader(variant, workdir, user_id, seed, ready, stop, results):
+    from flask import g
+
+    from app.analytics.queries import summarize_spending, transaction_page
+    from app.extensions import db
+
+    app = _make_app(variant, workdir)
+    rnd = random.Random(seed)
+    latencies, errors = [], 0
+    ready.wait()
+    while not stop.is_set():
+        with app.test_request_context():
+            g.read_only_db = True  # what @read_only_db does for the analytics views
+            start = START + timedelta(days=rnd.randrange(3 * 365))
+            category = rnd.choice(["", *CATEGORIES])
+            t0 = time.perf_counter()
+            try:
+                summarize_spending(user_id, start, None, category)
+                transaction_page(user_id, start, None, category, limit=100)
+                latencies.append((time.perf_counter() - t0) * 1000)
+            except Exception:
+                errors += 1
+            finally:
+                db.session.remove()
+    results.put(("read", latencies, errors))
+
+
+def run(variant: str, workdir: Path, seed_rows: int, batch: int, readers: int, seconds: float) -> dict:
+    from app.extensions import db
+    from app.models import User, category_ids
+
+    app = _make_app(variant, workdir)
+    with app.app_context():
+        journal = db.session.execute(db.text("PRAGMA journal_mode")).scalar()
+        user = User(email="bench@example.com", password_hash="x")
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+        cat_ids = list(category_ids(CATEGORIES).values())
+        db.session.commit()
+        rnd = random.Random(0)
+        for _ in range(seed_rows // batch):
+            _write_upload(user_id, cat_ids, batch, rnd)
+        db.engine.dispose()
+
+    # Separate processes, so the GIL does not serialize readers and writer
+    ctx = multiprocessing.get_context("spawn")
+    ready, stop, results = ctx.Barrier(readers + 2), ctx.Event(), ctx.Queue()
+    procs = [ctx.Process(target=_writer, args=(variant, workdir, user_id, cat_ids, batch, ready, stop, results))]
+    procs += [
+        ctx.Process(target=_reader, args=(variant, workdir, user_id, i, ready, stop, results)) for i in range(readers)
+    ]
+    for p in procs:
+        p.start()
+    ready.wait()  # time only the steady state, not interpreter/app start-up
+    time.sleep(seconds)
+    stop.set()
+    collected = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+
+    latencies = sorted(ms for kind, values, _ in collected if kind == "read" for ms in values)
+    writes = sum(values for kind, values, _ in collected if kind == "write")
+    return {
+        "variant": variant,
+        "journal": journal,
+        "reads_per_sec": len(latencies) / seconds,
+        "p50": statistics.median(latencies) if latencies else float("nan"),
+        "p95": latencies[int(len(latencies) * 0.95)] if latencies else float("nan"),
+        "max": latencies[-1] if latencies else float("nan"),
+        "uploads_per_sec": writes / seconds,
+        "errors": sum(errors for _, _, errors in collected),
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed-rows", type=int, default=200_000)
+    parser.add_argument("--batch", type=int, default=5_000, help="Rows per upload.")
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = [
+            run(variant, Path(tmp), args.seed_rows, args.batch, args.readers, args.seconds)
+            for variant in ("default", "tuned")
+        ]
+
+    print(f"{'variant':<8} {'journal':<8} {'reads/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} "
+          f"{'uploads/s':>10} {'errors':>7}")
+    for r in results:
+        print(f"{r['variant']:<8} {r['journal']:<8} {r['reads_per_sec']:>8.1f} {r['p50']:>8.1f} {r['p95']:>8.1f} "
+              f"{r['max']:>8.1f} {r['uploads_per_sec']:>10.2f} {r['errors']:>7}")
+
+
+if __name__ == "__main__":
+    main()
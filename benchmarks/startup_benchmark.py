@@ -0,0 +1,72 @@
+"""
+Cold start of the web app, each sample in a fresh interpreter:
+
+  import      `from app import create_app`
+  create_app  app factory, including the schema step
+  first req   GET /auth/login on the test client
+  deferred    what the first upload pays on top: importing pandas, joblib
+              and sklearn (no longer loaded at startup)
+
+Variants: schema created at boot (AUTO_CREATE_SCHEMA, the default for
+development) vs. skipped (production, Alembic-managed databases). Run from
+the project root:
+> python -m benchmarks.startup_benchmark --repeat 10
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+_CHILD = """
+import json, sys, time
+t0 = time.perf_counter()
+from config import DevelopmentConfig, config
+config["bench"] = type("BenchmarkConfig", (DevelopmentConfig,), {{
+    "DEBUG": False, "SQLALCHEMY_DATABASE_URI": {url!r}, "AUTO_CREATE_SCHEMA": {create_schema!r},
+}})
+from app import create_app
+t1 = time.perf_counter()
+app = create_app("bench")
+t2 = time.perf_counter()
+app.test_client().get("/auth/login")
+t3 = time.perf_counter()
+import pandas, joblib, sklearn.pipeline
+t4 = time.perf_counter()
+print(json.dumps({{"import": t1 - t0, "create_app": t2 - t1, "first req": t3 - t2, "deferred": t4 - t3}}))
+"""
+
+
+def sample(url: str, create_schema: bool) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", _CHILD.format(url=url, create_schema=create_schema)],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    ).stdout
+    return {k: v * 1000 for k, v in json.loads(out.splitlines()[-1]).items()}
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    phases = ["import", "create_app", "first req", "deferred"]
+    print(f"{'variant':<16} " + " ".join(f"{p:>11}" for p in phases) + f" {'to 1st req':>11}   (median ms)")
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{Path(tmp) / 'bench.db'}"
+        sample(url, True)  # create the schema once, warm the OS file cache
+        for label, create_schema in (("create schema", True), ("skip schema", False)):
+            samples = [sample(url, create_schema) for _ in range(args.repeat)]
+            medians = {p: statistics.median(s[p] for s in samples) for p in phases}
+            total = medians["import"] + medians["create_app"] + medians["first req"]
+            print(f"{label:<16} " + " ".join(f"{medians[p]:>11.1f}" for p in phases) + f" {total:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
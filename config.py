@@ -7,6 +7,62 @@ class Config:
     FLASKY_ADMIN = os.environ.get('FLASKY_ADMIN')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     MAX_CONTENT_LENGTH = 25 * 1024 * 1024  # 25 MB
+    # Unix socket of the optional category inference worker
+    # (python -m app.ai_agent_models.inference_server); unset = predict in-process
+    CATEGORY_INFERENCE_SOCKET = os.environ.get('CATEGORY_INFERENCE_SOCKET')
+    # Predicted categories below this confidence are listed on /analytics/review
+    REVIEW_CONFIDENCE_THRESHOLD = 0.6
+    # Rows per keyset page of the /analytics/trend transaction table
+    TRANSACTIONS_PAGE_SIZE = 100
+    # Analytics cache backend: "lru" (per process), "filesystem" (shared by workers) or "null"
+    ANALYTICS_CACHE_TYPE = os.environ.get('ANALYTICS_CACHE_TYPE', 'lru')
+    ANALYTICS_CACHE_TTL = 300
+    ANALYTICS_CACHE_MAX_ENTRIES = 512
+    ANALYTICS_CACHE_DIR = os.environ.get('ANALYTICS_CACHE_DIR')  # default: <instance>/analytics_cache
+    # Trend aggregations: "sql" (daily_spend rollup), "duckdb" (Parquet copy, needs duckdb)
+    # or "memory" (per-process NumPy arrays, see app.analytics.inmemory)
+    ANALYTICS_BACKEND = os.environ.get('ANALYTICS_BACKEND', 'sql')
+    ANALYTICS_PARQUET_DIR = os.environ.get('ANALYTICS_PARQUET_DIR')  # default: <instance>/parquet
+    ANALYTICS_MEMORY_BUDGET_MB = int(os.environ.get('ANALYTICS_MEMORY_BUDGET_MB', 256))
+    # Applied to every SQLite connection (app/database.py)
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',        # readers are not blocked by an upload's commit
+        'synchronous': 'NORMAL',      # durable with WAL, fsync only at checkpoints
+        'cache_size': -64000,         # KiB, i.e. ~64 MB page cache per connection
+        'mmap_size': 256 * 1024 * 1024,
+        'busy_timeout': 5000,         # ms to wait for a lock before "database is locked"
+    }
+    # Separate read-only connection pool for the analytics views
+    ANALYTICS_READ_POOL = True
+    ANALYTICS_READ_POOL_SIZE = 5
+    ANALYTICS_READ_DATABASE_URI = os.environ.get('ANALYTICS_READ_DATABASE_URI')  # default: same database
+    # Per-request SQL profiling (app/query_profile.py): share of requests timed,
+    # budgets that get a profiled request logged, and the X-Query-Profile debug header
+    QUERY_PROFILE_SAMPLE_RATE = float(os.environ.get('QUERY_PROFILE_SAMPLE_RATE', 0.05))
+    QUERY_PROFILE_SLOWEST = 5
+    QUERY_PROFILE_EXPOSE = False
+    QUERY_BUDGET_COUNT = 50
+    QUERY_BUDGET_MS = 500
+    # Prometheus text at /metrics (app/metrics.py)
+    # With several worker processes, METRICS_DIR holds per-process snapshots, exited ones merged into retired.json (empty it on deploy)
+    METRICS_ENABLED = True
+    # /metrics answers 404 unless METRICS_TOKEN is set and sent as "Authorization: Bearer <token>",
+    # from one of METRICS_ALLOWED_ADDRS. A reverse proxy must block /metrics: it connects from 127.0.0.1
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    METRICS_ALLOWED_ADDRS = ('127.0.0.1', '::1')
+    METRICS_DIR = os.environ.get('METRICS_DIR')
+    METRICS_FLUSH_INTERVAL = 5  # seconds between a worker's snapshot writes
+    # Per-request sampling profiler (app/profiler.py), triggered by a token from /admin/profiles
+    PROFILER_ENABLED = os.environ.get('PROFILER_ENABLED', '0') == '1'
+    PROFILER_DIR = os.environ.get('PROFILER_DIR')  # default: <instance>/profiles
+    PROFILER_INTERVAL = 0.001  # seconds between stack samples
+    PROFILER_TOKEN_MAX_AGE = 600  # seconds a token stays valid
+    PROFILER_MIN_INTERVAL = 1.0  # seconds between profiled requests, per process
+    PROFILER_MAX_FILES = 200  # older profiles are deleted
+    # Part of the analytics ETags; default: a digest of the template/static file stamps
+    ASSET_VERSION = os.environ.get('ASSET_VERSION')
+    # create_all() at startup on a database that has no tables yet
+    AUTO_CREATE_SCHEMA = os.environ.get('AUTO_CREATE_SCHEMA', '1') != '0'
 
 
     @staticmethod
@@ -16,16 +72,34 @@ class Config:
 
 class DevelopmentConfig(Config):
     DEBUG = True
+    QUERY_PROFILE_SAMPLE_RATE = 1.0
+    QUERY_PROFILE_EXPOSE = True
     SQLALCHEMY_DATABASE_URI = "sqlite:///bi.db"
 
 
 class TestingConfig(Config):
     TESTING = True
-    SQLALCHEMY_DATABASE_URI = "sqlite:///bi_test.db"
+    SQLALCHEMY_DATABASE_URI = "sqlite://"
+    # Statement-counting tests listen on db.engine; tests/test_database.py covers the pool
+    ANALYTICS_READ_POOL = False
+
+
+class ProductionConfig(Config):
+    # PostgreSQL through psycopg 3 (pip install "psycopg[binary]"); uploads are
+    # written with COPY FROM STDIN (app/ingest/bulk.py)
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'postgresql+psycopg://localhost/bi'
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': 10,
+        'pool_pre_ping': True,    # drop connections the server closed while idle
+        'pool_recycle': 1800,
+    }
+    # Schema comes from `flask db upgrade`, not from every worker's start-up
+    AUTO_CREATE_SCHEMA = False
 
 
 config = {
     'development': DevelopmentConfig,
     'testing': TestingConfig,
+    'production': ProductionConfig,
     'default': DevelopmentConfig
 }
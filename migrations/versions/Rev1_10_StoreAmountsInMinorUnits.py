@@ -0,0 +1,57 @@
+"""Store money as integer öre (transactions, daily_spend, monthly_budgets)
+
+Revision ID: 20260405_amounts_minor_units
+Revises: 20260330_add_merchants
+Create Date: 2026-04-05
+
+transactions.amount (float) and monthly_budgets.amount (numeric) become
+BIGINT amount_minor columns; daily_spend is derived data, so its sum column
+is replaced and refilled from transactions.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20260405_amounts_minor_units"
+down_revision = "20260330_add_merchants"
+branch_labels = None
+depends_on = None
+
+_ROLLUP_BACKFILL = """
+    INSERT INTO daily_spend
+        (user_id, day, category_id, is_expense, is_financial_transaction, {total}, tx_count)
+    SELECT user_id, transaction_day, category_id, is_expense, is_financial_transaction, SUM({amount}), COUNT(*)
+    FROM transactions
+    WHERE transaction_day IS NOT NULL
+    GROUP BY user_id, transaction_day, category_id, is_expense, is_financial_transaction
+"""
+
+
+def _replace_column(table: str, old: str, new: str, new_type, fill: str) -> None:
+    with op.batch_alter_table(table) as batch_op:
+        batch_op.add_column(sa.Column(new, new_type, nullable=True))
+    op.execute(f"UPDATE {table} SET {new} = {fill}")
+    with op.batch_alter_table(table) as batch_op:
+        batch_op.alter_column(new, existing_type=new_type, nullable=False)
+        batch_op.drop_column(old)
+
+
+def upgrade() -> None:
+    for table in ("transactions", "monthly_budgets"):
+        _replace_column(table, "amount", "amount_minor", sa.BigInteger(), "CAST(ROUND(amount * 100) AS BIGINT)")
+
+    op.execute("DELETE FROM daily_spend")
+    with op.batch_alter_table("daily_spend") as batch_op:
+        batch_op.drop_column("amount_sum")
+        batch_op.add_column(sa.Column("amount_minor_sum", sa.BigInteger(), nullable=False, server_default="0"))
+    op.execute(_ROLLUP_BACKFILL.format(total="amount_minor_sum", amount="amount_minor"))
+
+
+def downgrade() -> None:
+    _replace_column("transactions", "amount_minor", "amount", sa.Float(), "amount_minor / 100.0")
+    _replace_column("monthly_budgets", "amount_minor", "amount", sa.Numeric(12, 2), "amount_minor / 100.0")
+
+    op.execute("DELETE FROM daily_spend")
+    with op.batch_alter_table("daily_spend") as batch_op:
+        batch_op.drop_column("amount_minor_sum")
+        batch_op.add_column(sa.Column("amount_sum", sa.Float(), nullable=False, server_default="0"))
+    op.execute(_ROLLUP_BACKFILL.format(total="amount_sum", amount="amount"))
@@ -0,0 +1,41 @@
+"""Cover the trend table's page columns in its index on PostgreSQL
+
+Revision ID: 20260412_postgres_covering_trend_index
+Revises: 20260405_amounts_minor_units
+Create Date: 2026-04-12
+
+transaction_page() reads category_id, merchant_id and amount_minor next to
+the keyset columns; INCLUDEing them in ix_transactions_user_day_nonfinancial
+lets PostgreSQL answer a page with an index-only scan. SQLite has no INCLUDE,
+so the revision does nothing there.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20260412_postgres_covering_trend_index"
+down_revision = "20260405_amounts_minor_units"
+branch_labels = None
+depends_on = None
+
+_INDEX = "ix_transactions_user_day_nonfinancial"
+
+
+def _recreate(include: list[str]) -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.drop_index(_INDEX, table_name="transactions")
+    op.create_index(
+        _INDEX,
+        "transactions",
+        ["user_id", "transaction_day", "id"],
+        postgresql_where=sa.text("is_financial_transaction IS false"),
+        postgresql_include=include,
+    )
+
+
+def upgrade() -> None:
+    _recreate(["category_id", "merchant_id", "amount_minor"])
+
+
+def downgrade() -> None:
+    _recreate([])
@@ -0,0 +1,45 @@
+"""Add category_confirmed to transactions
+
+Revision ID: 20260419_add_category_confirmed
+Revises: 20260412_postgres_covering_trend_index
+Create Date: 2026-04-19
+
+Categories a user accepted or corrected on the review page were marked by
+storing category_confidence = 1.0, which a model can also predict. The flag
+gets its own column; category_confidence keeps only model probabilities.
+Existing rows at 1.0 are taken as confirmed, since before this revision
+that is how recategorize treated them.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20260419_add_category_confirmed"
+down_revision = "20260412_postgres_covering_trend_index"
+branch_labels = None
+depends_on = None
+
+_transactions = sa.table(
+    "transactions",
+    sa.column("category_confidence", sa.Float()),
+    sa.column("category_confirmed", sa.Boolean()),
+)
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("transactions") as batch_op:
+        batch_op.add_column(sa.Column("category_confirmed", sa.Boolean(), nullable=False, server_default=sa.false()))
+    op.execute(
+        _transactions.update()
+        .where(_transactions.c.category_confidence >= 1.0)
+        .values(category_confirmed=True, category_confidence=None)
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        _transactions.update()
+        .where(_transactions.c.category_confirmed.is_(True))
+        .values(category_confidence=1.0)
+    )
+    with op.batch_alter_table("transactions") as batch_op:
+        batch_op.drop_column("category_confirmed")
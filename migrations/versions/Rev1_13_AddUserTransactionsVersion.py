@@ -0,0 +1,26 @@
+"""Add transactions_version to user
+
+Revision ID: 20260426_add_user_transactions_version
+Revises: 20260419_add_category_confirmed
+Create Date: 2026-04-26
+
+data_version is bumped by every analytics-visible write, budgets included;
+the columnar stores only need to follow transaction writes.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20260426_add_user_transactions_version"
+down_revision = "20260419_add_category_confirmed"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("user") as batch_op:
+        batch_op.add_column(sa.Column("transactions_version", sa.Integer(), nullable=False, server_default="0"))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("user") as batch_op:
+        batch_op.drop_column("transactions_version")
@@ -0,0 +1,29 @@
+"""Add category_confidence to transactions
+
+Revision ID: 20260301_add_category_confidence
+Revises: 20260213_add_is_financial_transaction
+Create Date: 2026-03-01
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20260301_add_category_confidence"
+down_revision = "20260213_add_is_financial_transaction"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing rows keep NULL (unknown confidence) and stay out of the review queue
+    with op.batch_alter_table("transactions") as batch_op:
+        batch_op.add_column(sa.Column("category_confidence", sa.Float(), nullable=True))
+        batch_op.create_index(
+            "ix_transactions_upload_confidence",
+            ["upload_id", "category_confidence"],
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("transactions") as batch_op:
+        batch_op.drop_index("ix_transactions_upload_confidence")
+        batch_op.drop_column("category_confidence")
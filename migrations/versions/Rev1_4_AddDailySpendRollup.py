@@ -0,0 +1,45 @@
+"""Add daily_spend rollup table
+
+Revision ID: 20260305_add_daily_spend
+Revises: 20260301_add_category_confidence
+Create Date: 2026-03-05
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20260305_add_daily_spend"
+down_revision = "20260301_add_category_confidence"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "daily_spend",
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("user.id"), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("category", sa.String(length=64), nullable=False),
+        sa.Column("is_expense", sa.Boolean(), nullable=False),
+        sa.Column("is_financial_transaction", sa.Boolean(), nullable=False),
+        sa.Column("amount_sum", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("tx_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.PrimaryKeyConstraint("user_id", "day", "category", "is_expense", "is_financial_transaction"),
+    )
+
+    # Backfill from existing transactions (same grouping as app.analytics.rollup.rebuild_rollup)
+    op.execute(
+        """
+        INSERT INTO daily_spend
+            (user_id, day, category, is_expense, is_financial_transaction, amount_sum, tx_count)
+        SELECT u.user_id, t.transaction_day, t.category, t.is_expense, t.is_financial_transaction,
+               SUM(t.amount), COUNT(*)
+        FROM transactions t
+        JOIN uploads u ON u.id = t.upload_id
+        WHERE t.transaction_day IS NOT NULL
+        GROUP BY u.user_id, t.transaction_day, t.category, t.is_expense, t.is_financial_transaction
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("daily_spend")
@@ -0,0 +1,23 @@
+"""Add data_version to user
+
+Revision ID: 20260310_add_user_data_version
+Revises: 20260305_add_daily_spend
+Create Date: 2026-03-10
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20260310_add_user_data_version"
+down_revision = "20260305_add_daily_spend"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("user") as batch_op:
+        batch_op.add_column(sa.Column("data_version", sa.Integer(), nullable=False, server_default="0"))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("user") as batch_op:
+        batch_op.drop_column("data_version")
@@ -0,0 +1,51 @@
+"""Denormalize user_id onto transactions
+
+Revision ID: 20260315_add_transactions_user_id
+Revises: 20260310_add_user_data_version
+Create Date: 2026-03-15
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20260315_add_transactions_user_id"
+down_revision = "20260310_add_user_data_version"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("transactions") as batch_op:
+        batch_op.add_column(sa.Column("user_id", sa.Integer(), nullable=True))
+
+    op.execute(
+        """
+        UPDATE transactions
+        SET user_id = (SELECT uploads.user_id FROM uploads WHERE uploads.id = transactions.upload_id)
+        """
+    )
+
+    with op.batch_alter_table("transactions") as batch_op:
+        batch_op.alter_column("user_id", existing_type=sa.Integer(), nullable=False)
+        batch_op.create_foreign_key("fk_transactions_user_id_user", "user", ["user_id"], ["id"])
+        batch_op.drop_index("ix_transactions_upload_confidence")
+        batch_op.create_index(
+            "ix_transactions_user_fin_expense_day",
+            ["user_id", "is_financial_transaction", "is_expense", "transaction_day"],
+        )
+        batch_op.create_index("ix_transactions_user_category_day", ["user_id", "category", "transaction_day"])
+        batch_op.create_index(
+            "ix_transactions_user_fin_day",
+            ["user_id", "is_financial_transaction", "transaction_day", "id"],
+        )
+        batch_op.create_index("ix_transactions_user_confidence", ["user_id", "category_confidence"])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("transactions") as batch_op:
+        batch_op.drop_index("ix_transactions_user_confidence")
+        batch_op.drop_index("ix_transactions_user_fin_day")
+        batch_op.drop_index("ix_transactions_user_category_day")
+        batch_op.drop_index("ix_transactions_user_fin_expense_day")
+        batch_op.create_index("ix_transactions_upload_confidence", ["upload_id", "category_confidence"])
+        batch_op.drop_constraint("fk_transactions_user_id_user", type_="foreignkey")
+        batch_op.drop_column("user_id")
@@ -0,0 +1,63 @@
+"""Replace single-column transaction indexes with query-shaped ones
+
+Revision ID: 20260320_transaction_index_audit
+Revises: 20260315_add_transactions_user_id
+Create Date: 2026-03-20
+
+No query filters on these columns alone; every per-user query is served by
+the composite indexes below, and each dropped index was paid for on every
+ingest insert (see benchmarks/ingest_write_benchmark.py).
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20260320_transaction_index_audit"
+down_revision = "20260315_add_transactions_user_id"
+branch_labels = None
+depends_on = None
+
+_SINGLE_COLUMN = [
+    "currency",
+    "booking_day",
+    "transaction_day",
+    "currency_day",
+    "place_purchase",
+    "is_expense",
+    "category",
+    "is_financial_transaction",
+]
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("transactions") as batch_op:
+        for column in _SINGLE_COLUMN:
+            batch_op.drop_index(f"ix_transactions_{column}")
+        batch_op.drop_index("ix_transactions_user_fin_expense_day")
+        batch_op.drop_index("ix_transactions_user_fin_day")
+        batch_op.create_index("ix_transactions_user_place", ["user_id", "place_purchase"])
+
+    # Partial: the trend table never shows financial transactions
+    op.create_index(
+        "ix_transactions_user_day_nonfinancial",
+        "transactions",
+        ["user_id", "transaction_day", "id"],
+        sqlite_where=sa.text("is_financial_transaction IS 0"),
+        postgresql_where=sa.text("is_financial_transaction IS false"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_transactions_user_day_nonfinancial", table_name="transactions")
+
+    with op.batch_alter_table("transactions") as batch_op:
+        batch_op.drop_index("ix_transactions_user_place")
+        batch_op.create_index(
+            "ix_transactions_user_fin_day",
+            ["user_id", "is_financial_transaction", "transaction_day", "id"],
+        )
+        batch_op.create_index(
+            "ix_transactions_user_fin_expense_day",
+            ["user_id", "is_financial_transaction", "is_expense", "transaction_day"],
+        )
+        for column in _SINGLE_COLUMN:
+            batch_op.create_index(f"ix_transactions_{column}", [column])
@@ -0,0 +1,139 @@
+"""Replace transactions.category strings with a categories lookup table
+
+Revision ID: 20260325_add_categories
+Revises: 20260320_transaction_index_audit
+Create Date: 2026-03-25
+
+The table is seeded with the category strings found in transactions plus
+every model label (a frozen copy of TARGET_LABELS; labels added later are
+interned on first use). daily_spend is derived data, so it is recreated
+keyed by category_id and refilled from transactions.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20260325_add_categories"
+down_revision = "20260320_transaction_index_audit"
+branch_labels = None
+depends_on = None
+
+_SEED_LABELS = (
+    "Dagligvaror",
+    "Restaurang",
+    "Fika & Kafé",
+    "Godis & Snacks",
+    "Alkohol",
+    "Boende: Hyra & avgifter",
+    "Hem & inredning",
+    "Bygg & verktyg",
+    "Lokaltrafik",
+    "Taxi & samåkning",
+    "Bil: bränsle & laddning",
+    "Bil: parkering & vägavgifter",
+    "Resor: transport & boende",
+    "Resor: mat & nöjen på resa",
+    "Apotek & medicin",
+    "Vård & tandvård",
+    "Kroppsvård & hygien",
+    "Optik",
+    "Kläder & skor",
+    "Elektronik",
+    "Övriga prylar",
+    "Nöjen & kultur",
+    "Sport & träning",
+    "Sportutrustning",
+    "Hobby & skapande",
+    "Böcker & media",
+    "Barn",
+    "Husdjur",
+    "Finans & avgifter",
+    "Övrigt/Okänt",
+)
+
+_ROLLUP_BACKFILL = """
+    INSERT INTO daily_spend
+        (user_id, day, {category}, is_expense, is_financial_transaction, amount_sum, tx_count)
+    SELECT user_id, transaction_day, {category}, is_expense, is_financial_transaction, SUM(amount), COUNT(*)
+    FROM transactions
+    WHERE transaction_day IS NOT NULL
+    GROUP BY user_id, transaction_day, {category}, is_expense, is_financial_transaction
+"""
+
+
+def _create_daily_spend(category_column: sa.Column) -> None:
+    op.create_table(
+        "daily_spend",
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("user.id"), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        category_column,
+        sa.Column("is_expense", sa.Boolean(), nullable=False),
+        sa.Column("is_financial_transaction", sa.Boolean(), nullable=False),
+        sa.Column("amount_sum", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("tx_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.PrimaryKeyConstraint("user_id", "day", category_column.name, "is_expense", "is_financial_transaction"),
+    )
+
+
+def upgrade() -> None:
+    categories = op.create_table(
+        "categories",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(length=64), nullable=False, unique=True),
+        sa.Column("normalized_name", sa.String(length=64), nullable=False),
+    )
+    op.create_index("ix_categories_normalized_name", "categories", ["normalized_name"])
+
+    # Normalized in Python: SQLite's lower() only folds ASCII (Övrigt, Nöjen, ...)
+    names = op.get_bind().execute(sa.text("SELECT DISTINCT category FROM transactions")).scalars().all()
+    names = sorted({name for name in names if name} | {"Uncategorized", *_SEED_LABELS})
+    op.bulk_insert(categories, [{"name": n, "normalized_name": n.strip().lower()} for n in names])
+
+    with op.batch_alter_table("transactions") as batch_op:
+        batch_op.add_column(sa.Column("category_id", sa.Integer(), nullable=True))
+
+    op.execute(
+        """
+        UPDATE transactions
+        SET category_id = (
+            SELECT categories.id FROM categories
+            WHERE categories.name = COALESCE(NULLIF(transactions.category, ''), 'Uncategorized')
+        )
+        """
+    )
+
+    with op.batch_alter_table("transactions") as batch_op:
+        batch_op.alter_column("category_id", existing_type=sa.Integer(), nullable=False)
+        batch_op.create_foreign_key("fk_transactions_category_id_categories", "categories", ["category_id"], ["id"])
+        batch_op.drop_index("ix_transactions_user_category_day")
+        batch_op.create_index("ix_transactions_user_category_day", ["user_id", "category_id", "transaction_day"])
+        batch_op.drop_column("category")
+
+    op.drop_table("daily_spend")
+    _create_daily_spend(sa.Column("category_id", sa.Integer(), sa.ForeignKey("categories.id"), nullable=False))
+    op.execute(_ROLLUP_BACKFILL.format(category="category_id"))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("transactions") as batch_op:
+        batch_op.add_column(sa.Column("category", sa.String(length=64), nullable=True))
+
+    op.execute(
+        """
+        UPDATE transactions
+        SET category = (SELECT categories.name FROM categories WHERE categories.id = transactions.category_id)
+        """
+    )
+
+    with op.batch_alter_table("transactions") as batch_op:
+        batch_op.alter_column("category", existing_type=sa.String(length=64), nullable=False)
+        batch_op.drop_index("ix_transactions_user_category_day")
+        batch_op.create_index("ix_transactions_user_category_day", ["user_id", "category", "transaction_day"])
+        batch_op.drop_constraint("fk_transactions_category_id_categories", type_="foreignkey")
+        batch_op.drop_column("category_id")
+
+    op.drop_table("daily_spend")
+    _create_daily_spend(sa.Column("category", sa.String(length=64), nullable=False))
+    op.execute(_ROLLUP_BACKFILL.format(category="category"))
+
+    op.drop_index("ix_categories_normalized_name", table_name="categories")
+    op.drop_table("categories")
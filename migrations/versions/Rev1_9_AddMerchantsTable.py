@@ -0,0 +1,72 @@
+"""Replace transactions.place_purchase strings with a merchants table
+
+Revision ID: 20260330_add_merchants
+Revises: 20260325_add_categories
+Create Date: 2026-03-30
+
+Every distinct raw place string becomes one merchants row; canonical_id is
+left empty for later merging of spelling variants. Transactions without a
+place keep a NULL merchant_id.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20260330_add_merchants"
+down_revision = "20260325_add_categories"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    merchants = op.create_table(
+        "merchants",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(length=256), nullable=False, unique=True),
+        sa.Column("normalized_name", sa.String(length=256), nullable=False),
+        sa.Column("canonical_id", sa.Integer(), sa.ForeignKey("merchants.id"), nullable=True),
+    )
+    op.create_index("ix_merchants_normalized_name", "merchants", ["normalized_name"])
+
+    # Normalized in Python, same rule as models.normalize_merchant
+    names = op.get_bind().execute(sa.text("SELECT DISTINCT place_purchase FROM transactions")).scalars().all()
+    names = sorted({name.strip() for name in names if name and name.strip()})
+    op.bulk_insert(merchants, [{"name": n, "normalized_name": " ".join(n.split()).lower()} for n in names])
+
+    with op.batch_alter_table("transactions") as batch_op:
+        batch_op.add_column(sa.Column("merchant_id", sa.Integer(), nullable=True))
+
+    op.execute(
+        """
+        UPDATE transactions
+        SET merchant_id = (
+            SELECT merchants.id FROM merchants WHERE merchants.name = TRIM(transactions.place_purchase)
+        )
+        """
+    )
+
+    with op.batch_alter_table("transactions") as batch_op:
+        batch_op.create_foreign_key("fk_transactions_merchant_id_merchants", "merchants", ["merchant_id"], ["id"])
+        batch_op.drop_index("ix_transactions_user_place")
+        batch_op.create_index("ix_transactions_user_merchant", ["user_id", "merchant_id"])
+        batch_op.drop_column("place_purchase")
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("transactions") as batch_op:
+        batch_op.add_column(sa.Column("place_purchase", sa.String(length=256), nullable=True))
+
+    op.execute(
+        """
+        UPDATE transactions
+        SET place_purchase = (SELECT merchants.name FROM merchants WHERE merchants.id = transactions.merchant_id)
+        """
+    )
+
+    with op.batch_alter_table("transactions") as batch_op:
+        batch_op.drop_index("ix_transactions_user_merchant")
+        batch_op.create_index("ix_transactions_user_place", ["user_id", "place_purchase"])
+        batch_op.drop_constraint("fk_transactions_merchant_id_merchants", type_="foreignkey")
+        batch_op.drop_column("merchant_id")
+
+    op.drop_index("ix_merchants_normalized_name", table_name="merchants")
+    op.drop_table("merchants")
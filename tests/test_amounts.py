@@ -0,0 +1,28 @@
+import unittest
+from decimal import Decimal
+
+import pandas as pd
+
+from app.ingest.services import parse_amounts_minor
+from app.models import from_minor, to_minor
+
+
+class MinorUnitAmountsTestCase(unittest.TestCase):
+    def test_parses_swedish_formats_to_ore(self):
+        parsed = parse_amounts_minor(pd.Series(["1 234,56", "1234.5", "-99,00", " 12", "0,125", "-0,125", ""]))
+        self.assertEqual(parsed.tolist()[:6], [123456, 123450, -9900, 1200, 13, -13])
+        self.assertTrue(pd.isna(parsed.iloc[6]))
+
+    def test_rejects_malformed_numbers(self):
+        with self.assertRaises(ValueError):
+            parse_amounts_minor(pd.Series(["12", "1,2,3"]))
+
+    def test_round_trip(self):
+        self.assertEqual(to_minor(Decimal("2500.005")), 250001)
+        self.assertEqual(to_minor("0.1"), 10)
+        self.assertEqual(to_minor(0.1) + to_minor(0.2), to_minor("0.3"))
+        self.assertEqual(from_minor(-1999), -19.99)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import tempfile
+import time
+import unittest
+from datetime import date
+
+from sqlalchemy import event
+
+from app import create_app, db
+from app.analytics.cache import FileSystemCache, LRUCache
+from app.analytics.rollup import rebuild_rollup
+from app.models import Transaction, Upload, User, category_id
+
+
+class CacheBackendTestCase(unittest.TestCase):
+    def test_lru_evicts_least_recently_used(self):
+        cache = LRUCache(max_entries=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertEqual((cache.get("a"), cache.get("b"), cache.get("c")), (1, None, 3))
+
+    def test_lru_ttl(self):
+        cache = LRUCache(ttl=0.01)
+        cache.set("a", 1)
+        time.sleep(0.02)
+        self.assertIsNone(cache.get("a"))
+
+    def test_filesystem_shared_between_instances(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            FileSystemCache(tmp, ttl=60).set("k", {"rows": [1, 2]})
+            self.assertEqual(FileSystemCache(tmp, ttl=60).get("k"), {"rows": [1, 2]})
+            self.assertIsNone(FileSystemCache(tmp, ttl=60).get("other"))
+
+
+class TrendCachingTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+
+        self.client.post("/auth/register", data={"email": "me@example.com", "password": "pw"})
+        me = db.session.execute(db.select(User).where(User.email == "me@example.com")).scalar_one()
+        upload = Upload(original_filename="x.csv", user_id=me.id, row_count=1)
+        db.session.add(upload)
+        db.session.flush()
+        db.session.add(Transaction(transaction_day=date(2026, 1, 1), amount_minor=-1000, category_id=category_id("Dagligvaror"),
+                                   upload_id=upload.id, user_id=me.id))
+        rebuild_rollup()
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _count_statements(self, fn):
+        statements = []
+
+        def _record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", _record)
+        try:
+            result = fn()
+        finally:
+            event.remove(db.engine, "before_cursor_execute", _record)
+        return result, len(statements)
+
+    def test_repeat_view_is_served_from_cache(self):
+        first, cold = self._count_statements(lambda: self.client.get("/analytics/trend"))
+        second, warm = self._count_statements(lambda: self.client.get("/analytics/trend"))
+        self.assertEqual(first.get_data(), second.get_data())
+        self.assertLess(warm, cold)
+        self.assertLessEqual(warm, 1)  # at most loading the user
+
+    def test_etag_304_until_budget_changes(self):
+        etag = self.client.get("/analytics/trend").headers["ETag"]
+        resp = self.client.get("/analytics/trend", headers={"If-None-Match": etag})
+        self.assertEqual(resp.status_code, 304)
+
+        self.client.post("/admin/budget", data={"month": "2026-01", "amount": "1000"})
+        self.client.get("/admin/budget")  # consume the flash message
+        resp = self.client.get("/analytics/trend", headers={"If-None-Match": etag})
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotEqual(resp.headers["ETag"], etag)
+
+    def test_etag_changes_with_the_asset_version(self):
+        etag = self.client.get("/analytics/trend").headers["ETag"]
+        self.app.config["ASSET_VERSION"] = "next-deploy"
+        resp = self.client.get("/analytics/trend", headers={"If-None-Match": etag})
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotEqual(resp.headers["ETag"], etag)
+
+
+if __name__ == "__main__":
+    unittest.main()
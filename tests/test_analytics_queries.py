@@ -0,0 +1,99 @@
+import unittest
+from datetime import date
+
+from sqlalchemy import event
+
+from app import create_app, db
+from app.analytics.queries import summarize_spending
+from app.analytics.rollup import rebuild_rollup
+from app.models import Transaction, Upload, User, category_id
+
+
+class CountQueries:
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._record)
+
+
+class SummarizeSpendingTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.user = User(email="me@example.com")
+        self.user.set_password("pw")
+        db.session.add(self.user)
+        db.session.flush()
+        upload = Upload(original_filename="x.csv", user_id=self.user.id, row_count=6)
+        db.session.add(upload)
+        db.session.flush()
+        rows = [
+            (date(2026, 1, 1), "Dagligvaror", -10010, False),
+            (date(2026, 1, 1), "Restaurang", -5020, False),
+            (date(2026, 1, 2), "Dagligvaror", -3000, False),
+            (date(2026, 1, 3), "Restaurang", -20000, False),
+            (date(2026, 1, 3), "Lön", 2500000, False),
+            (date(2026, 1, 3), "Överföring", -500000, True),
+        ]
+        for day, category, amount, is_financial in rows:
+            db.session.add(Transaction(
+                transaction_day=day, amount_minor=amount, is_expense=amount < 0,
+                category_id=category_id(category), is_financial_transaction=is_financial,
+                upload_id=upload.id, user_id=self.user.id,
+            ))
+        rebuild_rollup()
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_single_statement(self):
+        user_id = self.user.id
+        with CountQueries(db.engine) as counter:
+            summarize_spending(user_id)
+        self.assertEqual(len(counter.statements), 1)
+
+    def test_totals(self):
+        summary = summarize_spending(self.user.id)
+        self.assertEqual(summary.categories, ["Dagligvaror", "Lön", "Restaurang"])
+        self.assertEqual(summary.per_day, [
+            (date(2026, 1, 1), 15030), (date(2026, 1, 2), 3000), (date(2026, 1, 3), 20000),
+        ])
+        self.assertEqual(summary.category_totals, [("Restaurang", 25020), ("Dagligvaror", 13010)])
+        self.assertEqual(summary.total, 38030)
+        self.assertEqual(summary.top_category, "Restaurang")
+
+    def test_filters(self):
+        summary = summarize_spending(self.user.id, date(2026, 1, 2), date(2026, 1, 3), "Dagligvaror")
+        # The dropdown and breakdown ignore the selected category
+        self.assertEqual(summary.categories, ["Dagligvaror", "Lön", "Restaurang"])
+        self.assertEqual(summary.category_totals, [("Restaurang", 20000), ("Dagligvaror", 3000)])
+        self.assertEqual(summary.per_day, [(date(2026, 1, 2), 3000)])
+        self.assertEqual(summary.total, 3000)
+
+    def test_trend_page_round_trips(self):
+        client = self.app.test_client()
+        client.post("/auth/login", data={"email": "me@example.com", "password": "pw"})
+        with CountQueries(db.engine) as counter:
+            resp = client.get("/analytics/trend")
+        self.assertEqual(resp.status_code, 200)
+        # user load, monthly budget, spend summary, transaction list
+        self.assertLessEqual(len(counter.statements), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+import io
+import tempfile
+import unittest
+from datetime import date
+from unittest import mock
+
+import pandas as pd
+
+from app import create_app, db
+from app.analytics import columnar
+from app.analytics.columnar import init_columnar_store
+from app.analytics.queries import summarize_spending
+from app.models import Upload, User, merchant_id
+
+try:
+    import duckdb  # noqa: F401
+except ImportError:
+    duckdb = None
+
+PARSED = pd.DataFrame({
+    "transactionday": [date(2026, 1, 1), date(2026, 1, 1), date(2026, 1, 2), date(2026, 1, 3)],
+    "currency": ["SEK"] * 4,
+    "reference": ["ICA", "Bistro", "ICA", "Lön"],
+    "description": ["x"] * 4,
+    "amount": [-100.0, -50.25, -30.0, 25000.0],
+    "amount_minor": [-10000, -5025, -3000, 2500000],
+    "is_expense": [True, True, True, False],
+    "category": ["Dagligvaror", "Restaurang", "Dagligvaror", "Lön"],
+    "is_financial_transaction": [False, False, False, True],
+    "category_confidence": [0.3] * 4,
+})
+
+
+@unittest.skipIf(duckdb is None, "duckdb is not installed")
+class ParquetStoreTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.app = create_app('testing')
+        self.app.config.update(ANALYTICS_BACKEND="duckdb", ANALYTICS_PARQUET_DIR=self.tmp.name)
+        init_columnar_store(self.app)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+        self.client.post("/auth/register", data={"email": "me@example.com", "password": "pw"})
+        self.user_id = db.session.execute(db.select(User.id)).scalar_one()
+        self.store = self.app.extensions["columnar_store"]
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        self.tmp.cleanup()
+
+    def _upload(self):
+        with mock.patch("app.ingest.ingest_routes.parse_csv_to_dataframe", return_value=PARSED.copy()):
+            self.client.post(
+                "/upload",
+                data={"file": (io.BytesIO(b"unused"), "bank.csv")},
+                content_type="multipart/form-data",
+            )
+        db.session.expire_all()
+
+    def _sql_summary(self, *args):
+        self.app.extensions["columnar_store"] = None
+        try:
+            return summarize_spending(self.user_id, *args)
+        finally:
+            self.app.extensions["columnar_store"] = self.store
+
+    def test_matches_sql_backend(self):
+        self._upload()
+        self._upload()
+        for args in [(), (date(2026, 1, 2), None, "Dagligvaror"), (None, None, "Okänd")]:
+            self.assertEqual(summarize_spending(self.user_id, *args), self._sql_summary(*args))
+        self.assertEqual(summarize_spending(self.user_id).total, 2 * 18025)
+
+    def test_uploads_and_deletes_maintain_files(self):
+        self._upload()
+        summarize_spending(self.user_id)  # first read exports the partition
+        self._upload()
+        self.assertEqual(len(self.store.files(self.user_id)), 2)
+        self.assertEqual(self.store.version(self.user_id), db.session.get(User, self.user_id).transactions_version)
+
+        upload_id = db.session.execute(db.select(Upload.id).order_by(Upload.id)).scalars().first()
+        self.client.post(f"/uploads/{upload_id}/delete")
+        db.session.expire_all()
+        self.assertEqual(len(self.store.files(self.user_id)), 1)
+        self.assertEqual(summarize_spending(self.user_id).total, 18025)
+
+    def test_review_correction_triggers_reexport(self):
+        self._upload()
+        summarize_spending(self.user_id)
+        self.client.post("/analytics/review", data={"merchant_id": merchant_id("ICA"), "category": "Restaurang"})
+        db.session.expire_all()
+        summary = summarize_spending(self.user_id)
+        self.assertEqual(summary.category_totals, [("Restaurang", 18025)])
+        self.assertEqual(summary, self._sql_summary())
+
+
+    def test_budget_save_keeps_partition_current(self):
+        self._upload()
+        summarize_spending(self.user_id)
+        version = self.store.version(self.user_id)
+        self.client.post("/admin/budget", data={"month": "2026-01", "amount": "2500"})
+        db.session.expire_all()
+        with mock.patch.object(self.store, "rebuild_user") as rebuild:
+            summarize_spending(self.user_id)
+        rebuild.assert_not_called()
+        self.assertEqual(self.store.version(self.user_id), version)
+
+    def test_versions_are_immutable_and_pruned(self):
+        self._upload()
+        summarize_spending(self.user_id)
+        first = self.store.files(self.user_id)
+        self._upload()
+        self._upload()
+        self.assertEqual(len(self.store.files(self.user_id)), 3)
+        self.assertFalse(first[0].exists())  # two versions later, pruned
+
+        versions = sorted(p.name for p in self.store.user_dir(self.user_id).glob("v*"))
+        self.assertEqual(len(versions), 2)
+        previous = self.store.user_dir(self.user_id) / versions[0]
+        self.assertEqual(len(list(previous.glob("*.parquet"))), 2)  # untouched by the newer upload
+
+    @unittest.skipIf(columnar.fcntl is None, "requires flock")
+    def test_stale_read_during_rebuild_answers_from_sql(self):
+        self._upload()
+        summarize_spending(self.user_id)
+        self.client.post("/analytics/review", data={"merchant_id": merchant_id("ICA"), "category": "Restaurang"})
+        db.session.expire_all()
+        stale = self.store.version(self.user_id)
+
+        # flock() locks belong to the open file, so this contends like another process
+        with self.store._locked(self.user_id):
+            self.assertIsNone(self.store.summarize(self.user_id, None, None, ""))
+            self.assertEqual(summarize_spending(self.user_id), self._sql_summary())
+        self.assertEqual(self.store.version(self.user_id), stale)
+
+        self.assertEqual(summarize_spending(self.user_id), self._sql_summary())
+        self.assertNotEqual(self.store.version(self.user_id), stale)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+
+from app import create_app, db
+from app.database import READ_ENGINE
+from config import TestingConfig
+
+
+class EngineTuningTestCase(unittest.TestCase):
+    def setUp(self):
+        # WAL and a second read-only pool need a database file
+        self.tmp = tempfile.TemporaryDirectory()
+        uri = "sqlite:///" + os.path.join(self.tmp.name, "bi_test.db")
+        with mock.patch.multiple(TestingConfig, ANALYTICS_READ_POOL=True, SQLALCHEMY_DATABASE_URI=uri):
+            self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+        self.client.post("/auth/register", data={"email": "me@example.com", "password": "pw"})
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app.extensions[READ_ENGINE].dispose()
+        db.engine.dispose()
+        self.app_context.pop()
+        self.tmp.cleanup()
+
+    def test_pragmas_applied_on_connect(self):
+        with db.engine.connect() as conn:
+            self.assertEqual(conn.exec_driver_sql("PRAGMA journal_mode").scalar(), "wal")
+            self.assertEqual(conn.exec_driver_sql("PRAGMA synchronous").scalar(), 1)  # NORMAL
+            self.assertEqual(conn.exec_driver_sql("PRAGMA busy_timeout").scalar(), 5000)
+            self.assertEqual(conn.exec_driver_sql("PRAGMA cache_size").scalar(), -64000)
+
+    def test_read_pool_is_read_only(self):
+        with self.app.extensions[READ_ENGINE].connect() as conn:
+            self.assertEqual(conn.exec_driver_sql("PRAGMA query_only").scalar(), 1)
+            with self.assertRaises(OperationalError):
+                conn.exec_driver_sql("DELETE FROM user")
+
+    def test_analytics_views_use_read_pool(self):
+        executed = {"primary": 0, "read": 0}
+
+        def _counter(name):
+            def _record(*args):
+                executed[name] += 1
+            return _record
+
+        listeners = [(db.engine, _counter("primary")), (self.app.extensions[READ_ENGINE], _counter("read"))]
+        for engine, fn in listeners:
+            event.listen(engine, "before_cursor_execute", fn)
+        try:
+            resp = self.client.get("/analytics/api/trend")
+        finally:
+            for engine, fn in listeners:
+                event.remove(engine, "before_cursor_execute", fn)
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(executed["primary"], 0)
+        self.assertGreater(executed["read"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
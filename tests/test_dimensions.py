@@ -0,0 +1,96 @@
+import io
+import unittest
+from datetime import date
+from unittest import mock
+
+import pandas as pd
+from sqlalchemy import event
+
+from app import create_app, db
+from app.models import Category, Merchant, Transaction, category_ids, merchant_ids
+
+PARSED = pd.DataFrame({
+    "transactionday": [date(2026, 1, 1)] * 4,
+    "currency": ["SEK"] * 4,
+    "reference": ["ICA  Nära", "ICA  Nära", "SL", ""],
+    "description": ["x"] * 4,
+    "amount": [-100.0, -50.0, -40.0, -1.0],
+    "amount_minor": [-10000, -5000, -4000, -100],
+    "is_expense": [True] * 4,
+    "category": ["Dagligvaror", "Dagligvaror", "Lokaltrafik", "Ny kategori"],
+    "is_financial_transaction": [False] * 4,
+    "category_confidence": [0.9] * 4,
+})
+
+
+class DimensionTablesTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+        self.client.post("/auth/register", data={"email": "me@example.com", "password": "pw"})
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _upload(self):
+        with mock.patch("app.ingest.ingest_routes.parse_csv_to_dataframe", return_value=PARSED.copy()):
+            self.client.post(
+                "/upload",
+                data={"file": (io.BytesIO(b"unused"), "bank.csv")},
+                content_type="multipart/form-data",
+            )
+
+    def test_ids_are_stable_and_normalized(self):
+        first = merchant_ids(["ICA  Nära", "SL"])
+        self.assertEqual(merchant_ids(["SL", "ICA  Nära"]), first)
+        self.assertEqual(db.session.get(Merchant, first["ICA  Nära"]).normalized_name, "ica nära")
+        self.assertEqual(db.session.get(Category, category_ids([" Övrigt "])[" Övrigt "]).normalized_name, "övrigt")
+
+    def test_upload_interns_merchants_and_categories(self):
+        self._upload()
+        self._upload()
+
+        merchants = db.session.execute(db.select(Merchant.name)).scalars().all()
+        self.assertEqual(sorted(merchants), ["ICA  Nära", "SL"])
+        self.assertIn("Ny kategori", db.session.execute(db.select(Category.name)).scalars().all())
+
+        rows = db.session.execute(
+            db.select(Transaction.merchant_id, db.func.count()).group_by(Transaction.merchant_id)
+        ).all()
+        self.assertEqual(sorted(n for _, n in rows), [2, 2, 4])  # blank reference -> NULL merchant
+
+    def test_missing_text_becomes_null_not_nan(self):
+        parsed = PARSED.copy()
+        parsed.loc[3, ["reference", "category", "description"]] = [None, None, "  "]
+        with mock.patch("app.ingest.ingest_routes.parse_csv_to_dataframe", return_value=parsed):
+            self.client.post(
+                "/upload",
+                data={"file": (io.BytesIO(b"unused"), "bank.csv")},
+                content_type="multipart/form-data",
+            )
+
+        self.assertEqual(sorted(db.session.execute(db.select(Merchant.name)).scalars()), ["ICA  Nära", "SL"])
+        last = db.session.execute(db.select(Transaction).order_by(Transaction.id.desc())).scalars().first()
+        self.assertIsNone(last.merchant_id)
+        self.assertIsNone(last.description)
+        self.assertEqual(last.category.name, "Uncategorized")
+
+    def test_known_names_resolve_with_one_select(self):
+        merchant_ids(["ICA  Nära", "SL"])
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db.engine, "before_cursor_execute", listener)
+        try:
+            merchant_ids(["SL", "ICA  Nära", "SL"])
+        finally:
+            event.remove(db.engine, "before_cursor_execute", listener)
+        self.assertEqual(len(statements), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
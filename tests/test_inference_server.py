@@ -0,0 +1,108 @@
+import json
+import os
+import socket
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+import joblib
+
+from app.ai_agent_models.inference_server import (
+    InferenceClient,
+    InferenceServer,
+    InferenceUnavailable,
+    MicroBatcher,
+)
+from app.ai_agent_models.model_benchmark import promote
+
+
+class UpperModel:
+    def __init__(self):
+        self.batch_sizes = []
+
+    def predict(self, texts):
+        self.batch_sizes.append(len(texts))
+        return [t.upper() for t in texts]
+
+
+@unittest.skipUnless(hasattr(socket, "AF_UNIX"), "requires Unix sockets")
+class InferenceServerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self.tmp.name, "inference.sock")
+        self.model = UpperModel()
+        self.server = InferenceServer(self.socket_path, MicroBatcher(self.model, window_ms=50))
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def test_concurrent_requests_are_batched(self):
+        client = InferenceClient(self.socket_path)
+        results = {}
+
+        def call(i):
+            results[i] = client.predict([f"a{i}", f"b{i}"])
+
+        threads = [threading.Thread(target=call, args=(i,)) for i in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        for i in range(4):
+            self.assertEqual(results[i], ([f"A{i}", f"B{i}"], [None, None]))
+        self.assertLess(len(self.model.batch_sizes), 4)
+        self.assertEqual(sum(self.model.batch_sizes), 8)
+
+    def test_unreachable_worker_raises_unavailable(self):
+        client = InferenceClient(os.path.join(self.tmp.name, "missing.sock"))
+        with self.assertRaises(InferenceUnavailable):
+            client.predict(["x"])
+
+
+@unittest.skipUnless(hasattr(socket, "AF_UNIX"), "requires Unix sockets")
+class ModelReloadTestCase(unittest.TestCase):
+    TEXTS = ["ICA | mjölk", "Coop | bröd", "Willys | ost", "SL | kort", "SJ | biljett", "SL | reskassa"]
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        self.model_path = self.dir / "category_model.joblib"
+        self.socket_path = str(self.dir / "inference.sock")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _promote(self, transit_label):
+        data_path = self.dir / "training.jsonl"
+        labels = ["Dagligvaror"] * 3 + [transit_label] * 3
+        data_path.write_text(
+            "".join(json.dumps({"text": t, "label": l}) + "\n" for t, l in zip(self.TEXTS, labels)), encoding="utf-8"
+        )
+        promote({"variant": "hashed_sgd"}, {"dataset_sha256": transit_label},
+                data_path=data_path, model_path=self.model_path)
+
+    def test_promoted_model_is_served_without_restart(self):
+        self._promote("Lokaltrafik")
+        batcher = MicroBatcher(joblib.load(self.model_path), model_path=self.model_path, window_ms=1)
+        server = InferenceServer(self.socket_path, batcher)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            client = InferenceClient(self.socket_path)
+            self.assertEqual(client.predict(["SL | kort"])[0], ["Lokaltrafik"])
+
+            self._promote("Resor")
+            self.assertEqual(client.predict(["SL | kort"])[0], ["Resor"])
+            self.assertEqual(batcher.reloads, 1)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    unittest.main()
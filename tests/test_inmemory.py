@@ -0,0 +1,111 @@
+import random
+import unittest
+from datetime import date, timedelta
+
+import numpy as np
+
+from app import create_app, db
+from app.analytics.inmemory import MemoryStore, UserColumns, load_user_columns, summarize_columns
+from app.analytics.queries import summarize_spending
+from app.analytics.rollup import rebuild_rollup
+from app.models import Transaction, Upload, User, bump_data_version, category_id
+
+CATEGORIES = ["Dagligvaror", "Restaurang", "Nöjen", "Övrigt", "Lön"]
+
+
+class MemoryStoreTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.users = []
+        for email in ("a@example.com", "b@example.com"):
+            user = User(email=email)
+            user.set_password("pw")
+            db.session.add(user)
+            db.session.flush()
+            self.users.append(user.id)
+            self._add_rows(user.id, seed=user.id, n=300)
+        rebuild_rollup()
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _add_rows(self, user_id, seed, n):
+        rnd = random.Random(seed)
+        upload = Upload(original_filename="x.csv", user_id=user_id, row_count=n)
+        db.session.add(upload)
+        db.session.flush()
+        for _ in range(n):
+            amount = rnd.randint(-50_000, 20_000)
+            db.session.add(Transaction(
+                transaction_day=date(2026, 1, 1) + timedelta(days=rnd.randrange(60)),
+                amount_minor=amount, is_expense=amount < 0,
+                is_financial_transaction=rnd.random() < 0.1,
+                category_id=category_id(rnd.choice(CATEGORIES)),
+                upload_id=upload.id, user_id=user_id,
+            ))
+
+    def test_matches_sql_summary(self):
+        store = MemoryStore(max_bytes=1 << 20)
+        filters = [
+            (None, None, ""),
+            (date(2026, 1, 10), date(2026, 2, 5), ""),
+            (None, date(2026, 1, 20), "Restaurang"),
+            (date(2026, 2, 1), None, "Okänd"),
+            (date(2027, 1, 1), None, ""),
+        ]
+        for user_id in self.users:
+            for args in filters:
+                self.assertEqual(store.summarize(user_id, *args), summarize_spending(user_id, *args))
+
+    def test_memory_budget_evicts_least_recently_used(self):
+        one_user = load_user_columns(self.users[0]).nbytes
+        store = MemoryStore(max_bytes=one_user + 16)
+        store.summarize(self.users[0], None, None, "")
+        store.summarize(self.users[1], None, None, "")
+        self.assertEqual(list(store._entries), [self.users[1]])
+        self.assertLessEqual(store.nbytes, store.max_bytes)
+
+    def test_new_transactions_version_reloads(self):
+        self.app.extensions["columnar_store"] = store = MemoryStore(max_bytes=1 << 20)
+        user_id = self.users[0]
+        before = summarize_spending(user_id)
+        self.assertIs(store.columns(user_id, db.session.get(User, user_id).transactions_version),
+                      store.columns(user_id, db.session.get(User, user_id).transactions_version))
+
+        self._add_rows(user_id, seed=99, n=20)
+        bump_data_version(user_id)
+        rebuild_rollup()
+        db.session.commit()
+        after = summarize_spending(user_id)
+        self.assertNotEqual(before, after)
+        self.app.extensions["columnar_store"] = None
+        self.assertEqual(after, summarize_spending(user_id))
+
+
+class SummarizeColumnsTestCase(unittest.TestCase):
+    def test_sums_are_exact_beyond_float_precision(self):
+        day = date(2026, 1, 1).toordinal()
+        big = 2 ** 53  # float64 can no longer tell big + 1 from big
+        cols = UserColumns(
+            days=np.array([day, day, day + 1], dtype=np.int32),
+            codes=np.array([0, 0, 0], dtype=np.int32),
+            spend=np.array([big, 1, 1], dtype=np.int64),
+            is_expense=np.ones(3, dtype=bool),
+            names=["Dagligvaror"],
+            normalized=["dagligvaror"],
+        )
+        summary = summarize_columns(cols, None, None, "")
+        self.assertEqual(summary.category_totals, [("Dagligvaror", big + 2)])
+        self.assertEqual(summary.per_day, [(date(2026, 1, 1), big + 1), (date(2026, 1, 2), 1)])
+        self.assertEqual(summary.total, big + 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
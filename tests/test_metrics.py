@@ -0,0 +1,146 @@
+import io
+import json
+import socket
+import tempfile
+import unittest
+from datetime import date
+from pathlib import Path
+from unittest import mock
+
+import pandas as pd
+
+from app import create_app, db, metrics
+from app.metrics import Counter, Histogram
+
+PARSED = pd.DataFrame({
+    "transactionday": [date(2026, 1, 1), date(2026, 1, 2)],
+    "currency": ["SEK"] * 2,
+    "reference": ["ICA", "SL"],
+    "description": ["ICA", "SL"],
+    "amount": [-100.0, -40.0],
+    "amount_minor": [-10000, -4000],
+    "is_expense": [True, True],
+    "category": ["Dagligvaror", "Transport"],
+    "is_financial_transaction": [False, False],
+    "category_confidence": [0.9, 0.8],
+})
+
+
+def _samples(text: str) -> dict[str, float]:
+    return {
+        line.rsplit(" ", 1)[0]: float(line.rsplit(" ", 1)[1])
+        for line in text.splitlines() if line and not line.startswith("#")
+    }
+
+
+class ExpositionTestCase(unittest.TestCase):
+    def test_histogram_buckets_are_cumulative(self):
+        h = Histogram("h_seconds", "x", ["stage"], buckets=(0.1, 1), registry={})
+        for value in (0.05, 0.5, 0.7, 3):
+            h.observe(value, stage="parse")
+        lines = h.render(h._values)
+        self.assertEqual(lines, [
+            'h_seconds_bucket{stage="parse",le="0.1"} 1',
+            'h_seconds_bucket{stage="parse",le="1"} 3',
+            'h_seconds_bucket{stage="parse",le="+Inf"} 4',
+            'h_seconds_sum{stage="parse"} 4.25',
+            'h_seconds_count{stage="parse"} 4',
+        ])
+
+    def test_label_values_are_escaped(self):
+        c = Counter("c_total", "x", ["path"], registry={})
+        c.inc(2, path='a"b\\c')
+        self.assertEqual(c.render(c._values), ['c_total{path="a\\"b\\\\c"} 2'])
+
+
+class MetricsEndpointTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+        self.client.post("/auth/register", data={"email": "me@example.com", "password": "pw"})
+        self.app.config["METRICS_TOKEN"] = "scrape-secret"
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _metrics(self):
+        resp = self.client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"})
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.content_type.startswith("text/plain; version=0.0.4"))
+        return _samples(resp.get_data(as_text=True))
+
+    def test_upload_and_analytics_are_measured(self):
+        before = self._metrics()
+        with mock.patch("app.ingest.ingest_routes.parse_csv_to_dataframe", return_value=PARSED.copy()):
+            self.client.post(
+                "/upload",
+                data={"file": (io.BytesIO(b"unused"), "bank.csv")},
+                content_type="multipart/form-data",
+            )
+        self.client.get("/analytics/api/trend")
+        after = self._metrics()
+
+        def delta(name):
+            return after.get(name, 0) - before.get(name, 0)
+
+        self.assertEqual(delta("bi_upload_rows_count"), 1)
+        self.assertEqual(delta("bi_upload_rows_sum"), 2)
+        for stage in ("parse", "prepare", "insert", "rollup", "commit"):
+            self.assertEqual(delta(f'bi_ingest_stage_seconds_count{{stage="{stage}"}}'), 1)
+        self.assertEqual(delta('bi_request_seconds_count{endpoint="analytics.trend_api",method="GET"}'), 1)
+        self.assertGreaterEqual(delta('bi_analytics_cache_lookups_total{result="miss"}'), 1)
+        self.assertGreater(delta('bi_db_pool_checkout_seconds_count{engine="primary"}'), 0)
+
+    def test_worker_snapshots_are_summed(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            self.app.config["METRICS_DIR"] = tmp
+            own = self._metrics().get('bi_model_predictions_total{path="worker"}', 0)
+            # Snapshot left by another worker process
+            Path(tmp, "999999.json").write_text(json.dumps({"bi_model_predictions_total": [[["worker"], 40]]}))
+            self.assertEqual(self._metrics()['bi_model_predictions_total{path="worker"}'], own + 40)
+
+    def test_snapshots_of_a_reused_pid_are_both_kept(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            self.app.config["METRICS_DIR"] = tmp
+            own = self._metrics().get('bi_model_predictions_total{path="worker"}', 0)
+            for token, count in (("0a0a0a0a0a0a", 40), ("0b0b0b0b0b0b", 2)):
+                Path(tmp, f"otherhost-4242-{token}.json").write_text(
+                    json.dumps({"bi_model_predictions_total": [[["worker"], count]]})
+                )
+            self.assertEqual(self._metrics()['bi_model_predictions_total{path="worker"}'], own + 42)
+
+    @unittest.skipIf(metrics.fcntl is None, "requires fcntl")
+    def test_exited_worker_snapshots_are_retired(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            self.app.config["METRICS_DIR"] = tmp
+            own = self._metrics().get('bi_model_predictions_total{path="worker"}', 0)
+            dead = Path(tmp, f"{socket.gethostname()}-999999-0c0c0c0c0c0c.json")
+            dead.write_text(json.dumps({"bi_model_predictions_total": [[["worker"], 40]]}))
+            Path(tmp, metrics.RETIRED).write_text(json.dumps({"bi_model_predictions_total": [[["worker"], 2]]}))
+
+            with mock.patch.object(metrics.os, "kill", side_effect=ProcessLookupError):
+                first = self._metrics()
+            self.assertEqual(first['bi_model_predictions_total{path="worker"}'], own + 42)
+            self.assertFalse(dead.exists())
+            self.assertEqual(self._metrics()['bi_model_predictions_total{path="worker"}'], own + 42)
+
+    def test_not_served_to_other_addresses(self):
+        resp = self.client.get(
+            "/metrics", headers={"Authorization": "Bearer scrape-secret"}, environ_base={"REMOTE_ADDR": "10.0.0.8"}
+        )
+        self.assertEqual(resp.status_code, 404)
+
+    def test_requires_the_configured_token(self):
+        for headers in ({}, {"Authorization": "Bearer wrong"}):
+            self.assertEqual(self.client.get("/metrics", headers=headers).status_code, 404)
+        self.app.config["METRICS_TOKEN"] = None
+        self.assertEqual(self.client.get("/metrics", headers={"Authorization": "Bearer "}).status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
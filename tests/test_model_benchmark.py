@@ -0,0 +1,110 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import joblib
+
+from app.ai_agent_models import read_model_meta, train_category_model
+from app.ai_agent_models.model_benchmark import (
+    BenchmarkConfig,
+    PromotionPolicy,
+    cross_validate_variant,
+    promote,
+    select_promotion,
+)
+
+ROWS = [
+    ("ICA | mjölk", "Dagligvaror", 3), ("Coop | bröd", "Dagligvaror", 1), ("Willys | ost", "Dagligvaror", 2),
+    ("Lidl | frukt", "Dagligvaror", 1), ("SL | kort", "Lokaltrafik", 4), ("SJ | biljett", "Lokaltrafik", 1),
+    ("SL | reskassa", "Lokaltrafik", 1), ("Västtrafik | biljett", "Lokaltrafik", 2),
+]
+
+
+def _candidate(variant, macro_f1, latency_ms=1.0, artifact_bytes=1024, load_ms=1.0):
+    return {
+        "variant": variant,
+        "macro_f1": macro_f1,
+        "latency_ms_per_row": latency_ms,
+        "artifact_bytes": artifact_bytes,
+        "load_ms": load_ms,
+    }
+
+
+class PromotionPolicyTestCase(unittest.TestCase):
+    def test_promotes_clear_winner(self):
+        report = {"candidates": [_candidate("tfidf", 0.80), _candidate("char_ngrams", 0.85)]}
+        best = select_promotion(report, PromotionPolicy(), current_variant="tfidf")
+        self.assertEqual(best["variant"], "char_ngrams")
+
+    def test_keeps_current_when_improvement_too_small(self):
+        report = {"candidates": [_candidate("tfidf", 0.800), _candidate("hashed", 0.803)]}
+        self.assertIsNone(select_promotion(report, PromotionPolicy(min_improvement=0.005), "tfidf"))
+
+    def test_limits_exclude_candidates(self):
+        report = {"candidates": [
+            _candidate("tfidf", 0.80),
+            _candidate("char_ngrams", 0.90, latency_ms=50.0),
+            _candidate("hashed_sgd", 0.82),
+        ]}
+        best = select_promotion(report, PromotionPolicy(max_latency_ms=5.0), "tfidf")
+        self.assertEqual(best["variant"], "hashed_sgd")
+
+
+class TrainingRunTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        self.data_path = self.dir / "training.jsonl"
+        self.data_path.write_text(
+            "".join(json.dumps({"text": t, "label": l, "weight": w}) + "\n" for t, l, w in ROWS), encoding="utf-8"
+        )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_cv_scores_compacted_weighted_folds(self):
+        texts, labels, weights = zip(*ROWS)
+        cfg = BenchmarkConfig(cv_folds=2, n_jobs=1)
+        with mock.patch.object(
+            train_category_model, "compact_pipeline", wraps=train_category_model.compact_pipeline
+        ) as compact:
+            scores, fit_seconds = cross_validate_variant("hashed_sgd", list(texts), list(labels), list(weights), cfg)
+        self.assertEqual(compact.call_count, 2)
+        self.assertEqual(len(scores), 2)
+        self.assertTrue(all(0.0 <= s <= 1.0 for s in scores))
+
+    def test_folds_are_capped_by_the_row_count(self):
+        texts, labels, weights = zip(*(ROWS[:2] + ROWS[4:6]))
+        scores, _ = cross_validate_variant(
+            "hashed_sgd", list(texts), list(labels), list(weights), BenchmarkConfig(cv_folds=5, n_jobs=1)
+        )
+        self.assertEqual(len(scores), 4)
+        with self.assertRaisesRegex(ValueError, "at least 2 training rows"):
+            cross_validate_variant("hashed_sgd", ["ICA | mjölk"], ["Dagligvaror"], [1.0], BenchmarkConfig(n_jobs=1))
+
+    def test_promote_replaces_model_and_writes_meta(self):
+        model_path = self.dir / "category_model.joblib"
+        model_path.write_bytes(b"previous model")
+        promoted = []
+
+        result = promote(
+            {"variant": "hashed_sgd", "macro_f1": 0.9},
+            {"dataset_sha256": "abc123"},
+            data_path=self.data_path,
+            model_path=model_path,
+            on_promoted=promoted.append,
+        )
+
+        self.assertEqual(result, model_path)
+        self.assertEqual(promoted, [model_path])
+        self.assertFalse(model_path.with_name(model_path.name + ".tmp").exists())
+        model = joblib.load(model_path)
+        self.assertEqual(model.predict(["SL | kort"]).tolist(), ["Lokaltrafik"])
+        meta = read_model_meta(model_path)
+        self.assertEqual((meta["variant"], meta["dataset_sha256"]), ("hashed_sgd", "abc123"))
+
+
+if __name__ == "__main__":
+    unittest.main()
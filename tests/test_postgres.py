@@ -0,0 +1,187 @@
+"""
+PostgresIngestTestCase runs only against a PostgreSQL server named by
+TEST_DATABASE_URL, e.g.
+
+    initdb -D /tmp/pg && pg_ctl -D /tmp/pg -l /tmp/pg.log start
+    createdb -E UTF8 -T template0 bi_test
+    TEST_DATABASE_URL=postgresql+psycopg://localhost/bi_test python -m pytest tests/test_postgres.py
+
+The database is emptied by every test.
+"""
+import csv
+import io
+import os
+import unittest
+from datetime import date
+from unittest import mock
+
+import pandas as pd
+from sqlalchemy import event
+
+from app import create_app, db
+from app.analytics.rollup import rebuild_rollup
+from app.ingest.bulk import TRANSACTION_COLUMNS, _copy, _prepared
+from app.models import DailySpend, Transaction, User, category_id
+from config import TestingConfig
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+PARSED = pd.DataFrame({
+    "transactionday": [date(2026, 1, 1), date(2026, 1, 2), None],
+    "currency": ["SEK"] * 3,
+    "reference": ["ICA", "", "SL"],
+    "description": ['ICA "Nära", Kista', "Line\nbreak", ""],
+    "amount": [-100.5, -40.0, 25000.0],
+    "amount_minor": [-10050, -4000, 2500000],
+    "is_expense": [True, True, False],
+    "category": ["Dagligvaror", "", "Lön"],
+    "is_financial_transaction": [False, False, True],
+    "category_confidence": [0.9, float("nan"), 0.8],
+})
+
+
+@unittest.skipUnless(TEST_DATABASE_URL, "TEST_DATABASE_URL is not set")
+class PostgresIngestTestCase(unittest.TestCase):
+    def setUp(self):
+        with mock.patch.object(TestingConfig, "SQLALCHEMY_DATABASE_URI", TEST_DATABASE_URL):
+            self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+        self.client.post("/auth/register", data={"email": "me@example.com", "password": "pw"})
+        self.user_id = db.session.execute(db.select(User.id)).scalar_one()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        db.engine.dispose()
+        self.app_context.pop()
+
+    def _upload(self):
+        statements = []
+
+        def _record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", _record)
+        try:
+            with mock.patch("app.ingest.ingest_routes.parse_csv_to_dataframe", return_value=PARSED.copy()):
+                resp = self.client.post(
+                    "/upload",
+                    data={"file": (io.BytesIO(b"unused"), "bank.csv")},
+                    content_type="multipart/form-data",
+                )
+        finally:
+            event.remove(db.engine, "before_cursor_execute", _record)
+        self.assertEqual(resp.status_code, 302)
+        return statements
+
+    def test_upload_is_copied_not_inserted(self):
+        statements = self._upload()
+        # COPY runs on the raw cursor, so only the INSERT it replaces would show up here
+        self.assertFalse([s for s in statements if s.lstrip().upper().startswith("INSERT INTO TRANSACTIONS")])
+
+        rows = db.session.execute(
+            db.select(
+                Transaction.transaction_day, Transaction.description, Transaction.amount_minor,
+                Transaction.merchant_id, Transaction.category_confidence, Transaction.is_financial_transaction,
+            ).order_by(Transaction.id)
+        ).all()
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0].description, 'ICA "Nära", Kista')
+        self.assertEqual(rows[0].amount_minor, -10050)
+        self.assertEqual(rows[1].description, "Line\nbreak")
+        self.assertIsNone(rows[1].merchant_id)
+        self.assertIsNone(rows[1].category_confidence)
+        self.assertIsNone(rows[2].transaction_day)
+        self.assertIsNone(rows[2].description)
+        self.assertTrue(rows[2].is_financial_transaction)
+
+    def test_rollup_matches_rebuild_after_copy(self):
+        self._upload()
+        maintained = sorted(db.session.execute(db.select(DailySpend.day, DailySpend.category_id,
+                                                         DailySpend.amount_minor_sum)).all())
+        rebuild_rollup()
+        db.session.flush()
+        rebuilt = sorted(db.session.execute(db.select(DailySpend.day, DailySpend.category_id,
+                                                      DailySpend.amount_minor_sum)).all())
+        self.assertEqual(maintained, rebuilt)
+        self.assertIn((date(2026, 1, 1), category_id("Dagligvaror"), -10050), maintained)
+
+    def test_trend_index_covers_page_columns(self):
+        definition = db.session.execute(
+            db.text("SELECT indexdef FROM pg_indexes WHERE indexname = 'ix_transactions_user_day_nonfinancial'")
+        ).scalar_one()
+        self.assertIn("INCLUDE (category_id, merchant_id, amount_minor)", definition)
+        self.assertIn("WHERE (is_financial_transaction IS FALSE)", definition)
+
+
+class _Copy:
+    def __init__(self, sink):
+        self.sink = sink
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def write(self, data):
+        self.sink.append(data)
+
+
+class Psycopg3Cursor:
+    def __init__(self):
+        self.chunks = []
+
+    def copy(self, statement):
+        return _Copy(self.chunks)
+
+
+class Psycopg2Cursor:
+    def __init__(self):
+        self.chunks = []
+
+    def copy_expert(self, statement, file):
+        self.chunks.append(file.read())
+
+
+class CopyPayloadTestCase(unittest.TestCase):
+    """
+    The CSV both driver styles would stream; runs without a server.
+    PostgresIngestTestCase checks that PostgreSQL accepts it.
+    """
+    FRAME = pd.DataFrame({
+        "currency": ["SEK", "SEK"],
+        "booking_day": [date(2026, 1, 1), None],
+        "transaction_day": [date(2026, 1, 1), None],
+        "description": ['ICA "Nära", Kista', None],
+        "amount_minor": [-10050, 2500000],
+        "is_expense": [True, False],
+        "is_financial_transaction": [False, True],
+        "category_confidence": [0.9, float("nan")],
+        "category_id": [1, 2],
+        "merchant_id": [7, None],
+        "upload_id": [3, 3],
+        "user_id": [4, 4],
+    })
+
+    def _rows(self, cursor):
+        _copy(cursor, "COPY ...", _prepared(self.FRAME))
+        return [dict(zip(TRANSACTION_COLUMNS, row)) for row in csv.reader(io.StringIO("".join(cursor.chunks)))]
+
+    def test_nulls_are_empty_fields_and_ids_stay_integers(self):
+        for cursor in (Psycopg3Cursor(), Psycopg2Cursor()):
+            first, second = self._rows(cursor)
+            self.assertEqual(first["description"], 'ICA "Nära", Kista')
+            self.assertEqual(first["merchant_id"], "7")
+            self.assertEqual(first["transaction_day"], "2026-01-01")
+            self.assertEqual(second["merchant_id"], "")
+            self.assertEqual(second["category_confidence"], "")
+            self.assertEqual(second["description"], "")
+            self.assertEqual(second["transaction_day"], "")
+
+
+if __name__ == "__main__":
+    unittest.main()
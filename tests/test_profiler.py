@@ -0,0 +1,147 @@
+import re
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from app import create_app, db, profiler
+from app.models import User
+from app.profiler import TOKEN_HEADER, SamplingProfiler, _start, issue_token
+from config import TestingConfig
+
+ADMIN = "admin@example.com"
+
+
+def _slow_view_part():
+    time.sleep(0.05)
+
+
+class SamplingProfilerTestCase(unittest.TestCase):
+    def test_collapsed_stacks_name_the_running_function(self):
+        profiler = SamplingProfiler(threading.get_ident(), interval=0.001)
+        profiler.start()
+        _slow_view_part()
+        profiler.stop()
+        lines = profiler.collapsed().splitlines()
+        self.assertTrue(lines)
+        stack, count = lines[0].rsplit(" ", 1)
+        self.assertIn("_slow_view_part (test_profiler.py:", stack.split(";")[-1])
+        self.assertGreater(int(count), 0)
+
+
+class RequestProfilerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        with mock.patch.multiple(TestingConfig, PROFILER_ENABLED=True, FLASKY_ADMIN=ADMIN, PROFILER_DIR=self.tmp.name,
+                                 PROFILER_MIN_INTERVAL=0):
+            self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        self.tmp.cleanup()
+
+    def _login(self, email):
+        self.client.post("/auth/register", data={"email": email, "password": "pw"})
+        self.client.post("/auth/login", data={"email": email, "password": "pw"})
+
+    def _profiles(self):
+        return sorted(p.name for p in Path(self.tmp.name).glob("*.folded"))
+
+    def _token(self, email, path=None, issuer=ADMIN):
+        user = db.session.execute(db.select(User).where(User.email == email)).scalar_one()
+        with self.app.test_request_context():
+            return issue_token(issuer, user.id, path)
+
+    def test_signed_token_profiles_the_request(self):
+        self._login("me@example.com")
+        token = self._token("me@example.com")
+        self.assertEqual(self.client.get("/analytics/trend").status_code, 200)
+        self.assertEqual(self._profiles(), [])
+
+        self.client.get("/analytics/trend", headers={TOKEN_HEADER: token})
+        self.client.get(f"/analytics/trend?_profile={token}")
+        profiles = self._profiles()
+        self.assertEqual(len(profiles), 1)
+        self.assertIn("_analytics.trend_user1_", profiles[0])
+
+    def test_tokens_not_issued_by_the_admin_are_ignored(self):
+        self._login("me@example.com")
+        token = self._token("me@example.com", issuer="me@example.com")
+        self.client.get("/analytics/trend", headers={TOKEN_HEADER: token})
+        self.client.get("/analytics/trend", headers={TOKEN_HEADER: "forged"})
+        self.assertEqual(self._profiles(), [])
+
+    def test_token_is_bound_to_its_user_and_path(self):
+        self._login("other@example.com")
+        self.client.get("/auth/logout")
+        self._login("me@example.com")
+        self.client.get("/analytics/trend", headers={TOKEN_HEADER: self._token("other@example.com")})
+        self.client.get("/analytics/trend", headers={TOKEN_HEADER: self._token("me@example.com", path="/upload")})
+        self.assertEqual(self._profiles(), [])
+
+        self.client.get("/analytics/trend", headers={TOKEN_HEADER: self._token("me@example.com", path="/analytics/trend")})
+        self.assertEqual(len(self._profiles()), 1)
+
+    def test_expired_tokens_are_ignored(self):
+        self._login("me@example.com")
+        token = self._token("me@example.com")
+        self.app.config["PROFILER_TOKEN_MAX_AGE"] = -1
+        self.client.get("/analytics/trend", headers={TOKEN_HEADER: token})
+        self.assertEqual(self._profiles(), [])
+
+    def test_profiled_requests_are_rate_limited_and_pruned(self):
+        self._login("me@example.com")
+        token = self._token("me@example.com")
+        self.app.config["PROFILER_MAX_FILES"] = 2
+        for _ in range(3):
+            self.client.get("/analytics/trend", headers={TOKEN_HEADER: token})
+        self.assertEqual(len(self._profiles()), 2)
+
+        self.app.config.update(PROFILER_MAX_FILES=10, PROFILER_MIN_INTERVAL=60)
+        with mock.patch.object(profiler, "_last_started", float("-inf")):
+            for _ in range(3):
+                self.client.get("/analytics/trend", headers={TOKEN_HEADER: token})
+        self.assertEqual(len(self._profiles()), 3)
+
+    def test_admin_page_lists_and_serves_profiles(self):
+        self._login("me@example.com")
+        self.assertEqual(self.client.get("/admin/profiles").status_code, 403)
+        self.client.get("/auth/logout")
+
+        self._login(ADMIN)
+        html = self.client.get("/admin/profiles").get_data(as_text=True)
+        self.assertIn("No profiles saved yet.", html)
+        html = self.client.get("/admin/profiles?user=nobody@example.com").get_data(as_text=True)
+        self.assertIn("No user with email nobody@example.com.", html)
+        html = self.client.get(f"/admin/profiles?user={ADMIN}").get_data(as_text=True)
+        token = re.search(r'font-monospace" type="text" value="([^"]+)"', html).group(1)
+        self.client.get("/analytics/trend", headers={TOKEN_HEADER: token})
+        name = self._profiles()[0]
+        self.assertIn(name, self.client.get("/admin/profiles").get_data(as_text=True))
+        resp = self.client.get(f"/admin/profiles/{name}")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(self.client.get("/admin/profiles/../bi_test.db").status_code, 404)
+
+    def test_admin_page_skips_profiles_deleted_while_listing(self):
+        self._login(ADMIN)
+        # A dangling link globs like a file another worker pruned before the stat
+        Path(self.tmp.name, "20260101T000000000000_gone.folded").symlink_to(Path(self.tmp.name, "missing"))
+        resp = self.client.get("/admin/profiles")
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotIn("_gone.folded", resp.get_data(as_text=True))
+
+    def test_no_hooks_when_disabled(self):
+        app = create_app('testing')
+        self.assertNotIn(_start, app.before_request_funcs.get(None, []))
+
+
+if __name__ == "__main__":
+    unittest.main()
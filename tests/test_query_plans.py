@@ -0,0 +1,82 @@
+import unittest
+from datetime import date
+
+from sqlalchemy import event
+
+from app import create_app, db
+from app.analytics.queries import transaction_page
+from app.analytics.rollup import grouped_deltas
+from app.models import Transaction, Upload, User, category_id
+
+
+class QueryPlanTestCase(unittest.TestCase):
+    """
+    SQLite EXPLAIN QUERY PLAN of the per-user transaction queries: each must
+    be an index search on user_id, never a full table scan.
+    """
+
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        user = User(email="me@example.com")
+        user.set_password("pw")
+        db.session.add(user)
+        db.session.flush()
+        upload = Upload(original_filename="x.csv", user_id=user.id, row_count=1)
+        db.session.add(upload)
+        db.session.flush()
+        db.session.add(Transaction(transaction_day=date(2026, 1, 1), amount_minor=-100, upload_id=upload.id,
+                                   user_id=user.id, category_id=category_id("Dagligvaror")))
+        db.session.commit()
+        self.user_id = user.id
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _plan(self, fn) -> str:
+        executed = []
+
+        def _record(conn, cursor, statement, parameters, context, executemany):
+            executed.append((statement, parameters))
+
+        event.listen(db.engine, "before_cursor_execute", _record)
+        try:
+            fn()
+        finally:
+            event.remove(db.engine, "before_cursor_execute", _record)
+
+        statement, parameters = executed[-1]
+        rows = db.session.connection().exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+        return "\n".join(row[-1] for row in rows)
+
+    def assertIndexSearch(self, plan: str, index: str = "ix_transactions_user_"):
+        self.assertRegex(plan, rf"SEARCH transactions USING (COVERING )?INDEX {index}\w* \(user_id=\?")
+        self.assertNotIn("SCAN transactions", plan)
+
+    def test_transaction_page(self):
+        plan = self._plan(lambda: transaction_page(self.user_id, date(2026, 1, 1), date(2026, 12, 31)))
+        self.assertIndexSearch(plan, "ix_transactions_user_day_nonfinancial")
+        self.assertNotIn("TEMP B-TREE", plan)  # index order serves ORDER BY
+
+    def test_transaction_page_by_category(self):
+        plan = self._plan(lambda: transaction_page(self.user_id, category="Dagligvaror"))
+        self.assertIndexSearch(plan)
+
+    def test_rollup_source(self):
+        plan = self._plan(lambda: grouped_deltas(Transaction.user_id == self.user_id))
+        self.assertIndexSearch(plan)
+
+    def test_review_queue(self):
+        client = self.app.test_client()
+        client.post("/auth/register", data={"email": "you@example.com", "password": "pw"})
+        plan = self._plan(lambda: client.get("/analytics/review"))
+        self.assertIndexSearch(plan, "ix_transactions_user_confidence")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import json
+import unittest
+from unittest import mock
+
+from app import create_app, db
+from app.query_profile import REQUEST_HEADER, QueryProfile
+from config import TestingConfig
+
+
+class QueryProfileTestCase(unittest.TestCase):
+    def setUp(self):
+        with mock.patch.multiple(TestingConfig, QUERY_PROFILE_SAMPLE_RATE=0.0, QUERY_PROFILE_EXPOSE=True):
+            self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+        self.client.post("/auth/register", data={"email": "me@example.com", "password": "pw"})
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_requested_breakdown_is_returned(self):
+        resp = self.client.get("/analytics/api/trend", headers={REQUEST_HEADER: "1"})
+        self.assertEqual(resp.status_code, 200)
+        breakdown = json.loads(resp.headers[REQUEST_HEADER])
+        self.assertGreater(breakdown["count"], 0)
+        self.assertLessEqual(len(breakdown["slowest"]), 5)
+        self.assertTrue(breakdown["slowest"][0]["statement"].startswith("SELECT"))
+        self.assertIn(f'desc="{breakdown["count"]} queries"', resp.headers["Server-Timing"])
+
+    def test_unsampled_requests_are_not_profiled(self):
+        resp = self.client.get("/analytics/api/trend")
+        self.assertNotIn(REQUEST_HEADER, resp.headers)
+        self.assertNotIn("Server-Timing", resp.headers)
+
+    def test_header_ignored_unless_exposed(self):
+        self.app.config["QUERY_PROFILE_EXPOSE"] = False
+        resp = self.client.get("/analytics/api/trend", headers={REQUEST_HEADER: "1"})
+        self.assertNotIn(REQUEST_HEADER, resp.headers)
+
+    def test_budget_overrun_is_logged(self):
+        self.app.config.update(QUERY_PROFILE_SAMPLE_RATE=1.0, QUERY_BUDGET_COUNT=0)
+        with self.assertLogs(self.app.logger, "WARNING") as logs:
+            self.client.get("/analytics/api/trend")
+        self.assertIn("Query budget exceeded: GET /analytics/api/trend", logs.output[0])
+
+    def test_keeps_slowest_statements(self):
+        profile = QueryProfile(keep=2)
+        for i, elapsed in enumerate([0.003, 0.001, 0.005, 0.002]):
+            profile.record(f"SELECT {i}", elapsed)
+        breakdown = profile.breakdown()
+        self.assertEqual(breakdown["count"], 4)
+        self.assertEqual(breakdown["total_ms"], 11.0)
+        self.assertEqual([s["statement"] for s in breakdown["slowest"]], ["SELECT 2", "SELECT 0"])
+
+
+if __name__ == "__main__":
+    unittest.main()
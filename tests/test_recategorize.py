@@ -0,0 +1,146 @@
+import tempfile
+import unittest
+from datetime import date
+from pathlib import Path
+from unittest import mock
+
+from app import create_app, db
+from app.ingest import recategorize
+from app.ingest.recategorize import RecategorizeConfig, recategorize_transactions
+from app.models import Category, Transaction, Upload, User, category_id, merchant_id
+
+
+class KeywordModel:
+    """Tiny stand-in estimator: 'ica' -> Dagligvaror, everything else -> `other`."""
+
+    def __init__(self, other="Restaurang"):
+        self.calls = []
+        self.other = other
+
+    def predict(self, texts):
+        self.calls.append(list(texts))
+        return ["Dagligvaror" if "ica" in t.lower() else self.other for t in texts]
+
+
+def _failing_on_call(n, func):
+    calls = []
+
+    def wrapper(*args, **kwargs):
+        calls.append(args)
+        if len(calls) == n:
+            raise RuntimeError("interrupted")
+        return func(*args, **kwargs)
+    return wrapper
+
+
+class RecategorizeTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.checkpoint = Path(self.tmp.name) / "checkpoint.json"
+
+        user = User(email="a@example.com")
+        user.set_password("x")
+        db.session.add(user)
+        db.session.flush()
+        upload = Upload(original_filename="a.csv", user_id=user.id, row_count=5)
+        db.session.add(upload)
+        db.session.flush()
+        rows = [
+            ("ICA Maxi", "Dagligvaror"),
+            ("ICA Maxi", "Uncategorized"),
+            ("Sushi bar", "Dagligvaror"),
+            ("Sushi bar", "Restaurang"),
+            ("ICA Nära", "Restaurang"),
+        ]
+        for place, category in rows:
+            db.session.add(Transaction(
+                transaction_day=date(2026, 1, 1),
+                merchant_id=merchant_id(place),
+                amount_minor=-1000,
+                category_id=category_id(category),
+                upload_id=upload.id,
+                user_id=user.id,
+            ))
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        self.tmp.cleanup()
+
+    def _categories(self):
+        return db.session.execute(
+            db.select(Category.name)
+            .select_from(Transaction)
+            .join(Category, Category.id == Transaction.category_id)
+            .order_by(Transaction.id)
+        ).scalars().all()
+
+    def test_updates_only_changed_rows_and_dedups_texts(self):
+        model = KeywordModel()
+        stats = recategorize_transactions(
+            RecategorizeConfig(chunk_size=10, pause_seconds=0, checkpoint_path=self.checkpoint), model=model
+        )
+        self.assertEqual(stats.scanned, 5)
+        self.assertEqual(stats.updated, 3)
+        self.assertEqual(model.calls, [["ICA Maxi", "Sushi bar", "ICA Nära"]])
+        self.assertEqual(
+            self._categories(),
+            ["Dagligvaror", "Dagligvaror", "Restaurang", "Restaurang", "Dagligvaror"],
+        )
+
+        # Finished run for the same model is not repeated
+        again = recategorize_transactions(
+            RecategorizeConfig(pause_seconds=0, checkpoint_path=self.checkpoint), model=KeywordModel()
+        )
+        self.assertEqual(again.scanned, 0)
+
+    def test_resumes_after_interruption(self):
+        cfg = RecategorizeConfig(chunk_size=2, pause_seconds=0, checkpoint_path=self.checkpoint)
+        failing = _failing_on_call(2, recategorize.category_ids)
+        with mock.patch.object(recategorize, "category_ids", failing), self.assertRaises(RuntimeError):
+            recategorize_transactions(cfg, model=KeywordModel())
+
+        model = KeywordModel()
+        stats = recategorize_transactions(cfg, model=model)
+        self.assertEqual(stats.resumed_from, 2)
+        self.assertEqual(stats.scanned, 3)
+        self.assertEqual(
+            self._categories(),
+            ["Dagligvaror", "Dagligvaror", "Restaurang", "Restaurang", "Dagligvaror"],
+        )
+
+    def test_checkpoint_is_scoped_to_the_passed_estimator(self):
+        cfg = RecategorizeConfig(pause_seconds=0, checkpoint_path=self.checkpoint)
+        recategorize_transactions(cfg, model=KeywordModel())
+
+        other = recategorize_transactions(cfg, model=KeywordModel(other="Nöjen & kultur"))
+        self.assertEqual(other.resumed_from, 0)
+        self.assertEqual(other.scanned, 5)
+        self.assertEqual(self._categories(), ["Dagligvaror", "Dagligvaror", "Nöjen & kultur", "Nöjen & kultur", "Dagligvaror"])
+
+    def test_skips_confirmed_rows_not_certain_predictions(self):
+        sushi, _, ica_nara = db.session.execute(
+            db.select(Transaction).order_by(Transaction.id).offset(2)
+        ).scalars().all()
+        sushi.category_confirmed = True    # user kept Dagligvaror
+        ica_nara.category_confidence = 1.0  # a model probability, not a confirmation
+        db.session.commit()
+
+        recategorize_transactions(
+            RecategorizeConfig(pause_seconds=0, checkpoint_path=self.checkpoint), model=KeywordModel()
+        )
+        self.assertEqual(
+            self._categories(),
+            ["Dagligvaror", "Dagligvaror", "Dagligvaror", "Restaurang", "Dagligvaror"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+from datetime import date
+
+from app import create_app, db
+from app.models import Category, Transaction, Upload, User, category_id, merchant_id
+
+
+class ReviewQueueTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+
+        self.client.post("/auth/register", data={"email": "me@example.com", "password": "pw"})
+        me = db.session.execute(db.select(User).where(User.email == "me@example.com")).scalar_one()
+        other = User(email="other@example.com")
+        other.set_password("pw")
+        db.session.add(other)
+        db.session.flush()
+
+        self.my_upload = self._upload(me.id, [("Pressbyrån", "Restaurang", 0.3)] * 3 + [("ICA", "Dagligvaror", 0.95)])
+        self.other_upload = self._upload(other.id, [("Pressbyrån", "Restaurang", 0.3)])
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _upload(self, user_id, rows):
+        upload = Upload(original_filename="x.csv", user_id=user_id, row_count=len(rows))
+        db.session.add(upload)
+        db.session.flush()
+        for place, category, confidence in rows:
+            db.session.add(Transaction(
+                transaction_day=date(2026, 1, 1),
+                merchant_id=merchant_id(place),
+                amount_minor=-1000,
+                category_id=category_id(category),
+                category_confidence=confidence,
+                upload_id=upload.id,
+                user_id=user_id,
+            ))
+        return upload.id
+
+    def test_lists_only_low_confidence_groups(self):
+        html = self.client.get("/analytics/review").get_data(as_text=True)
+        self.assertIn("Pressbyrån", html)
+        self.assertNotIn(">ICA<", html)
+
+    def test_correction_applies_to_all_rows_of_merchant_for_user(self):
+        resp = self.client.post("/analytics/review", data={"merchant_id": merchant_id("Pressbyrån"), "category": "Godis & Snacks"})
+        self.assertEqual(resp.status_code, 302)
+
+        mine = db.session.execute(
+            db.select(Category.name, Transaction.category_confidence, Transaction.category_confirmed)
+            .select_from(Transaction)
+            .join(Category, Category.id == Transaction.category_id)
+            .where(Transaction.upload_id == self.my_upload, Transaction.merchant_id == merchant_id("Pressbyrån"))
+        ).all()
+        self.assertEqual(set(mine), {("Godis & Snacks", None, True)})
+        self.assertEqual(len(mine), 3)
+        self.assertNotIn(">Pressbyrån<", self.client.get("/analytics/review").get_data(as_text=True))
+
+        theirs = db.session.execute(
+            db.select(Category.name)
+            .select_from(Transaction)
+            .join(Category, Category.id == Transaction.category_id)
+            .where(Transaction.upload_id == self.other_upload)
+        ).scalar_one()
+        self.assertEqual(theirs, "Restaurang")
+
+    def test_accepting_the_prediction_keeps_model_confidence(self):
+        self.client.post("/analytics/review", data={"merchant_id": merchant_id("Pressbyrån"), "category": "Restaurang"})
+        mine = db.session.execute(
+            db.select(Transaction.category_confidence, Transaction.category_confirmed)
+            .where(Transaction.upload_id == self.my_upload, Transaction.merchant_id == merchant_id("Pressbyrån"))
+        ).all()
+        self.assertEqual(set(mine), {(0.3, True)})
+
+    def test_rejects_unknown_category(self):
+        resp = self.client.post(
+            "/analytics/review", data={"merchant_id": merchant_id("Pressbyrån"), "category": "Made up"},
+            follow_redirects=True,
+        )
+        self.assertIn("Unknown category: Made up.", resp.get_data(as_text=True))
+        self.assertIsNone(db.session.execute(db.select(Category).where(Category.name == "Made up")).scalar())
+        names = db.session.execute(
+            db.select(Category.name)
+            .select_from(Transaction)
+            .join(Category, Category.id == Transaction.category_id)
+            .where(Transaction.upload_id == self.my_upload, Transaction.merchant_id == merchant_id("Pressbyrån"))
+        ).scalars().all()
+        self.assertEqual(set(names), {"Restaurang"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+import io
+import unittest
+from datetime import date
+from unittest import mock
+
+import pandas as pd
+
+from app import create_app, db
+from app.analytics.rollup import rebuild_rollup
+from app.models import DailySpend, Transaction, Upload, User, category_id, merchant_id, to_minor
+
+# Shape of parse_csv_to_dataframe() output, so the test does not need the category model
+PARSED = pd.DataFrame({
+    "transactionday": [date(2026, 1, 1), date(2026, 1, 1), date(2026, 1, 2), date(2026, 1, 2)],
+    "currency": ["SEK"] * 4,
+    "reference": ["ICA", "ICA", "SL", "Lön"],
+    "description": ["ICA", "ICA", "SL", "Lön"],
+    "amount": [-100.0, -50.0, -40.0, 25000.0],
+    "amount_minor": [-10000, -5000, -4000, 2500000],
+    "is_expense": [True, True, True, False],
+    "category": ["Dagligvaror", "Dagligvaror", "Transport", "Lön"],
+    "is_financial_transaction": [False, False, False, True],
+    "category_confidence": [0.9, 0.9, 0.8, float("nan")],
+})
+
+
+class DailySpendRollupTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+        self.client.post("/auth/register", data={"email": "me@example.com", "password": "pw"})
+        self.me = db.session.execute(db.select(User).where(User.email == "me@example.com")).scalar_one()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _rollup(self):
+        rows = db.session.execute(
+            db.select(
+                DailySpend.user_id, DailySpend.day, DailySpend.category_id,
+                DailySpend.is_expense, DailySpend.is_financial_transaction,
+                DailySpend.amount_minor_sum, DailySpend.tx_count,
+            )
+        ).all()
+        return sorted((tuple(r[:5]), r.amount_minor_sum, r.tx_count) for r in rows)
+
+    def _assert_matches_rebuild(self):
+        maintained = self._rollup()
+        rebuild_rollup()
+        db.session.flush()
+        self.assertEqual(maintained, self._rollup())
+        db.session.rollback()
+        return maintained
+
+    def _add_upload(self, user_id, rows):
+        upload = Upload(original_filename="x.csv", user_id=user_id, row_count=len(rows))
+        db.session.add(upload)
+        db.session.flush()
+        for day, place, category, amount in rows:
+            db.session.add(Transaction(
+                transaction_day=day, merchant_id=merchant_id(place), amount_minor=to_minor(amount),
+                is_expense=amount < 0, category_id=category_id(category), category_confidence=0.3,
+                upload_id=upload.id,
+                user_id=user_id,
+            ))
+        rebuild_rollup()
+        db.session.commit()
+        return upload.id
+
+    def test_upload_and_delete_keep_rollup_consistent(self):
+        with mock.patch("app.ingest.ingest_routes.parse_csv_to_dataframe", return_value=PARSED.copy()):
+            resp = self.client.post(
+                "/upload",
+                data={"file": (io.BytesIO(b"unused"), "bank.csv")},
+                content_type="multipart/form-data",
+            )
+        self.assertEqual(resp.status_code, 302)
+        maintained = self._assert_matches_rebuild()
+        self.assertEqual(sum(n for _, _, n in maintained), 4)
+
+        upload_id = db.session.execute(db.select(Upload.id)).scalar_one()
+        self.client.post(f"/uploads/{upload_id}/delete")
+        self.assertEqual(self._assert_matches_rebuild(), [])
+
+    def test_review_correction_moves_rollup_rows(self):
+        self._add_upload(self.me.id, [
+            (date(2026, 1, 1), "Pressbyrån", "Restaurang", -10.0),
+            (date(2026, 1, 1), "Pressbyrån", "Restaurang", -15.0),
+            (date(2026, 1, 1), "Bistro", "Restaurang", -200.0),
+        ])
+        self.client.post("/analytics/review", data={"merchant_id": merchant_id("Pressbyrån"), "category": "Godis & Snacks"})
+        maintained = self._assert_matches_rebuild()
+        self.assertIn(
+            ((self.me.id, date(2026, 1, 1), category_id("Godis & Snacks"), True, False), -2500, 2),
+            maintained,
+        )
+
+    def test_trend_totals_are_scoped_to_current_user(self):
+        other = User(email="other@example.com")
+        other.set_password("pw")
+        db.session.add(other)
+        db.session.flush()
+        self._add_upload(self.me.id, [(date(2026, 1, 1), "ICA", "Dagligvaror", -123.0)])
+        self._add_upload(other.id, [(date(2026, 1, 1), "Apotek", "Apotek", -9999.0)])
+
+        html = self.client.get("/analytics/trend").get_data(as_text=True)
+        self.assertIn("Dagligvaror", html)
+        self.assertNotIn("9999", html)
+
+
+if __name__ == "__main__":
+    unittest.main()
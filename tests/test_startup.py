@@ -0,0 +1,75 @@
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import sqlalchemy as sa
+
+from app import create_app, db
+from config import TestingConfig
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+class StartupTestCase(unittest.TestCase):
+    def setUp(self):
+        # The schema checks need one database that outlives each app
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        uri = f"sqlite:///{Path(tmp.name) / 'bi_test.db'}"
+        patcher = mock.patch.object(TestingConfig, "SQLALCHEMY_DATABASE_URI", uri)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_create_app_does_not_import_heavy_modules(self):
+        code = (
+            "import sys\n"
+            "from app import create_app\n"
+            "app = create_app('testing')\n"
+            "app.test_client().get('/auth/login')\n"
+            "print(' '.join(m for m in ('pandas', 'numpy', 'sklearn', 'joblib', 'duckdb') if m in sys.modules))\n"
+        )
+        out = subprocess.run(
+            [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout
+        self.assertEqual(out.strip(), "")
+
+    def _assert_schema_left_alone(self, table: str, ddl: str):
+        app = create_app('testing')
+        with app.app_context():
+            db.drop_all()
+            with db.engine.begin() as conn:
+                conn.exec_driver_sql(ddl)
+        try:
+            app = create_app('testing')
+            with app.app_context():
+                self.assertEqual(sa.inspect(db.engine).get_table_names(), [table])
+        finally:
+            with app.app_context():
+                with db.engine.begin() as conn:
+                    conn.exec_driver_sql(f"DROP TABLE {table}")
+                db.session.remove()
+
+    def test_alembic_managed_database_is_left_alone(self):
+        self._assert_schema_left_alone(
+            "alembic_version", "CREATE TABLE alembic_version (version_num VARCHAR(32) NOT NULL)"
+        )
+
+    def test_unstamped_database_is_left_for_stamp_and_upgrade(self):
+        # An older schema that was never stamped: the head tables would break `flask db upgrade`
+        self._assert_schema_left_alone("transactions", "CREATE TABLE transactions (id INTEGER PRIMARY KEY)")
+
+    def test_empty_database_gets_the_schema(self):
+        app = create_app('testing')
+        with app.app_context():
+            db.drop_all()
+        app = create_app('testing')
+        with app.app_context():
+            self.assertTrue(sa.inspect(db.engine).has_table("transactions"))
+            db.session.remove()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import copy
+import tempfile
+import unittest
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+from app.ai_agent_models.train_category_model import (
+    TrainConfig,
+    build_hashed_pipeline,
+    build_hashed_sgd_pipeline,
+    compact_pipeline,
+    fit_model,
+)
+
+TEXTS = [
+    "ICA Maxi | mjölk", "Coop | bröd", "Hemköp | ost", "Willys | frukt", "Lidl | pasta",
+    "SL | månadskort", "SJ | tågbiljett", "Västtrafik | biljett", "Skånetrafiken | kort", "SL | reskassa",
+    "Systembolaget | vin", "Systembolaget | öl", "Systembolaget | cider", "Systembolaget | sprit", "Systembolaget | present",
+]
+LABELS = ["Dagligvaror"] * 5 + ["Lokaltrafik"] * 5 + ["Alkohol"] * 5
+PROBES = TEXTS + ["ICA Nära | ost", "SL | biljett", "Systembolaget | whisky", "okänd butik"]
+
+
+class CompactPipelineTestCase(unittest.TestCase):
+    def _check(self, factory):
+        fitted = factory(n_features=2 ** 12).fit(TEXTS, LABELS)
+        compacted = compact_pipeline(copy.deepcopy(fitted))
+
+        clf = compacted.named_steps["clf"]
+        self.assertTrue(hasattr(clf.coef_, "toarray"))
+        self.assertEqual(clf.coef_.dtype, np.float32)
+        self.assertEqual(compacted.predict(PROBES).tolist(), fitted.predict(PROBES).tolist())
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "model.joblib"
+            joblib.dump(compacted, path)
+            loaded = joblib.load(path)
+        self.assertEqual(loaded.predict(PROBES).tolist(), fitted.predict(PROBES).tolist())
+        np.testing.assert_allclose(loaded.predict_proba(PROBES), fitted.predict_proba(PROBES), atol=1e-3)
+
+    def test_hashed_logistic_regression(self):
+        self._check(build_hashed_pipeline)
+
+    def test_hashed_sgd(self):
+        self._check(build_hashed_sgd_pipeline)
+
+
+class WeightedFitTestCase(unittest.TestCase):
+    def test_weights_count_towards_document_frequency(self):
+        # "pant" occurs twice, but in one collapsed row; min_df=2 must keep it
+        texts, labels, weights = TEXTS + ["Willys | pant"], LABELS + ["Dagligvaror"], [1.0] * 15 + [2.0]
+        expanded = fit_model(TrainConfig(), TEXTS + ["Willys | pant"] * 2, LABELS + ["Dagligvaror"] * 2)
+        weighted = fit_model(TrainConfig(), texts, labels, sample_weight=weights)
+
+        vocabulary = weighted.named_steps["tfidf"].vocabulary_
+        self.assertIn("pant", vocabulary)
+        self.assertEqual(vocabulary, expanded.named_steps["tfidf"].vocabulary_)
+        np.testing.assert_allclose(weighted.named_steps["tfidf"].idf_, expanded.named_steps["tfidf"].idf_)
+        np.testing.assert_allclose(weighted.predict_proba(PROBES), expanded.predict_proba(PROBES), atol=1e-3)
+
+    def test_fractional_weights_count_fractionally(self):
+        # 1.5 occurrences of "pant" stay below min_df=2 instead of rounding up
+        weighted = fit_model(
+            TrainConfig(), TEXTS + ["Willys | pant"], LABELS + ["Dagligvaror"], sample_weight=[1.0] * 15 + [1.5]
+        )
+        self.assertNotIn("pant", weighted.named_steps["tfidf"].vocabulary_)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+import pandas as pd
+
+from app.ai_agent_models.swedish_csv_to_training import (
+    ConvertConfig,
+    file_sha256,
+    map_to_target,
+    map_to_target_series,
+    update_training_jsonl,
+)
+from app.ai_agent_models.train_category_model import load_weighted_jsonl
+
+HEADER = "Ställe;Kategori;Specifikation\n"
+
+
+class TrainingDataTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        self.csv = self.dir / "ledger.csv"
+        self.cfg = ConvertConfig(csv_path=self.csv, out_jsonl=self.dir / "training.jsonl")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _write_csv(self, rows):
+        self.csv.write_text(HEADER + "".join(f"{r}\n" for r in rows), encoding="utf-8")
+
+    def _weights(self):
+        out = {}
+        for line in self.cfg.out_jsonl.read_text(encoding="utf-8").splitlines():
+            obj = json.loads(line)
+            key = (obj["text"], obj["label"])
+            out[key] = out.get(key, 0) + obj["weight"]
+        return out
+
+    def test_series_mapping_matches_scalar_rules(self):
+        rows = [
+            ("ICA Maxi", "Mat", "frukt"),
+            ("Systembolaget", "", ""),
+            ("Pressbyrån", "Nöjen", "kaffe"),
+            ("NK", "Hem", "el. kabel"),
+            ("okänd", "Kläder", ""),
+            ("okänd", "Okänd", "x"),
+        ]
+        st, lc, sp = (pd.Series(col) for col in zip(*rows))
+        expected = [map_to_target(stalle=a, legacy_cat=b, spec=c) for a, b, c in rows]
+        self.assertEqual(map_to_target_series(st, lc, sp).tolist(), expected)
+
+    def test_duplicates_collapse_into_weights(self):
+        self._write_csv(["ICA;Livsmedel;mjölk"] * 3 + ["SL;Resor;kort"])
+        self.assertEqual(update_training_jsonl(self.cfg), 4)
+        self.assertEqual(
+            self._weights(),
+            {("ICA | mjölk", "Dagligvaror"): 3, ("SL | kort", "Lokaltrafik"): 1},
+        )
+
+    def test_refresh_appends_only_new_rows(self):
+        self._write_csv(["ICA;Livsmedel;mjölk", "SL;Resor;kort"])
+        update_training_jsonl(self.cfg)
+        first_hash = file_sha256(self.cfg.out_jsonl)
+
+        # Unchanged source: nothing converted, file untouched
+        self.assertEqual(update_training_jsonl(self.cfg), 0)
+        self.assertEqual(file_sha256(self.cfg.out_jsonl), first_hash)
+
+        # A repeated row is a new occurrence and must be counted once more
+        self._write_csv(["ICA;Livsmedel;mjölk", "SL;Resor;kort", "ICA;Livsmedel;mjölk"])
+        self.assertEqual(update_training_jsonl(self.cfg), 1)
+        self.assertEqual(self._weights()[("ICA | mjölk", "Dagligvaror")], 2)
+
+    def test_refresh_keeps_one_line_per_pair(self):
+        self._write_csv(["ICA;Livsmedel;mjölk", "SL;Resor;kort"])
+        update_training_jsonl(self.cfg)
+        self._write_csv(["ICA;Livsmedel;mjölk", "SL;Resor;kort", "ICA;Livsmedel;mjölk"])
+        update_training_jsonl(self.cfg)
+        self._write_csv(["ICA;Livsmedel;mjölk", "SL;Resor;kort", "ICA;Livsmedel;mjölk", "ICA;Livsmedel;mjölk"])
+        update_training_jsonl(self.cfg)
+
+        lines = [json.loads(line) for line in self.cfg.out_jsonl.read_text(encoding="utf-8").splitlines()]
+        self.assertEqual(lines, [
+            {"text": "ICA | mjölk", "label": "Dagligvaror", "weight": 3},
+            {"text": "SL | kort", "label": "Lokaltrafik", "weight": 1},
+        ])
+        self.assertFalse(self.cfg.out_jsonl.with_name(self.cfg.out_jsonl.name + ".tmp").exists())
+
+    def test_loader_merges_repeated_pairs(self):
+        self.cfg.out_jsonl.write_text(
+            "".join(json.dumps(obj, ensure_ascii=False) + "\n" for obj in [
+                {"text": "ICA | mjölk", "label": "Dagligvaror", "weight": 2},
+                {"text": "SL | kort", "label": "Lokaltrafik"},
+                {"text": "ICA | mjölk", "label": "Dagligvaror", "weight": 1},
+            ]),
+            encoding="utf-8",
+        )
+        texts, labels, weights = load_weighted_jsonl(self.cfg.out_jsonl)
+        self.assertEqual(texts, ["ICA | mjölk", "SL | kort"])
+        self.assertEqual(labels, ["Dagligvaror", "Lokaltrafik"])
+        self.assertEqual(weights, [3.0, 1.0])
+
+    def test_edited_jsonl_triggers_rebuild(self):
+        self._write_csv(["ICA;Livsmedel;mjölk"])
+        update_training_jsonl(self.cfg)
+        with self.cfg.out_jsonl.open("a", encoding="utf-8") as f:
+            f.write(json.dumps({"text": "manual", "label": "Barn", "weight": 1}) + "\n")
+
+        self.assertEqual(update_training_jsonl(self.cfg), 1)
+        self.assertEqual(self._weights(), {("ICA | mjölk", "Dagligvaror"): 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
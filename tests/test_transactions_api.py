@@ -0,0 +1,97 @@
+import unittest
+from datetime import date
+
+from app import create_app, db
+from app.analytics.rollup import rebuild_rollup
+from app.models import UNCATEGORIZED, Transaction, Upload, User, category_id, merchant_id, to_minor
+
+
+class TransactionsApiTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app.config["TRANSACTIONS_PAGE_SIZE"] = 2
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+
+        self.client.post("/auth/register", data={"email": "me@example.com", "password": "pw"})
+        me = db.session.execute(db.select(User).where(User.email == "me@example.com")).scalar_one()
+        other = User(email="other@example.com")
+        other.set_password("pw")
+        db.session.add(other)
+        db.session.flush()
+
+        # Same-day rows make the id tie-breaker matter
+        self._upload(me.id, [
+            (date(2026, 1, 2), "B", -2.0),
+            (date(2026, 1, 1), "A", -1.0),
+            (date(2026, 1, 2), "C", -3.0),
+            (date(2026, 1, 2), "D", -4.0),
+            (date(2026, 1, 3), "E", -5.0),
+        ])
+        self._upload(other.id, [(date(2026, 1, 2), "Other", -9.0)])
+        rebuild_rollup()
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _upload(self, user_id, rows):
+        upload = Upload(original_filename="x.csv", user_id=user_id, row_count=len(rows))
+        db.session.add(upload)
+        db.session.flush()
+        for day, place, amount in rows:
+            db.session.add(Transaction(transaction_day=day, merchant_id=merchant_id(place), amount_minor=to_minor(amount),
+                                       category_id=category_id(UNCATEGORIZED),
+                                       upload_id=upload.id, user_id=user_id))
+
+    def _all_pages(self, query=""):
+        places, cursor, pages = [], None, 0
+        while True:
+            url = "/analytics/api/transactions?" + query + (f"&after={cursor}" if cursor else "")
+            data = self.client.get(url).get_json()
+            places += [row["place"] for row in data["rows"]]
+            pages += 1
+            cursor = data["next"]
+            if cursor is None:
+                return places, pages
+
+    def test_pages_cover_all_rows_in_order(self):
+        places, pages = self._all_pages()
+        self.assertEqual(places, ["A", "B", "C", "D", "E"])
+        self.assertEqual(pages, 3)
+
+    def test_filters_apply_to_every_page(self):
+        places, _ = self._all_pages("start=2026-01-02&end=2026-01-02")
+        self.assertEqual(places, ["B", "C", "D"])
+
+    def test_trend_renders_only_first_page(self):
+        html = self.client.get("/analytics/trend").get_data(as_text=True)
+        self.assertIn('data-next="2026-01-02_', html)
+        self.assertNotIn("<td>E</td>", html)
+
+    def test_trend_series(self):
+        data = self.client.get("/analytics/api/trend?start=2026-01-02").get_json()
+        self.assertEqual(data["days"], ["2026-01-02", "2026-01-03"])
+        self.assertEqual(data["totals"], [9.0, 5.0])
+        self.assertEqual(data["total"], 14.0)
+
+    def test_category_series_ignore_category_filter(self):
+        data = self.client.get("/analytics/api/categories?category=Other").get_json()
+        self.assertEqual(data, {"categories": ["Uncategorized"], "totals": [15.0]})
+
+    def test_series_endpoints_answer_304(self):
+        for url in ("/analytics/api/trend", "/analytics/api/categories"):
+            etag = self.client.get(url).headers["ETag"]
+            self.assertEqual(self.client.get(url, headers={"If-None-Match": etag}).status_code, 304)
+
+    def test_invalid_cursor(self):
+        resp = self.client.get("/analytics/api/transactions?after=nope")
+        self.assertEqual(resp.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()